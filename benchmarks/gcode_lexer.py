@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+"""G-code editor lexer micro-benchmark.
+
+Compares the original character by character ``GcodeLexer.styleText``
+loop, which makes one ``setStyling`` call per character, with the block
+styling of :func:`styleBytes` on a generated surfacing program.
+
+Qt is not needed, the ``setStyling`` calls are counted instead of sent
+to Scintilla. With the lazy lexer only the lines near the screen are
+styled, so the time to style a screen full of lines is also shown.
+
+Usage::
+
+    $ python benchmarks/gcode_lexer.py [--size=MB]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qtpyvcp.lib.gcode_tokens import styleBytes
+
+SCREEN_LINES = 250
+
+
+def makeProgram(size):
+    """Generate about `size` bytes of G-code."""
+    lines = ['%', '(MSG, surfacing test program)', 'G21 G90 G17 (metric, absolute)',
+             'T1 M6 G43 H1', 'S12000 M3', '#<depth> = -0.5', 'G0 X0 Y0 Z5']
+    total = sum(len(line) + 1 for line in lines)
+    y = 0.0
+    while total < size:
+        y += 0.05
+        line = 'G1 X{:.4f} Y{:.4f} Z[#<depth> + {:.4f}] F{}'.format(
+            random.uniform(0, 500), y, random.uniform(-0.1, 0.1),
+            random.choice((1200, 1500)))
+        lines.append(line)
+        total += len(line) + 1
+    lines.append('M30')
+    lines.append('%')
+    return '\n'.join(lines) + '\n'
+
+
+def legacyStyle(source, set_style):
+    """Copy of the original ``GcodeLexer.styleText`` loop."""
+    for line in source.splitlines(True):
+        graymode = False
+        msg = ('msg' in line.lower() or 'debug' in line.lower())
+        for char in str(line):
+            if char == '(':
+                graymode = True
+                set_style(1, 1)
+                continue
+            elif char == ')':
+                graymode = False
+                set_style(1, 1)
+                continue
+            elif graymode:
+                if msg and char.lower() in ('m', 's', 'g', ',', 'd', 'e', 'b', 'u'):
+                    set_style(1, 3)
+                    if char == ',': msg = False
+                else:
+                    set_style(1, 1)
+                continue
+            elif char in ('%', '<', '>', '#', '='):
+                state = 3
+            elif char in ('[', ']'):
+                state = 4
+            elif char.isalpha():
+                state = 2
+            elif char.isdigit():
+                state = 0
+            else:
+                state = 0
+            set_style(1, state)
+
+
+def blockStyle(source, set_style):
+    """The styling of ``GcodeLexer.styleRange``, one call for the block."""
+    styles = styleBytes(source)
+    set_style(len(styles), styles)
+
+
+def bench(name, style, source):
+    calls = [0]
+
+    def set_style(length, style):
+        calls[0] += 1
+
+    start = time.time()
+    style(source, set_style)
+    elapsed = time.time() - start
+    print('{:<24} {:>10.3f} s {:>12d} calls'.format(name, elapsed, calls[0]))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=float, default=10, help='program size in MB')
+    opts = parser.parse_args()
+
+    random.seed(0)
+    source = makeProgram(int(opts.size * 1024 * 1024))
+    lines = source.count('\n')
+    screen = ''.join(source.splitlines(True)[:SCREEN_LINES])
+    print('{:.1f} MB, {} lines\n'.format(len(source) / 1048576., lines))
+
+    before = bench('before (per char)', legacyStyle, source)
+    after = bench('after (block)', blockStyle, source)
+    print('{:<24} {:>10.1f}x'.format('speedup', before / after))
+
+    print('\nStyling one screen ({} lines):'.format(SCREEN_LINES))
+    before = bench('before (whole file)', legacyStyle, source)
+    after = bench('after (screen only)', blockStyle, screen)
+    print('{:<24} {:>10.0f}x'.format('speedup', before / max(after, 1e-6)))
+
+
+if __name__ == '__main__':
+    main()
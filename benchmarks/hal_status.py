@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+"""HAL pin polling benchmark.
+
+Compares the per cycle cost of the ``halcmd`` based ``HALPoller`` (spawn
+``halcmd -s show pin``, parse every line and diff the whole pin dict) with
+reading only the subscribed pins directly from HAL shared memory through
+the ``hal`` python bindings, as done by ``HALMemPoller``.
+
+LinuxCNC (e.g. a sim config) must be running. To simulate a large config a
+throwaway component with ``--pins`` extra pins is created for the duration
+of the benchmark.
+
+Usage::
+
+    $ python benchmarks/hal_status.py [--pins=N] [--subscribed=N] [--cycles=N]
+"""
+
+import time
+import argparse
+import subprocess
+
+import hal
+
+
+def halcmd_cycle(old_pins):
+    """One cycle of the legacy HALPoller.hal_poll_thread loop."""
+    p = subprocess.Popen(['halcmd', '-s', 'show', 'pin'],
+                         stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+    raw = p.communicate()[0].split('\n')
+
+    pins = [filter(lambda a: a != '', [x.strip() for x in line.split(' ')]) for line in raw]
+
+    pin_dict = {}
+    for p in pins:
+        if len(p) >= 5:
+            pin_dict[p[4]] = p[3]
+
+    changed_items = set(pin_dict.items()) - set(old_pins.items())
+    return pin_dict, changed_items
+
+
+def shm_cycle(pin_names, old_values):
+    """One cycle of HALMemPoller._poll."""
+    changed = []
+    for name in pin_names:
+        value = hal.get_value(name)
+        if value != old_values.get(name):
+            old_values[name] = value
+            changed.append(name)
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pins', type=int, default=2000,
+                        help='number of extra pins to create')
+    parser.add_argument('--subscribed', type=int, default=150,
+                        help='number of pins watched by the VCP')
+    parser.add_argument('--cycles', type=int, default=20)
+    opts = parser.parse_args()
+
+    comp = hal.component('hal-status-bench')
+    for i in range(opts.pins):
+        comp.newpin('pin-{}'.format(i), hal.HAL_FLOAT, hal.HAL_OUT)
+    comp.ready()
+
+    try:
+        total_pins = len(subprocess.check_output(['halcmd', '-s', 'show', 'pin']).splitlines())
+        print('{} HAL pins, {} subscribed\n'.format(total_pins, opts.subscribed))
+
+        pin_names = ['hal-status-bench.pin-{}'.format(i)
+                     for i in range(min(opts.subscribed, opts.pins))]
+
+        pin_dict = {}
+        start = time.time()
+        for i in range(opts.cycles):
+            comp['pin-0'] = i
+            pin_dict, changed = halcmd_cycle(pin_dict)
+        halcmd_ms = (time.time() - start) / opts.cycles * 1e3
+
+        values = {}
+        start = time.time()
+        for i in range(opts.cycles):
+            comp['pin-0'] = i
+            shm_cycle(pin_names, values)
+        shm_ms = (time.time() - start) / opts.cycles * 1e3
+
+        print('{:<28} {:>10.3f} ms/cycle'.format('halcmd (HALPoller)', halcmd_ms))
+        print('{:<28} {:>10.3f} ms/cycle'.format('shared mem (HALMemPoller)', shm_ms))
+        print('{:<28} {:>10.1f}x'.format('speedup', halcmd_ms / shm_ms))
+    finally:
+        comp.exit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+"""Status plugin poll loop micro-benchmark.
+
+Compares the per tick cost of the original ``Status._periodic`` diffing
+(``getattr`` + ``!=`` on every item, plus ``set`` differences for each
+joint and spindle dict) with the table driven :class:`StatusTable`, both
+for all channels and for only the subscribed channels of a typical VCP.
+
+LinuxCNC does not need to be running, a fake stat object with the same
+layout as ``linuxcnc.stat`` is used so the results are repeatable.
+
+Usage::
+
+    $ python benchmarks/status_diff.py [--ticks=N] [--joints=N]
+"""
+
+import os
+import sys
+import timeit
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qtpyvcp.lib.status_diff import StatusTable
+
+JOINT_KEYS = ['jointType', 'units', 'backlash', 'min_position_limit',
+              'max_position_limit', 'max_ferror', 'min_ferror', 'ferror_current',
+              'ferror_highmark', 'output', 'input', 'velocity', 'inpos', 'homing',
+              'homed', 'fault', 'enabled', 'min_soft_limit', 'max_soft_limit',
+              'min_hard_limit', 'max_hard_limit', 'override_limits']
+
+SPINDLE_KEYS = ['speed', 'override', 'override_enabled', 'direction', 'brake',
+                'increasing', 'enabled', 'orient_state', 'orient_fault',
+                'homed']
+
+POS_ITEMS = ['position', 'actual_position', 'joint_position',
+             'joint_actual_position', 'dtg', 'probed_position']
+
+
+class FakeStat(object):
+    """Mimics the attribute layout of a polled ``linuxcnc.stat``."""
+
+    def __init__(self, num_items=80, joints=3, spindles=1):
+        self.joints = joints
+        self.spindles = spindles
+        self.items = list(POS_ITEMS)
+        for pos in POS_ITEMS:
+            setattr(self, pos, (0.0,) * 9)
+        for i in range(num_items - len(POS_ITEMS)):
+            name = 'item_{}'.format(i)
+            setattr(self, name, i)
+            self.items.append(name)
+        self._joint = [dict.fromkeys(JOINT_KEYS, 0.0) for _ in range(16)]
+        self._spindle = [dict.fromkeys(SPINDLE_KEYS, 0) for _ in range(8)]
+
+    @property
+    def joint(self):
+        # linuxcnc.stat builds new dicts on every access
+        return tuple(dict(j) for j in self._joint)
+
+    @property
+    def spindle(self):
+        return tuple(dict(s) for s in self._spindle)
+
+    def move(self):
+        """Simulate a tick during a move: positions and joint outputs change."""
+        pos = tuple(random.random() for _ in range(9))
+        for item in POS_ITEMS:
+            setattr(self, item, pos)
+        self.current_vel = random.random()
+        for jnum in range(self.joints):
+            self._joint[jnum]['output'] = pos[jnum]
+            self._joint[jnum]['input'] = pos[jnum]
+            self._joint[jnum]['velocity'] = random.random()
+
+
+class LegacyDiff(object):
+    """Copy of the original diffing in ``Status._periodic``."""
+
+    def __init__(self, stat):
+        self.old = {item: getattr(stat, item) for item in stat.items}
+        self.jstat = [dict(j) for j in stat.joint[:9]]
+        self.sstat = [dict(s) for s in stat.spindle[:8]]
+
+    def diff(self, stat):
+        changes = []
+        for item, old_val in self.old.iteritems():
+            new_val = getattr(stat, item)
+            if new_val != old_val:
+                self.old[item] = new_val
+                changes.append((item, new_val))
+
+        for jnum, old in enumerate(self.jstat):
+            jstat = stat.joint[jnum].items()
+            for key, val in set(jstat) - set(old.items()):
+                changes.append(('joint.{}.{}'.format(jnum, key), val))
+            old.update(jstat)
+
+        for snum, old in enumerate(self.sstat):
+            sstat = stat.spindle[snum].items()
+            for key, val in set(sstat) - set(old.items()):
+                changes.append(('spindle.{}.{}'.format(snum, key), val))
+            old.update(sstat)
+
+        return changes
+
+
+def bench(name, differ, stat, ticks, moving):
+    def tick():
+        if moving:
+            stat.move()
+        differ.diff(stat)
+
+    # time the stat changes separately so they can be subtracted
+    base = min(timeit.repeat(stat.move if moving else (lambda: None),
+                             number=ticks, repeat=3))
+    total = min(timeit.repeat(tick, number=ticks, repeat=3))
+    usec = (total - base) / ticks * 1e6
+    print('{:<24} {:>10.1f} us/tick'.format(name, usec))
+    return usec
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--joints', type=int, default=3)
+    parser.add_argument('--subscribed', type=int, default=25,
+                        help='number of subscribed stat channels')
+    opts = parser.parse_args()
+
+    stat = FakeStat(joints=opts.joints)
+
+    for moving in (False, True):
+        print('\n{} machine, {} joints:'.format('Moving' if moving else 'Idle',
+                                                opts.joints))
+        legacy = LegacyDiff(stat)
+        channels = list(stat.items)
+        channels.extend('joint.{}.{}'.format(jnum, key)
+                        for jnum in range(9) for key in JOINT_KEYS)
+        channels.extend('spindle.{}.{}'.format(snum, key)
+                        for snum in range(8) for key in SPINDLE_KEYS)
+        table = StatusTable(channels)
+        table.snapshot(stat)
+
+        # positions plus a few joint and spindle items, like a typical VCP
+        subscribed = channels[:opts.subscribed - 4] + \
+            ['joint.0.homed', 'joint.1.homed', 'joint.2.homed', 'spindle.0.speed']
+        sub_table = StatusTable(subscribed)
+        sub_table.snapshot(stat)
+
+        before = bench('before (legacy)', legacy, stat, opts.ticks, moving)
+        after = bench('after (StatusTable)', table, stat, opts.ticks, moving)
+        subs = bench('after (subscribed only)', sub_table, stat, opts.ticks, moving)
+        print('{:<24} {:>10.1f}x'.format('speedup', before / after))
+        print('{:<24} {:>10.1f}x'.format('speedup (subscribed)', before / subs))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@
 
 import os
 
-from qtpyvcp.lib.types import DotDict
+from qtpyvcp.lib.types import DotDict, LazyDict
 
 from ._version import get_versions
 __version__ = get_versions()['version']
@@ -17,7 +17,7 @@ DEFAULT_CONFIG_FILE = os.path.join(QTPYVCP_DIR, 'yaml_lib/default_config.yml')
 # globals
 CONFIG = {}
 OPTIONS = DotDict()
-DIALOGS = {}
+DIALOGS = LazyDict()
 WINDOWS = {}
 SETTINGS = {}
 
@@ -11,10 +11,11 @@ from pkg_resources import iter_entry_points
 from qtpy import API
 from qtpy.QtGui import QFontDatabase
 from qtpy.QtCore import QTimer, Slot, Qt
-from qtpy.QtWidgets import QApplication, QStyleFactory
+from qtpy.QtWidgets import QApplication, QStyleFactory, QWidget
 
 import qtpyvcp
 
+from qtpyvcp.lib import startup_profiler
 from qtpyvcp.utilities.logger import initBaseLogger
 from qtpyvcp.plugins import initialisePlugins, terminatePlugins, getPlugin
 from qtpyvcp.widgets.base_widgets.base_widget import VCPPrimitiveWidget
@@ -44,6 +45,9 @@ class VCPApplication(QApplication):
 
         self.status = getPlugin('status')
 
+        # set once the widgets of the startup windows have been initialized
+        self.widgets_initialised = False
+
         # initialize plugins
         initialisePlugins()
 
@@ -222,19 +226,46 @@ class VCPApplication(QApplication):
             total_time = sum(self.perf.cpu_times())
             usage = ["{:.3f}".format(total_percent * ((t.system_time + t.user_time) / total_time)) for t in self.perf.threads()]
 
+        from qtpyvcp.hal import COMPONENTS
+        hal_scans = []
+        for name, comp in COMPONENTS.items():
+            stats = comp.scanStats(reset=True)
+            hal_scans.append("{}: {pins} pins, avg {avg:.3f}ms, max {max:.3f}ms"
+                             .format(name, **stats))
+
         LOG.info("Performance:\n"
                  "    Total CPU usage (%): {}\n"
                  "    Per Thread: {}\n"
-                 .format(total_percent, ' '.join(usage)))
+                 "    HAL scan time: {}\n"
+                 .format(total_percent, ' '.join(usage), '; '.join(hal_scans)))
 
     def terminate(self):
         self.terminateWidgets()
         terminatePlugins()
 
-    def initialiseWidgets(self):
-        for w in self.allWidgets():
+    def initialiseWidgets(self, widget=None):
+        """Initialize the VCP widgets.
+
+        Args:
+            widget (QWidget) : Only initialize this widget and its children,
+                for windows created after startup, such as lazily built
+                dialogs. By default all the widgets are initialized.
+        """
+        if widget is None:
+            self.widgets_initialised = True
+            widgets = self.allWidgets()
+        else:
+            widgets = [widget] + widget.findChildren(QWidget)
+
+        profile = startup_profiler.isRunning()
+        for w in widgets:
             if isinstance(w, VCPPrimitiveWidget):
-                w.initialize()
+                if profile:
+                    with startup_profiler.span('{} ({})'.format(w.objectName(),
+                                                                type(w).__name__), 'widgets'):
+                        w.initialize()
+                else:
+                    w.initialize()
 
     def terminateWidgets(self):
         LOG.debug("Terminating widgets")
@@ -2,12 +2,15 @@ import os
 import sys
 import time
 import importlib
+from functools import partial
 from pkg_resources import iter_entry_points
 
+from qtpy.QtCore import QObject, QEvent, QTimer
 from qtpy.QtWidgets import QApplication
 
 import qtpyvcp
 from qtpyvcp import hal
+from qtpyvcp.lib import startup_profiler
 from qtpyvcp.utilities.logger import getLogger
 from qtpyvcp.plugins import registerPluginFromClass
 from qtpyvcp.widgets.dialogs.error_dialog import ErrorDialog, IGNORE_LIST
@@ -51,6 +54,7 @@ def log_time(task, times=[time.time(), time.time()]):
     LOG.debug("yellow<Time:> {:.3f} (green<{:+.3f}>) - {}"
               .format(now - times[0], now - times[1], task))
     times[1] = now
+    startup_profiler.mark(task)
 
 log_time("in script")
 
@@ -61,22 +65,31 @@ def launch_application(opts, config):
 
     hal_comp = hal.component('qtpyvcp')
 
-    LOG.debug('Loading data plugings')
+    LOG.debug('Registering data plugings')
     loadPlugins(config['data_plugins'])
-    log_time('done loading data plugins')
+    log_time('done registering data plugins')
 
     LOG.debug('Initializing app')
     app = _initialize_object_from_dict(config['application'])
     log_time('done initializing app')
 
     LOG.debug('Loading dialogs')
-    loadDialogs(config['dialogs'])
+    preload = loadDialogs(config['dialogs'])
     log_time('done loading dialogs')
 
     LOG.debug('Loading windows')
     loadWindows(config['windows'])
     log_time('done loading windows')
 
+    window = qtpyvcp.WINDOWS.get('mainwindow')
+    if preload:
+        DialogPreloader(preload, window, parent=app)
+
+    if startup_profiler.isRunning():
+        log_file = opts.log_file or os.path.expanduser('~/qtpyvcp.log')
+        profile = os.path.splitext(log_file)[0] + '-startup'
+        startup_profiler.finishWhenShown(window, profile + '.json', profile + '.txt')
+
     LOG.debug('Initializing widgets')
     app.initialiseWidgets()
     log_time('done initializing widgets')
@@ -205,6 +218,11 @@ def _initialize_object_from_dict(object_dict, parent=None):
 
 
 def loadPlugins(plugins):
+    """Register the data plugins.
+
+    The plugins are constructed when the application initializes them, or
+    when they are first used, lazy plugins only when first used.
+    """
     for plugin_id, plugin_dict in plugins.items():
 
         try:
@@ -215,13 +233,16 @@ def loadPlugins(plugins):
         args = plugin_dict.get('args', [])
         kwargs = plugin_dict.get('kwargs', {})
 
-        registerPluginFromClass(plugin_id=plugin_id, plugin_cls=cls, args=args, kwargs=kwargs)
+        registerPluginFromClass(plugin_id=plugin_id, plugin_cls=cls, args=args, kwargs=kwargs,
+                                requires=plugin_dict.get('requires') or [],
+                                defer=True, lazy=plugin_dict.get('lazy', False))
 
 
 def loadWindows(windows):
     for window_id, window_dict in windows.items():
 
-        window = _initialize_object_from_dict(window_dict)
+        with startup_profiler.span(window_id, 'windows'):
+            window = _initialize_object_from_dict(window_dict)
         qtpyvcp.WINDOWS[window_id] = window
 
         # show the window by default
@@ -229,8 +250,84 @@ def loadWindows(windows):
             window.show()
 
 
+def _buildDialog(dialog_id, dialog_dict):
+    start = time.time()
+    inst = _initialize_object_from_dict(dialog_dict)
+
+    # dialogs built after startup miss the initialization of all widgets
+    app = QApplication.instance()
+    if getattr(app, 'widgets_initialised', False):
+        app.initialiseWidgets(inst)
+
+    end = time.time()
+    startup_profiler.record(dialog_id, 'dialogs', start, end)
+    log_time('built {} dialog in {:.3f}s'.format(dialog_id, end - start))
+    return inst
+
+
 def loadDialogs(dialogs):
+    """Register the dialogs, they are built the first time they are used.
+
+    Dialogs with ``preload: startup`` are built straight away, and those
+    with ``preload: idle`` after the main window has been shown.
+
+    Returns:
+        list : The IDs of the dialogs to build once the main window is shown.
+    """
+    idle = []
     for dialogs_id, dialogs_dict in dialogs.items():
 
-        inst = _initialize_object_from_dict(dialogs_dict)
-        qtpyvcp.DIALOGS[dialogs_id] = inst
+        qtpyvcp.DIALOGS.setFactory(dialogs_id, partial(_buildDialog, dialogs_id, dialogs_dict))
+
+        preload = dialogs_dict.get('preload')
+        if preload == 'startup':
+            qtpyvcp.DIALOGS[dialogs_id]
+        elif preload == 'idle':
+            idle.append(dialogs_id)
+        elif preload:
+            LOG.warning("Unknown preload option '{}' for the {} dialog, should be "
+                        "'startup' or 'idle'".format(preload, dialogs_id))
+
+    return idle
+
+
+class DialogPreloader(QObject):
+    """Builds dialogs one at a time once `window` has been painted.
+
+    One dialog is built per pass of the event loop, so the window stays
+    responsive while they are built.
+
+    Args:
+        dialog_ids (list) : The IDs of the dialogs to build.
+        window (QWidget) : The window to wait for, if None the dialogs
+            are built as soon as the event loop starts.
+        parent (QObject) : The parent object.
+    """
+    def __init__(self, dialog_ids, window=None, parent=None):
+        super(DialogPreloader, self).__init__(parent)
+        self._pending = list(dialog_ids)
+
+        if window is None:
+            QTimer.singleShot(0, self._buildNext)
+        else:
+            window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            QTimer.singleShot(0, self._buildNext)
+        return False
+
+    def _buildNext(self):
+        while self._pending:
+            dialog_id = self._pending.pop(0)
+            if qtpyvcp.DIALOGS.isCreated(dialog_id):
+                continue
+
+            try:
+                qtpyvcp.DIALOGS[dialog_id]
+            except Exception:
+                LOG.exception("Error preloading the {} dialog".format(dialog_id))
+
+            QTimer.singleShot(0, self._buildNext)
+            return
@@ -1,5 +1,6 @@
 """QtPyVCP HAL Interface"""
 
+import time
 import signal
 import _hal
 import hal
@@ -15,13 +16,15 @@ class QPin(QObject):
     """QPin
 
     QPin is a QObject wrapper for a HAL pin and emits the valueChanged signal
-    when the HAL pins value changes.
+    when the HAL pins value changes. The pins are scanned for changes by the
+    :class:`QComponent` they belong to.
 
     Args:
         comp (_hal.component) : The HAL comp the pins should belong to.
         name (str) : The name of the HAL pin to create.
         typ (str) : The type of the HAL pin, one of `BOOL`, `FLOAT`, `U32` or `S32`.
         dir (str) : the direction of the HAL pin, one of `IN` or `OUT`.
+        cycle_time (int) : How often the pin should be scanned for changes, in ms.
 
     Properties:
         value (float | int | bool) : The the current value of the HAL pin.
@@ -36,13 +39,10 @@ class QPin(QObject):
         self._pin = _hal.component.newpin(comp, name, typ, dir)
         self._val = self._pin.get()
 
-        self.startTimer(cycle_time)
-
-    def timerEvent(self, timer):
-        tmp = self._pin.get()
-        if tmp != self._val:
-            self._val = tmp
-            self.valueChanged.emit(tmp)
+        self.name = name
+        self.cycle_time = cycle_time
+        # OUT pins can only be changed by us, so don't need to be scanned
+        self.scanned = dir != hal.HAL_OUT
 
     @property
     def value(self):
@@ -55,8 +55,27 @@ class QPin(QObject):
         self.valueChanged.emit(val)
 
 
+class _ScanBucket(object):
+    """Pins that are scanned at the same rate."""
+
+    __slots__ = ('cycle_time', 'every', 'pins')
+
+    def __init__(self, cycle_time):
+        self.cycle_time = cycle_time
+        self.every = 1
+        self.pins = []
+
+
 class QComponent(QObject):
-    """QComponent"""
+    """QComponent
+
+    Owns a single scan timer which checks all the component's input pins for
+    changes in one pass. Pins are grouped into buckets by their scan rate,
+    the timer runs at the fastest rate and each bucket is only scanned when
+    it is due. ``valueChanged`` is only emitted for pins whose value changed.
+
+    Scan times are recorded and can be retrieved with :meth:`scanStats`.
+    """
     def __init__(self, comp_name):
         super(QComponent, self).__init__()
 
@@ -81,17 +100,109 @@ class QComponent(QObject):
         self._comp = _hal.component(comp_name)
         self._pins = {}
 
-    def addPin(self, name, type, direction):
+        self._buckets = []
+        self._scan_timer_id = None
+        self._scan_interval = None
+        self._scan_ticks = 0
+
+        self._scan_count = 0
+        self._scan_time_total = 0.0
+        self._scan_time_max = 0.0
+        self._scan_time_last = 0.0
+
+    def addPin(self, name, type, direction, cycle_time=100):
 
         pin_type = self.type_map.get(type.lower())
         pin_dir = self.dir_map.get(direction.lower())
 
         LOG.debug("Adding HAL pin: %s.%s (%s %s)", self.name, name, type, direction)
 
-        pin = QPin(self._comp, name, pin_type, pin_dir)
+        pin = QPin(self._comp, name, pin_type, pin_dir, cycle_time)
         self._pins[name] = pin
+
+        if pin.scanned:
+            self._addToScan(pin)
+
         return pin
 
+    def _addToScan(self, pin):
+        for bucket in self._buckets:
+            if bucket.cycle_time == pin.cycle_time:
+                bucket.pins.append(pin)
+                return
+
+        bucket = _ScanBucket(pin.cycle_time)
+        bucket.pins.append(pin)
+        self._buckets.append(bucket)
+        self._buckets.sort(key=lambda b: b.cycle_time)
+
+        # (re)start the scan timer at the fastest bucket rate
+        interval = self._buckets[0].cycle_time
+        for bucket in self._buckets:
+            bucket.every = max(1, int(round(float(bucket.cycle_time) / interval)))
+
+        if interval != self._scan_interval:
+            if self._scan_timer_id is not None:
+                self.killTimer(self._scan_timer_id)
+            self._scan_interval = interval
+            self._scan_timer_id = self.startTimer(interval)
+
+    def timerEvent(self, event):
+        if event.timerId() != self._scan_timer_id:
+            return
+        self.scan()
+
+    def scan(self):
+        """Scan the due pins and emit valueChanged for those that changed."""
+        start = time.time()
+
+        self._scan_ticks += 1
+        changed = []
+        for bucket in self._buckets:
+            if self._scan_ticks % bucket.every:
+                continue
+            for pin in bucket.pins:
+                val = pin._pin.get()
+                if val != pin._val:
+                    pin._val = val
+                    changed.append(pin)
+
+        for pin in changed:
+            pin.valueChanged.emit(pin._val)
+
+        scan_time = time.time() - start
+        self._scan_count += 1
+        self._scan_time_last = scan_time
+        self._scan_time_total += scan_time
+        if scan_time > self._scan_time_max:
+            self._scan_time_max = scan_time
+
+    def scanStats(self, reset=False):
+        """Get statistics on the time taken to scan the pins.
+
+        Args:
+            reset (bool) : Whether to reset the statistics after reading them.
+
+        Returns:
+            dict : Scan count, number of scanned pins, and last, average and
+                max scan time in ms.
+        """
+        count = self._scan_count
+        stats = {
+            'count': count,
+            'pins': sum(len(bucket.pins) for bucket in self._buckets),
+            'last': self._scan_time_last * 1000,
+            'avg': self._scan_time_total / count * 1000 if count else 0.0,
+            'max': self._scan_time_max * 1000,
+        }
+
+        if reset:
+            self._scan_count = 0
+            self._scan_time_total = 0.0
+            self._scan_time_max = 0.0
+
+        return stats
+
     def getPin(self, pin_name):
         return self._pins[pin_name]
 
@@ -0,0 +1,151 @@
+"""
+Frame Scheduler
+---------------
+
+Render on demand throttling for plot widgets.
+
+Widgets call :meth:`FrameScheduler.requestFrame` whenever something they
+show has changed, instead of rendering straight away. Requests are merged
+and rendered at most ``maxFps`` times a second, or ``idleFps`` times a
+second for status driven updates while the machine is idle. Nothing is
+rendered while the widget is hidden, a pending frame is rendered when it
+is shown again.
+
+The time taken by each frame is recorded, see :meth:`FrameScheduler.stats`.
+"""
+
+import time
+from collections import deque
+
+from qtpy.QtCore import QObject, QTimer, QEvent
+
+from qtpyvcp.utilities import logger
+
+LOG = logger.getLogger(__name__)
+
+
+class FrameScheduler(QObject):
+    """Throttles the rendering of a widget.
+
+    Args:
+        widget (QWidget) : The widget being rendered.
+        render (callable) : Renders the widget synchronously.
+        max_fps (float) : Maximum frame rate.
+        idle_fps (float) : Maximum frame rate for non interactive frames
+            while idle, see :meth:`setIdle`.
+        history (int) : Number of frame times to keep for the stats.
+    """
+
+    def __init__(self, widget, render, max_fps=30, idle_fps=5, history=120):
+        super(FrameScheduler, self).__init__(widget)
+
+        self.widget = widget
+        self.render = render
+        self.max_fps = max_fps
+        self.idle_fps = idle_fps
+        self.idle = False
+
+        self._pending = False
+        self._interactive = False
+        self._last_frame = 0
+
+        self._frames = 0
+        self._requests = 0
+        self._hidden = 0
+        self._times = deque(maxlen=history)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._onTimeout)
+
+        widget.installEventFilter(self)
+
+    def setIdle(self, idle):
+        """Set whether the machine is idle, which lowers the frame rate."""
+        self.idle = bool(idle)
+
+    def requestFrame(self, interactive=False):
+        """Schedule a frame.
+
+        Args:
+            interactive (bool) : The frame is in response to user
+                interaction, so is not slowed down while idle.
+        """
+        self._requests += 1
+        self._interactive |= interactive
+
+        if self._pending:
+            if interactive and self._timer.isActive():
+                self._schedule()
+            return
+
+        self._pending = True
+        self._schedule()
+
+    def _interval(self):
+        fps = self.max_fps
+        if self.idle and not self._interactive:
+            fps = min(fps, self.idle_fps)
+        return 1.0 / fps if fps > 0 else 0
+
+    def _schedule(self):
+        delay = self._last_frame + self._interval() - time.time()
+        self._timer.start(max(0, int(delay * 1000)))
+
+    def _onTimeout(self):
+        if not self.widget.isVisible():
+            # keep the frame pending until the widget is shown
+            self._hidden += 1
+            return
+        self.renderNow()
+
+    def renderNow(self):
+        """Render the widget immediately, if a frame is pending or not."""
+        self._timer.stop()
+        self._pending = False
+        self._interactive = False
+
+        start = time.time()
+        try:
+            self.render()
+        except Exception:
+            LOG.exception("Error rendering %s", self.widget.objectName())
+
+        self._last_frame = time.time()
+        self._frames += 1
+        self._times.append((self._last_frame, self._last_frame - start))
+
+    def eventFilter(self, obj, event):
+        if obj is self.widget and event.type() == QEvent.Show and self._pending:
+            self._schedule()
+        return False
+
+    def stats(self):
+        """Frame time statistics.
+
+        Returns:
+            dict : ``frames`` rendered and frame ``requests`` so far, times
+            a frame was held back because the widget was ``hidden``, and
+            the ``fps``, ``avg_ms``, ``max_ms`` and ``last_ms`` frame times
+            of the recent frames.
+        """
+        times = [t for end, t in self._times]
+        stats = dict(frames=self._frames,
+                     requests=self._requests,
+                     hidden=self._hidden,
+                     fps=0.0,
+                     avg_ms=0.0,
+                     max_ms=0.0,
+                     last_ms=0.0)
+
+        if times:
+            stats.update(avg_ms=1000 * sum(times) / len(times),
+                         max_ms=1000 * max(times),
+                         last_ms=1000 * times[-1])
+
+        if len(self._times) > 1:
+            span = self._times[-1][0] - self._times[0][0]
+            if span > 0:
+                stats['fps'] = (len(self._times) - 1) / span
+
+        return stats
@@ -0,0 +1,101 @@
+"""
+G-code Tokens
+-------------
+
+Fast syntax highlighting of G-code for the G-code editor lexer.
+
+:func:`styleBytes` works out the style of every byte of a block of lines at
+once, so the lexer can style the block with a single ``SCI_SETSTYLINGEX``
+call instead of styling each character on its own. Most bytes are styled
+with a translation table, then comments and ``MSG``/``DEBUG`` lines are
+found with precompiled regular expressions and styled over it. The styles
+are the same as the original character by character lexer:
+
+* comments in parentheses, with the ``MSG``/``DEBUG`` letters before the
+  first comma highlighted as assignments if the line contains one of them
+* ``%<>#=`` as assignments
+* ``[`` and ``]`` as values
+* letters as keys
+* anything else as default
+
+G-code has no multi-line constructs, so each line is styled on its own.
+"""
+
+import re
+import string
+
+DEFAULT = 0
+COMMENT = 1
+KEY = 2
+ASSIGNMENT = 3
+VALUE = 4
+
+
+def _table():
+    styles = bytearray(256)
+    for chars, style in ((string.ascii_letters, KEY),
+                         ('%<>#=', ASSIGNMENT),
+                         ('[]', VALUE),
+                         ('()', COMMENT)):
+        for char in chars:
+            styles[ord(char)] = style
+    return bytes(styles)
+
+# style of each byte outside comments
+TABLE = _table()
+COMMENT_BYTE = TABLE[ord('('):ord('(') + 1]
+
+# a comment runs to the closing paren or the end of the line
+COMMENT_RE = re.compile(br'\([^)\r\n]*(?:\)|\r\n|\r|\n)?')
+
+MSG_RE = re.compile(br'msg|debug', re.IGNORECASE)
+
+LINE_END_RE = re.compile(br'\r\n|\r|\n')
+
+# letters highlighted in the comments of MSG and DEBUG lines
+MSG_LETTERS = frozenset(bytearray(b'msgdebuMSGDEBU'))
+
+
+def _styleMsgLine(source, styles, start, end):
+    # the comments of a MSG or DEBUG line, up to the first comma in a comment
+    for match in COMMENT_RE.finditer(source, start, end):
+        for pos in range(match.start() + 1, match.end()):
+            char = source[pos]
+            if char == 41:  # )
+                break
+            if char in MSG_LETTERS:
+                styles[pos] = ASSIGNMENT
+            elif char == 44:  # ,
+                styles[pos] = ASSIGNMENT
+                return
+
+
+def styleBytes(source):
+    """Get the styles of a block of G-code.
+
+    Args:
+        source (bytes) : Whole lines of G-code.
+
+    Returns:
+        bytearray : The style of each byte of `source`.
+    """
+    source = bytes(source)
+    styles = bytearray(source.translate(TABLE))
+    data = bytearray(source)
+
+    for match in COMMENT_RE.finditer(source):
+        start, end = match.span()
+        styles[start:end] = COMMENT_BYTE * (end - start)
+
+    pos = 0
+    for match in MSG_RE.finditer(source):
+        if match.start() < pos:
+            # already styled this line
+            continue
+        start = max(source.rfind(b'\n', 0, match.start()),
+                    source.rfind(b'\r', 0, match.start())) + 1
+        line_end = LINE_END_RE.search(source, match.end())
+        pos = line_end.end() if line_end else len(source)
+        _styleMsgLine(data, styles, start, pos)
+
+    return styles
@@ -0,0 +1,169 @@
+"""
+Path LOD
+--------
+
+Level of detail for large tool paths.
+
+Dense surfacing programs can have millions of tiny segments, far more than
+can be told apart on screen when the whole program is in view. :class:`PathLOD`
+keeps a few simplified versions of the path, each with about four times
+the tolerance of the one before, and the plot picks the coarsest level
+whose tolerance is smaller than a pixel.
+
+The simplification snaps the points of each chain of connected segments
+to a grid the size of the tolerance and drops points that fall in the
+same grid cell as the point before them, so no point of the simplified
+path is further than the tolerance (times sqrt 3) from the original. It
+is done with numpy in a few passes over the data.
+
+:func:`tileSegments` sorts segments into a grid of tiles, so a renderer
+can skip the segments of tiles which are out of view.
+"""
+
+import numpy as np
+
+
+def decimateLines(starts, ends, tolerance, tags=None):
+    """Simplify a list of line segments.
+
+    Consecutive segments where the end of one is the start of the next
+    are treated as a polyline, segments with different tags are never
+    merged.
+
+    Args:
+        starts (numpy.ndarray) : N x 3 segment start points.
+        ends (numpy.ndarray) : N x 3 segment end points.
+        tolerance (float) : The grid size used to merge points.
+        tags (numpy.ndarray) : Optional per segment tags, e.g. line types.
+
+    Returns:
+        tuple : ``(starts, ends, tags)`` of the simplified segments, tags
+        is None if no tags were given.
+    """
+    count = len(starts)
+    if count < 2 or tolerance <= 0:
+        return starts, ends, tags
+
+    # segment i continues the polyline of segment i - 1
+    joined = np.zeros(count, bool)
+    joined[1:] = np.all(starts[1:] == ends[:-1], axis=1)
+    if tags is not None:
+        joined[1:] &= tags[1:] == tags[:-1]
+
+    chain_first = np.flatnonzero(~joined)
+    chain = np.cumsum(~joined) - 1
+
+    cells = np.floor(ends / tolerance).astype(np.int64)
+    start_cells = np.floor(starts[chain_first] / tolerance).astype(np.int64)
+
+    # the cell of the point before each end point
+    prev_cells = np.empty_like(cells)
+    prev_cells[1:] = cells[:-1]
+    prev_cells[chain_first] = start_cells
+
+    keep = np.any(cells != prev_cells, axis=1)
+    # always keep the last point of a chain
+    keep[chain_first[1:] - 1] = True
+    keep[-1] = True
+
+    kept = np.flatnonzero(keep)
+    new_ends = ends[kept]
+
+    new_starts = np.empty_like(new_ends)
+    new_starts[1:] = new_ends[:-1]
+    first_kept = np.ones(len(kept), bool)
+    first_kept[1:] = chain[kept[1:]] != chain[kept[:-1]]
+    new_starts[first_kept] = starts[chain_first[chain[kept[first_kept]]]]
+
+    return new_starts, new_ends, None if tags is None else tags[kept]
+
+
+def tileSegments(starts, ends, tiles=16):
+    """Sort segments into a grid of tiles in the XY plane.
+
+    Args:
+        starts (numpy.ndarray) : N x 3 segment start points.
+        ends (numpy.ndarray) : N x 3 segment end points.
+        tiles (int) : The number of tiles along X and Y.
+
+    Returns:
+        tuple : ``(order, ranges, bounds)``, where order sorts the segments
+        by tile, ranges is a T x 2 array of the (first, count) of each
+        non empty tile in the sorted segments and bounds a T x 2 x 3 array
+        of the min and max corners of each tile's segments.
+    """
+    if not len(starts):
+        return np.arange(0), np.empty((0, 2), np.int64), np.empty((0, 2, 3))
+
+    mid = (starts[:, :2] + ends[:, :2]) * .5
+    lo = mid.min(0)
+    size = np.maximum(mid.max(0) - lo, 1e-9) / tiles
+
+    cell = np.minimum(((mid - lo) / size).astype(np.int64), tiles - 1)
+    tile = cell[:, 0] * tiles + cell[:, 1]
+
+    order = np.argsort(tile, kind='mergesort')
+    tile = tile[order]
+
+    first = np.flatnonzero(np.concatenate(([True], tile[1:] != tile[:-1])))
+    counts = np.diff(np.append(first, len(tile)))
+    ranges = np.column_stack((first, counts))
+
+    sorted_min = np.minimum(starts[order], ends[order])
+    sorted_max = np.maximum(starts[order], ends[order])
+    bounds = np.empty((len(first), 2, 3))
+    bounds[:, 0] = np.minimum.reduceat(sorted_min, first)
+    bounds[:, 1] = np.maximum.reduceat(sorted_max, first)
+
+    return order, ranges, bounds
+
+
+class PathLOD(object):
+    """Multiple resolutions of a set of line segments.
+
+    Level 0 is the full path, each following level is simplified with four
+    times the tolerance of the one before, starting from a 1/16384th of the
+    size of the path. Levels are added until one is small enough or barely
+    smaller than the level before it.
+
+    Args:
+        starts (numpy.ndarray) : N x 3 segment start points.
+        ends (numpy.ndarray) : N x 3 segment end points.
+        tags (numpy.ndarray) : Optional per segment tags, see :func:`decimateLines`.
+        min_segments (int) : Don't simplify below this number of segments.
+        max_levels (int) : The maximum number of levels, including level 0.
+    """
+
+    def __init__(self, starts, ends, tags=None, min_segments=100000, max_levels=6):
+        self.levels = [(0.0, starts, ends, tags)]
+
+        if len(starts) <= min_segments:
+            return
+
+        size = np.max(np.maximum(starts.max(0), ends.max(0)) -
+                      np.minimum(starts.min(0), ends.min(0)))
+        tolerance = size / 16384.
+
+        while len(self.levels) < max_levels and 0 < tolerance < size:
+            prev = self.levels[-1]
+            level = decimateLines(prev[1], prev[2], tolerance, prev[3])
+            if len(level[0]) > .9 * len(prev[1]):
+                # not worth keeping, try a coarser one
+                tolerance *= 4
+                continue
+
+            self.levels.append((tolerance,) + level)
+            if len(level[0]) <= min_segments:
+                break
+            tolerance *= 4
+
+    def __len__(self):
+        return len(self.levels)
+
+    def select(self, pixel_size):
+        """Returns the index of the coarsest level with a tolerance below `pixel_size`."""
+        index = 0
+        for i, level in enumerate(self.levels):
+            if level[0] <= pixel_size:
+                index = i
+        return index
@@ -0,0 +1,197 @@
+"""
+Preview Cache
+-------------
+
+On disk cache of interpreted G-code preview geometry.
+
+Interpreting a big program for the backplot can take a long time, so the
+packed geometry of each loaded program is saved to disk and loaded again,
+memory mapped, the next time the same program is loaded with the same
+settings. A cache key is made from the file path, mtime, size and content
+hash plus any other values that affect the preview, such as the units,
+startup code and tool table.
+
+Each entry is a directory holding one ``.npy`` file per array and a
+``meta.json`` file with anything else the canon needs. The least recently
+used entries are removed once the total size exceeds the limit.
+
+The size limit in MB can be set in the INI file, 0 disables the cache::
+
+    [DISPLAY]
+    PREVIEW_CACHE_SIZE = 512
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+
+from qtpyvcp.utilities import logger
+from qtpyvcp.utilities.misc import cacheDir
+
+LOG = logger.getLogger(__name__)
+
+# bump when the format of the cached data changes
+CACHE_VERSION = 1
+
+
+def previewCache(ini):
+    """Get the preview cache configured in the INI file.
+
+    Returns:
+        PreviewCache : The cache, or None if it is disabled.
+    """
+    size = float(ini.find('DISPLAY', 'PREVIEW_CACHE_SIZE') or 512)
+    if size <= 0:
+        return None
+
+    try:
+        return PreviewCache(max_size=int(size * 1024 * 1024))
+    except OSError:
+        LOG.warning("Preview cache disabled, cache directory not available", exc_info=True)
+        return None
+
+
+def fileHash(filename, chunk_size=1024 * 1024):
+    """Returns the SHA1 hex digest of the contents of `filename`."""
+    sha = hashlib.sha1()
+    with open(filename, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class PreviewCache(object):
+    """Least recently used disk cache of preview geometry.
+
+    Args:
+        directory (str) : The cache directory, defaults to
+            ``~/.cache/qtpyvcp/previews``.
+        max_size (int) : The maximum total size of the cache in bytes.
+    """
+
+    def __init__(self, directory=None, max_size=512 * 1024 * 1024):
+        self.directory = directory or cacheDir('previews')
+        self.max_size = max_size
+
+    def key(self, filename, **context):
+        """Make the cache key for loading `filename`.
+
+        Args:
+            filename (str) : The G-code file.
+            **context : Any other values that affect the preview, they
+                must have a stable ``repr``.
+
+        Returns:
+            str : The key, or None if the file can't be read.
+        """
+        try:
+            st = os.stat(filename)
+            content = fileHash(filename)
+        except (IOError, OSError):
+            return None
+
+        sha = hashlib.sha1()
+        sha.update(repr((CACHE_VERSION,
+                         os.path.abspath(filename),
+                         st.st_mtime,
+                         st.st_size,
+                         content,
+                         sorted(context.items()))))
+        return sha.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """Load a cached entry.
+
+        Returns:
+            tuple : ``(arrays, meta)``, where arrays is a dict of read only
+            memory mapped numpy arrays, or None if `key` is not cached.
+        """
+        if key is None:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, 'meta.json')) as fh:
+                meta = json.load(fh)
+
+            arrays = {}
+            for name in meta.pop('_arrays'):
+                arrays[name] = np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+
+            # mark as recently used
+            os.utime(path, None)
+
+        except (IOError, OSError, ValueError, KeyError):
+            if os.path.exists(path):
+                LOG.debug("Discarding bad preview cache entry: %s", path, exc_info=True)
+                shutil.rmtree(path, ignore_errors=True)
+            return None
+
+        return arrays, meta
+
+    def put(self, key, arrays, meta):
+        """Save an entry, replacing any existing entry for `key`.
+
+        Args:
+            key (str) : The key from :meth:`key`.
+            arrays (dict) : Numpy arrays, keyed by name.
+            meta (dict) : Any other JSON serializable data.
+        """
+        if key is None:
+            return
+
+        meta = dict(meta, _arrays=list(arrays))
+        temp = tempfile.mkdtemp(prefix='.tmp-', dir=self.directory)
+        try:
+            for name, data in arrays.items():
+                np.save(os.path.join(temp, name + '.npy'), np.asarray(data))
+
+            with open(os.path.join(temp, 'meta.json'), 'w') as fh:
+                json.dump(meta, fh)
+
+            path = self._path(key)
+            if os.path.exists(path):
+                shutil.rmtree(path, ignore_errors=True)
+            os.rename(temp, path)
+
+        except (IOError, OSError):
+            LOG.warning("Could not save preview to cache", exc_info=True)
+            shutil.rmtree(temp, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until within the size limit."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('.') or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                entries.append((os.path.getmtime(path), size, path))
+            except OSError:
+                continue
+            total += size
+
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            LOG.debug("Evicting preview cache entry: %s", path)
+            # memory mapped arrays still in use stay valid after the unlink
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Remove all the entries."""
+        for name in os.listdir(self.directory):
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
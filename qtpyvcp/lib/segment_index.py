@@ -0,0 +1,171 @@
+"""
+Segment Index
+-------------
+
+Spatial index of line segments for picking in the backplot.
+
+The segments are bucketed into a uniform 3D grid by their midpoints, and
+the bounds of the segments in each cell are kept, so segments longer than
+a cell are still found. A pick first tests the ray or point against the
+bounds of the non empty cells, then measures the distance to the segments
+of the cells that were hit, all with numpy.
+
+The index is built once per program load.
+"""
+
+import numpy as np
+
+
+class SegmentIndex(object):
+    """Uniform grid of line segments.
+
+    Args:
+        starts (numpy.ndarray) : N x 3 segment start points.
+        ends (numpy.ndarray) : N x 3 segment end points.
+        resolution (int) : The number of cells along the longest side.
+    """
+
+    def __init__(self, starts, ends, resolution=32):
+        self.starts = np.asarray(starts, np.float64)
+        self.ends = np.asarray(ends, np.float64)
+
+        count = len(self.starts)
+        if not count:
+            self.order = np.arange(0)
+            self.ranges = np.empty((0, 2), np.int64)
+            self.bounds = np.empty((0, 2, 3))
+            return
+
+        mid = (self.starts + self.ends) * .5
+        lo = mid.min(0)
+        extent = mid.max(0) - lo
+        longest = max(extent.max(), 1e-9)
+        dims = np.maximum(1, np.round(extent / longest * resolution)).astype(np.int64)
+        size = np.maximum(extent, 1e-9) / dims
+
+        cell = np.minimum(((mid - lo) / size).astype(np.int64), dims - 1)
+        cell = (cell[:, 0] * dims[1] + cell[:, 1]) * dims[2] + cell[:, 2]
+
+        self.order = np.argsort(cell, kind='mergesort')
+        cell = cell[self.order]
+
+        first = np.flatnonzero(np.concatenate(([True], cell[1:] != cell[:-1])))
+        counts = np.diff(np.append(first, count))
+        self.ranges = np.column_stack((first, counts))
+
+        self.bounds = np.empty((len(first), 2, 3))
+        self.bounds[:, 0] = np.minimum.reduceat(
+            np.minimum(self.starts, self.ends)[self.order], first)
+        self.bounds[:, 1] = np.maximum.reduceat(
+            np.maximum(self.starts, self.ends)[self.order], first)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _candidates(self, cells):
+        # indices of the segments in the cells
+        ranges = self.ranges[cells]
+        if not len(ranges):
+            return np.arange(0)
+        index = np.concatenate([np.arange(first, first + count) for first, count in ranges])
+        return self.order[index]
+
+    def rayCells(self, origin, direction, radius=0.0):
+        """Returns the cells whose bounds, grown by `radius`, the ray passes through."""
+        lo = self.bounds[:, 0] - radius
+        hi = self.bounds[:, 1] + radius
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t1 = (lo - origin) / direction
+            t2 = (hi - origin) / direction
+        near = np.minimum(t1, t2)
+        far = np.maximum(t1, t2)
+
+        # a ray parallel to an axis must start within the slab
+        parallel = direction == 0
+        if np.any(parallel):
+            inside = (origin >= lo) & (origin <= hi)
+            near[:, parallel] = np.where(inside[:, parallel], -np.inf, np.inf)
+            far[:, parallel] = np.where(inside[:, parallel], np.inf, -np.inf)
+
+        t_near = near.max(1)
+        t_far = far.min(1)
+        return np.flatnonzero((t_near <= t_far) & (t_far >= 0))
+
+    def pickRay(self, origin, direction, radius, mask=None):
+        """Find the segments within `radius` of a ray.
+
+        Args:
+            origin (sequence) : The XYZ start of the ray.
+            direction (sequence) : The XYZ direction of the ray.
+            radius (float) : The pick distance.
+            mask (numpy.ndarray) : Optional boolean array of the segments
+                which can be picked.
+
+        Returns:
+            tuple : ``(indices, depths)`` of the segments which were hit,
+            sorted by the distance along the ray to the closest point.
+        """
+        origin = np.asarray(origin, np.float64)
+        direction = np.asarray(direction, np.float64)
+        direction = direction / np.sqrt(np.dot(direction, direction))
+
+        index = self._candidates(self.rayCells(origin, direction, radius))
+        if mask is not None:
+            index = index[mask[index]]
+
+        p = self.starts[index]
+        u = self.ends[index] - p
+        w = p - origin
+
+        a = np.einsum('ij,ij->i', u, u)
+        b = u.dot(direction)
+        d = np.einsum('ij,ij->i', u, w)
+        e = w.dot(direction)
+
+        # closest points between the segment and ray lines, clamped to
+        # the segment and to the front of the ray
+        denom = a - b * b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = np.where(denom > 1e-12, (b * e - d) / denom, 0.0)
+        s = np.clip(s, 0.0, 1.0)
+        t = np.maximum(b * s + e, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = np.where(a > 0, np.clip((t * b - d) / a, 0.0, 1.0), 0.0)
+
+        closest = p + u * s[:, None]
+        dist = closest - (origin + direction * t[:, None])
+        hit = np.einsum('ij,ij->i', dist, dist) <= radius * radius
+
+        index = index[hit]
+        depth = t[hit]
+        order = np.argsort(depth, kind='mergesort')
+        return index[order], depth[order]
+
+    def pickPoint(self, point, radius, mask=None):
+        """Find the segments within `radius` of a point.
+
+        Returns:
+            tuple : ``(indices, distances)`` of the segments which were
+            hit, sorted by distance.
+        """
+        point = np.asarray(point, np.float64)
+        inside = np.all((self.bounds[:, 0] - radius <= point) &
+                        (self.bounds[:, 1] + radius >= point), axis=1)
+
+        index = self._candidates(np.flatnonzero(inside))
+        if mask is not None:
+            index = index[mask[index]]
+
+        p = self.starts[index]
+        u = self.ends[index] - p
+        a = np.einsum('ij,ij->i', u, u)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = np.where(a > 0, np.clip(np.einsum('ij,ij->i', point - p, u) / a, 0.0, 1.0), 0.0)
+
+        dist = np.sqrt(((p + u * s[:, None] - point) ** 2).sum(1))
+        hit = dist <= radius
+        index = index[hit]
+        dist = dist[hit]
+        order = np.argsort(dist, kind='mergesort')
+        return index[order], dist[order]
@@ -0,0 +1,300 @@
+"""
+Startup Profiler
+----------------
+
+Records a timeline of a VCP launch, enabled with the ``--profile-startup``
+command line option or by setting ``QTPYVCP_PROFILE_STARTUP=1`` in the
+environment.
+
+The timeline covers every module import, the construction and
+initialization of each plugin, the build of each window and dialog, the
+``initialize()`` of each widget and the registration of widget rules, up to
+the first paint of the main window. It is saved as a Chrome trace, which
+can be opened in ``chrome://tracing`` or https://ui.perfetto.dev, along
+with a text summary of the slowest items.
+
+When the profiler is not running :func:`span` and :func:`record` do
+nothing, so they can be left in the startup code.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+try:
+    import __builtin__ as builtins
+except ImportError:
+    import builtins
+
+from qtpyvcp.utilities.logger import getLogger
+
+LOG = getLogger(__name__)
+
+# number of items listed in each section of the summary
+SUMMARY_LENGTH = 25
+
+_PROFILER = None
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    __slots__ = ('profiler', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, profiler, name, cat, args):
+        self.profiler = profiler
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add(self.name, self.cat, self.start, time.time(), self.args)
+        return False
+
+
+class StartupProfiler(object):
+    """Records the events of the startup timeline."""
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.events = []
+        self.marks = []
+
+        self._import_func = None
+        self._local = threading.local()
+
+    def add(self, name, cat, start, end, args=None):
+        self.events.append((name, cat, start, end, threading.current_thread().ident,
+                            args or {}))
+
+    def mark(self, name):
+        self.marks.append((name, time.time()))
+
+    def installImportHook(self):
+        if self._import_func is None:
+            self._import_func = builtins.__import__
+            builtins.__import__ = self._import
+
+    def removeImportHook(self):
+        if self._import_func is not None:
+            builtins.__import__ = self._import_func
+            self._import_func = None
+
+    def _import(self, name, globals=None, *args, **kwargs):
+        # time spent in the imports made by the module being imported
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        count = len(sys.modules)
+        stack.append(0.0)
+        start = time.time()
+        try:
+            return self._import_func(name, globals, *args, **kwargs)
+        finally:
+            end = time.time()
+            children = stack.pop()
+            if stack:
+                stack[-1] += end - start
+
+            # only record imports which loaded something
+            if len(sys.modules) != count:
+                self.add(_moduleName(name, globals), 'import', start, end,
+                         {'self': end - start - children})
+
+    def traceEvents(self):
+        pid = os.getpid()
+        events = []
+        for name, cat, start, end, tid, args in self.events:
+            events.append({'name': name,
+                           'cat': cat,
+                           'ph': 'X',
+                           'ts': int((start - self.start_time) * 1e6),
+                           'dur': int((end - start) * 1e6),
+                           'pid': pid,
+                           'tid': tid,
+                           'args': args,
+                           })
+
+        for name, when in self.marks:
+            events.append({'name': name,
+                           'cat': 'stage',
+                           'ph': 'i',
+                           's': 'g',
+                           'ts': int((when - self.start_time) * 1e6),
+                           'pid': pid,
+                           'tid': 0,
+                           })
+        return events
+
+    def writeTrace(self, trace_file):
+        with open(trace_file, 'w') as fh:
+            json.dump({'traceEvents': self.traceEvents(),
+                       'displayTimeUnit': 'ms'}, fh)
+
+    def summary(self, end_time):
+        lines = ["QtPyVCP startup profile",
+                 "=======================",
+                 "",
+                 "Time to first paint: {:.3f}s".format(end_time - self.start_time),
+                 ""]
+
+        if self.marks:
+            lines.append("Stages:")
+            last = self.start_time
+            for name, when in self.marks:
+                lines.append("  {:8.3f}s  {:+8.3f}s  {}".format(when - self.start_time,
+                                                              when - last, name))
+                last = when
+            lines.append("")
+
+        by_cat = {}
+        for event in self.events:
+            by_cat.setdefault(event[1], []).append(event)
+
+        imports = by_cat.pop('import', [])
+        if imports:
+            # the self times add up to the time spent importing
+            total = sum(event[5]['self'] for event in imports)
+            lines.append("Imports: {} modules, {:.3f}s".format(len(imports), total))
+            lines.append("  cumulative     self  module")
+            imports.sort(key=lambda event: event[3] - event[2], reverse=True)
+            for name, cat, start, end, tid, args in imports[:SUMMARY_LENGTH]:
+                lines.append("  {:9.3f}s {:7.3f}s  {}".format(end - start, args['self'], name))
+            lines.append("")
+
+            lines.append("  self time of the slowest modules:")
+            imports.sort(key=lambda event: event[5]['self'], reverse=True)
+            for name, cat, start, end, tid, args in imports[:SUMMARY_LENGTH]:
+                lines.append("  {:9.3f}s  {}".format(args['self'], name))
+            lines.append("")
+
+        for cat in sorted(by_cat):
+            events = sorted(by_cat[cat], key=lambda event: event[3] - event[2], reverse=True)
+            lines.append("{}: {} items, {:.3f}s".format(
+                cat.capitalize(), len(events),
+                sum(event[3] - event[2] for event in events)))
+            for event in events[:SUMMARY_LENGTH]:
+                lines.append("  {:9.3f}s  {}".format(event[3] - event[2], event[0]))
+            lines.append("")
+
+        return '\n'.join(lines)
+
+
+def _moduleName(name, globals):
+    # Python 2 implicit relative imports give the name within the package
+    if name in sys.modules or not globals:
+        return name
+    package = globals.get('__name__', '')
+    if '__path__' not in globals:
+        package = package.rpartition('.')[0]
+    full_name = '{}.{}'.format(package, name) if name else package
+    return full_name if full_name in sys.modules else name
+
+
+def start():
+    """Start recording the startup timeline."""
+    global _PROFILER
+    if _PROFILER is None:
+        _PROFILER = StartupProfiler()
+        _PROFILER.installImportHook()
+
+
+def isRunning():
+    return _PROFILER is not None
+
+
+def span(name, cat):
+    """Context manager recording the time spent in the block.
+
+    Args:
+        name (str) : The name of the event.
+        cat (str) : The category the event is listed under in the summary,
+            such as ``plugins`` or ``widgets``.
+    """
+    if _PROFILER is None:
+        return _NULL_SPAN
+    return _Span(_PROFILER, name, cat, None)
+
+
+def record(name, cat, start, end, **args):
+    """Record an event which has already been timed with ``time.time()``."""
+    if _PROFILER is not None:
+        _PROFILER.add(name, cat, start, end, args)
+
+
+def mark(name):
+    """Record a startup stage."""
+    if _PROFILER is not None:
+        _PROFILER.mark(name)
+
+
+def finish(trace_file, summary_file):
+    """Stop recording and save the timeline.
+
+    Args:
+        trace_file (str) : Path to save the Chrome trace JSON to.
+        summary_file (str) : Path to save the text summary to.
+    """
+    global _PROFILER
+    profiler = _PROFILER
+    if profiler is None:
+        return
+
+    _PROFILER = None
+    profiler.removeImportHook()
+    end_time = time.time()
+
+    try:
+        profiler.writeTrace(trace_file)
+        summary = profiler.summary(end_time)
+        with open(summary_file, 'w') as fh:
+            fh.write(summary)
+    except (IOError, OSError):
+        LOG.exception("Failed to save the startup profile")
+        return
+
+    LOG.info("Startup profile saved to %s and %s", trace_file, summary_file)
+    LOG.debug("Startup profile:\n%s", summary)
+
+
+def finishWhenShown(window, trace_file, summary_file):
+    """Save the timeline once `window` has been painted.
+
+    Args:
+        window (QWidget) : The window to wait for, if None the timeline is
+            saved as soon as the event loop starts.
+        trace_file (str) : Path to save the Chrome trace JSON to.
+        summary_file (str) : Path to save the text summary to.
+    """
+    from qtpy.QtCore import QObject, QEvent, QTimer
+
+    done = lambda: finish(trace_file, summary_file)
+
+    if window is None:
+        QTimer.singleShot(0, done)
+        return
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                obj.removeEventFilter(self)
+                # finish once the paint is done
+                QTimer.singleShot(0, done)
+            return False
+
+    window.installEventFilter(FirstPaint(window))
@@ -0,0 +1,353 @@
+"""
+Status Diff
+-----------
+
+Table driven change detection for ``linuxcnc.stat`` objects.
+
+The field table is built once, after that each call to :meth:`StatusTable.diff`
+fetches all the watched values in a single C level call (``attrgetter`` /
+``itemgetter``), compares them against the previous values with one tuple
+comparison, and only falls back to a per field pass when something actually
+changed. Joints and spindles beyond ``stat.joints`` and ``stat.spindles`` are
+never looked at.
+
+The result of a diff is a list of ``(channel_name, value)`` tuples, where
+joint and spindle channels are named ``joint.<jnum>.<item>`` and
+``spindle.<snum>.<item>`` respectively, the same as the channel names used
+by the Status plugin.
+
+:class:`StatusScheduler` groups channels into tiers with different update
+rates, so rarely changing values are not checked every cycle.
+"""
+
+import time
+
+from fnmatch import fnmatchcase
+from fractions import gcd
+from itertools import compress, izip
+from operator import attrgetter, itemgetter, ne
+
+from qtpyvcp.utilities.logger import getLogger
+
+LOG = getLogger(__name__)
+
+# sentinel that never compares equal to a real status value
+NOT_SET = object()
+
+# shortest tick interval in ms, ticking faster than this to keep periods
+# exact would cost more than it is worth
+MIN_INTERVAL = 10
+
+
+def _tupleGetter(getter_cls, keys):
+    """Return a function that fetches `keys` from an object as a tuple.
+
+    ``attrgetter`` and ``itemgetter`` return a bare value instead of a
+    tuple when given a single key, so handle that here.
+    """
+    if len(keys) == 0:
+        return lambda obj: ()
+    elif len(keys) == 1:
+        getter = getter_cls(keys[0])
+        return lambda obj: (getter(obj),)
+    return getter_cls(*keys)
+
+
+class _FieldGroup(object):
+    """A set of fields read with one getter call and compared as a tuple."""
+
+    __slots__ = ('names', 'getter', 'values')
+
+    def __init__(self, names, getter):
+        self.names = tuple(names)
+        self.getter = getter
+        self.values = tuple(NOT_SET for _ in self.names)
+
+    def diff(self, obj, changes):
+        new = self.getter(obj)
+        old = self.values
+        if new != old:
+            mask = map(ne, new, old)
+            changes.extend(izip(compress(self.names, mask), compress(new, mask)))
+            self.values = new
+
+    def invalidate(self, name):
+        try:
+            index = self.names.index(name)
+        except ValueError:
+            return False
+        values = list(self.values)
+        values[index] = NOT_SET
+        self.values = tuple(values)
+        return True
+
+
+class StatusTable(object):
+    """Change detector for a fixed set of ``linuxcnc.stat`` channels.
+
+    Args:
+        channels (list) : Names of the channels to watch, e.g. ``position``,
+            ``joint.0.homed`` or ``spindle.0.speed``.
+        values (dict) : Optional initial values, keyed by channel name.
+            Channels without an initial value are reported on the first diff.
+    """
+
+    def __init__(self, channels=(), values=None):
+
+        self.channels = tuple(channels)
+
+        items = []
+        joints = {}
+        spindles = {}
+        for name in self.channels:
+            kind, sep, rest = name.partition('.')
+            if kind in ('joint', 'spindle') and sep:
+                num, sep, key = rest.partition('.')
+                group = joints if kind == 'joint' else spindles
+                group.setdefault(int(num), []).append(key)
+            else:
+                items.append(name)
+
+        self._stat = _FieldGroup(items, _tupleGetter(attrgetter, items))
+
+        self._joints = tuple(
+            (jnum, _FieldGroup(['joint.{}.{}'.format(jnum, key) for key in keys],
+                               _tupleGetter(itemgetter, keys)))
+            for jnum, keys in sorted(joints.items()))
+
+        self._spindles = tuple(
+            (snum, _FieldGroup(['spindle.{}.{}'.format(snum, key) for key in keys],
+                               _tupleGetter(itemgetter, keys)))
+            for snum, keys in sorted(spindles.items()))
+
+        if values:
+            for group in self._groups():
+                group.values = tuple(values.get(name, NOT_SET)
+                                     for name in group.names)
+
+    def _groups(self):
+        yield self._stat
+        for num, group in self._joints + self._spindles:
+            yield group
+
+    def diff(self, stat):
+        """Compare the current stat values with those from the last diff.
+
+        Args:
+            stat (linuxcnc.stat) : A freshly polled stat object.
+
+        Returns:
+            list : ``(channel_name, new_value)`` tuples for changed fields.
+        """
+        changes = []
+
+        self._stat.diff(stat, changes)
+
+        if self._joints:
+            joints = stat.joint
+            num_joints = stat.joints
+            for jnum, group in self._joints:
+                if jnum >= num_joints:
+                    break
+                group.diff(joints[jnum], changes)
+
+        if self._spindles:
+            spindles = stat.spindle
+            num_spindles = stat.spindles
+            for snum, group in self._spindles:
+                if snum >= num_spindles:
+                    break
+                group.diff(spindles[snum], changes)
+
+        return changes
+
+    def snapshot(self, stat):
+        """Record the current stat values without reporting them."""
+        self.diff(stat)
+
+    def values(self):
+        """Returns a dict of the last seen value of each channel."""
+        values = {}
+        for group in self._groups():
+            values.update((name, value) for name, value
+                          in zip(group.names, group.values)
+                          if value is not NOT_SET)
+        return values
+
+    def invalidate(self, name):
+        """Force the channel `name` to be reported on the next diff.
+
+        Args:
+            name (str) : The channel name, e.g. ``interp_state`` or
+                ``joint.0.homed``.
+
+        Returns:
+            bool : True if the channel is part of this table.
+        """
+        for group in self._groups():
+            if group.invalidate(name):
+                return True
+
+        return False
+
+
+class _Tier(object):
+    """A group of channels updated at the same rate."""
+
+    __slots__ = ('period', 'every', 'due', 'table')
+
+    def __init__(self, period, every, table):
+        self.period = period
+        self.every = every
+        self.due = 0
+        self.table = table
+
+
+class StatusScheduler(object):
+    """Multi-rate change detector for ``linuxcnc.stat`` channels.
+
+    Channels are grouped into tiers by update period, each tier has its own
+    :class:`StatusTable` which is only diffed when the tier is due. The
+    scheduler is intended to be ticked every :attr:`interval` ms, which is
+    the greatest common divisor of the configured periods, so every tier
+    runs at exactly its period. If that would be shorter than
+    :data:`MIN_INTERVAL` the shortest period is used instead, and periods
+    which are not a multiple of it are rounded, with a warning.
+
+    Tiers are processed in priority order, fastest first. If a ``deadline``
+    is passed to :meth:`diff` and it has already passed once the higher
+    priority tiers are done, the remaining tiers are deferred to the next
+    tick, so slow channels can never delay the fast ones.
+
+    Args:
+        cycle_time (int) : The update period in ms of channels that do not
+            have a rate specified.
+        tiers (dict) : Named update periods, tier name: period in ms.
+        rates (dict) : Per channel update rates, channel name: tier name or
+            period in ms. Channel names can contain shell style wildcards,
+            e.g. ``joint.*.homed``.
+    """
+
+    def __init__(self, cycle_time=100, tiers=None, rates=None):
+
+        self.cycle_time = cycle_time
+        self.tiers = dict(tiers or {})
+
+        self._rates = {}
+        self._rate_patterns = []
+        for name, rate in (rates or {}).items():
+            period = self.tiers.get(rate, rate)
+            if not isinstance(period, (int, float)) or period <= 0:
+                raise ValueError("Invalid update rate for '{}' status channel: {}"
+                                 .format(name, rate))
+            if any(c in name for c in '*?['):
+                self._rate_patterns.append((name, period))
+            else:
+                self._rates[name] = period
+
+        periods = [cycle_time] + self._rates.values() + \
+                  [period for pattern, period in self._rate_patterns]
+        self.interval = self._tickInterval(periods)
+
+        self._ticks = 0
+        self._tiers = []
+
+    @staticmethod
+    def _tickInterval(periods):
+        periods = sorted(set(periods))
+        if all(float(period).is_integer() for period in periods):
+            interval = reduce(gcd, [int(period) for period in periods])
+            if interval >= MIN_INTERVAL:
+                return interval
+
+        interval = int(periods[0])
+        rounded = [period for period in periods if period % interval]
+        if rounded:
+            LOG.warning("Status update periods %s are not multiples of the %ims "
+                        "update interval and will be rounded, use periods with "
+                        "a common divisor of at least %ims to avoid this",
+                        ', '.join('{}ms'.format(period) for period in rounded),
+                        interval, MIN_INTERVAL)
+        return interval
+
+    @property
+    def channels(self):
+        """The channels currently being updated."""
+        return tuple(name for tier in self._tiers for name in tier.table.channels)
+
+    def periodOf(self, name):
+        """Get the update period in ms for the channel `name`."""
+        try:
+            return self._rates[name]
+        except KeyError:
+            pass
+
+        for pattern, period in self._rate_patterns:
+            if fnmatchcase(name, pattern):
+                return period
+
+        return self.cycle_time
+
+    def setChannels(self, channels, values=None):
+        """Set the channels to update.
+
+        Args:
+            channels (list) : Names of the channels to update.
+            values (dict) : Optional initial values, keyed by channel name.
+        """
+        groups = {}
+        for name in channels:
+            groups.setdefault(self.periodOf(name), []).append(name)
+
+        self._tiers = [_Tier(period, max(1, int(round(float(period) / self.interval))),
+                             StatusTable(names, values))
+                       for period, names in sorted(groups.items())]
+
+    def diff(self, stat, deadline=None):
+        """Compare the values of the due channels with their last values.
+
+        Args:
+            stat (linuxcnc.stat) : A freshly polled stat object.
+            deadline (float) : Optional ``time.time()`` after which lower
+                priority tiers should be deferred to the next tick.
+
+        Returns:
+            list : ``(channel_name, new_value)`` tuples for changed fields.
+        """
+        self._ticks += 1
+
+        changes = []
+        for tier in self._tiers:
+            if self._ticks < tier.due:
+                continue
+
+            if deadline is not None and changes and time.time() > deadline:
+                break
+
+            changes.extend(tier.table.diff(stat))
+            tier.due = self._ticks + tier.every
+
+        return changes
+
+    def snapshot(self, stat):
+        """Record the current values of all the channels without reporting them."""
+        for tier in self._tiers:
+            tier.table.snapshot(stat)
+
+    def values(self):
+        """Returns a dict of the last seen value of each channel."""
+        values = {}
+        for tier in self._tiers:
+            values.update(tier.table.values())
+        return values
+
+    def invalidate(self, name):
+        """Force the channel `name` to be reported the next time its tier is due.
+
+        Returns:
+            bool : True if the channel is being updated.
+        """
+        for tier in self._tiers:
+            if tier.table.invalidate(name):
+                return True
+        return False
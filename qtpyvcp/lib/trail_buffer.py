@@ -0,0 +1,187 @@
+"""
+Trail Buffer
+------------
+
+Fixed size storage for live plot tool path trails.
+
+The points are kept in preallocated numpy arrays used as a circular
+buffer, once full the oldest points are overwritten, so the memory use and
+the cost of drawing the trail stay the same no matter how long the machine
+runs. Optionally points older than a given number of seconds are dropped.
+
+To make the most of the available capacity, points closer than a minimum
+distance to the previous point are skipped, and a point which is collinear
+with the previous two replaces the last point instead of being added, so
+long straight moves take only two points.
+
+The options can be set in the INI file, e.g. for the VTK backplot::
+
+    [VTK]
+    LIVE_PLOT_POINTS = 10000
+    LIVE_PLOT_SECONDS = 0
+    LIVE_PLOT_MIN_DISTANCE = 0.0005
+"""
+
+import time
+
+import numpy as np
+
+
+def trailOptions(ini, section):
+    """Read the trail buffer options from an INI file section.
+
+    Args:
+        ini (linuxcnc.ini) : The INI file.
+        section (str) : The section to read the options from.
+
+    Returns:
+        dict : TrailBuffer keyword arguments.
+    """
+    return dict(capacity=int(ini.find(section, 'LIVE_PLOT_POINTS') or 10000),
+                max_age=float(ini.find(section, 'LIVE_PLOT_SECONDS') or 0),
+                min_distance=float(ini.find(section, 'LIVE_PLOT_MIN_DISTANCE') or 0))
+
+
+class TrailBuffer(object):
+    """Circular buffer of tool path trail points.
+
+    Args:
+        capacity (int) : The maximum number of points to keep.
+        max_age (float) : Drop points older than this many seconds, 0 to
+            keep points until they are overwritten.
+        min_distance (float) : Skip points closer than this to the last point.
+        tolerance (float) : Merge points that are within this distance of
+            the line through their neighbours, defaults to `min_distance`.
+    """
+
+    def __init__(self, capacity=10000, max_age=0, min_distance=0.0, tolerance=None):
+        self.capacity = max(2, int(capacity))
+        self.max_age = max_age
+        self.min_distance = min_distance
+
+        if tolerance is None:
+            tolerance = min_distance
+        self._min_dist_sq = min_distance ** 2
+        self._tolerance_sq = max(tolerance ** 2, 1e-12)
+
+        self.points = np.zeros((self.capacity, 3))
+        self.tags = np.zeros(self.capacity, np.uint8)
+        self.times = np.zeros(self.capacity)
+
+        self._arange = np.arange(self.capacity)
+
+        self.clear()
+
+    def clear(self):
+        """Remove all the points."""
+        self.head = 0
+        self.count = 0
+        self._last = None
+        self._prev = None
+
+    def __len__(self):
+        return self.count
+
+    def last(self):
+        """Returns the most recent point, or None if the trail is empty."""
+        return self._last and self._last[0]
+
+    def indices(self, dtype=np.int64):
+        """Returns the array indices of the points, from oldest to newest."""
+        indices = self._arange[:self.count] + self.head
+        if self.head + self.count > self.capacity:
+            indices %= self.capacity
+        return indices.astype(dtype, copy=False)
+
+    def add(self, point, tag=0, now=None):
+        """Add a point to the end of the trail.
+
+        Args:
+            point (tuple) : The XYZ position.
+            tag (int) : Point type, e.g. the motion type for coloring the
+                trail. Points are only merged with points of the same type.
+            now (float) : The time of the point, defaults to ``time.time()``.
+
+        Returns:
+            bool : True if the trail changed.
+        """
+        point = tuple(point[:3])
+        if now is None:
+            now = time.time()
+
+        changed = self.expire(now)
+
+        if self._last is not None and self._last[1] == tag:
+            lx, ly, lz = self._last[0]
+            x, y, z = point
+            dx, dy, dz = x - lx, y - ly, z - lz
+            if dx * dx + dy * dy + dz * dz <= self._min_dist_sq:
+                return changed
+
+            if self._prev is not None and self._prev[1] == tag \
+                    and self._collinear(self._prev[0], self._last[0], point):
+                # extend the last segment instead of adding a point
+                self._set(self.count - 1, point, tag, now)
+                self._last = (point, tag)
+                return True
+
+        if self.count == self.capacity:
+            self.head = (self.head + 1) % self.capacity
+            self.count -= 1
+
+        self._set(self.count, point, tag, now)
+        self.count += 1
+
+        self._prev = self._last
+        self._last = (point, tag)
+        return True
+
+    def expire(self, now=None):
+        """Drop points older than `max_age`.
+
+        Returns:
+            bool : True if any points were dropped.
+        """
+        if not self.max_age or not self.count:
+            return False
+
+        if now is None:
+            now = time.time()
+
+        oldest = now - self.max_age
+        dropped = 0
+        while self.count and self.times[self.head] < oldest:
+            self.head = (self.head + 1) % self.capacity
+            self.count -= 1
+            dropped += 1
+
+        if dropped:
+            if self.count < 2:
+                self._prev = None
+            if self.count < 1:
+                self._last = None
+
+        return dropped > 0
+
+    def _set(self, n, point, tag, now):
+        index = (self.head + n) % self.capacity
+        self.points[index] = point
+        self.tags[index] = tag
+        self.times[index] = now
+
+    def _collinear(self, a, b, c):
+        # is b within tolerance of the line from a to c, and between them
+        ax, ay, az = a
+        ux, uy, uz = c[0] - ax, c[1] - ay, c[2] - az
+        vx, vy, vz = b[0] - ax, b[1] - ay, b[2] - az
+
+        uu = ux * ux + uy * uy + uz * uz
+        if uu == 0:
+            return False
+
+        uv = ux * vx + uy * vy + uz * vz
+        if uv < 0 or uv > uu:
+            return False
+
+        vv = vx * vx + vy * vy + vz * vz
+        return vv - uv * uv / uu <= self._tolerance_sq
@@ -3,3 +3,45 @@ class DotDict(dict):
     __getattr__ = dict.get
     __setattr__ = dict.__setitem__
     __delattr__ = dict.__delitem__
+
+
+class LazyDict(dict):
+    """Dictionary of values which are created when first looked up.
+
+    A factory set with :meth:`setFactory` is called the first time its key
+    is looked up, and the result is stored in the dictionary. Keys with a
+    factory count as being in the dictionary, but only the values which
+    have been created are returned by ``values()`` and ``items()``.
+    """
+    def __init__(self, *args, **kwargs):
+        super(LazyDict, self).__init__(*args, **kwargs)
+        self._factories = {}
+
+    def setFactory(self, key, factory):
+        """Set the callable used to create the value of `key`."""
+        self._factories[key] = factory
+        dict.pop(self, key, None)
+
+    def isCreated(self, key):
+        """Whether the value of `key` has been created."""
+        return dict.__contains__(self, key)
+
+    def __missing__(self, key):
+        factory = self._factories[key]
+        value = factory()
+        self[key] = value
+        del self._factories[key]
+        return value
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._factories
+
+    def get(self, key, default=None):
+        # errors raised by the factory are not mistaken for a missing key
+        if key not in self:
+            return default
+        return self[key]
+
+    def pending(self):
+        """Returns the keys whose values have not been created yet."""
+        return list(self._factories)
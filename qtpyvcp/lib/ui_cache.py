@@ -0,0 +1,170 @@
+"""
+UI Cache
+--------
+
+Cache of compiled QtDesigner .ui files.
+
+Loading a .ui file with ``uic.loadUi`` parses the XML and looks up every
+widget class each time, which takes seconds for big VCPs. :func:`loadUi`
+compiles the .ui file to Python the first time it is loaded, saves it in
+``~/.cache/qtpyvcp/ui`` and loads the compiled form from there after that,
+as long as the .ui file has not changed.
+
+The cache is keyed by the path, mtime, size and content hash of the .ui
+file, and the Python and PyQt versions. If the .ui file can't be compiled
+or the compiled form fails to load, ``uic.loadUi`` is used instead.
+
+The cache can be disabled by setting ``QTPYVCP_UI_CACHE=0`` in the
+environment.
+"""
+
+import os
+import sys
+import imp
+import types
+import hashlib
+import tempfile
+
+from qtpy import uic
+
+from qtpyvcp.utilities import logger
+from qtpyvcp.utilities.misc import cacheDir
+
+LOG = logger.getLogger(__name__)
+
+try:
+    from PyQt5.QtCore import PYQT_VERSION_STR
+    from PyQt5.uic.Compiler.compiler import UICompiler
+except ImportError:
+    UICompiler = None
+
+ENABLED = UICompiler is not None and os.getenv('QTPYVCP_UI_CACHE', '1') != '0'
+
+# compiled forms loaded in this session, keyed by cache key
+_FORMS = {}
+
+
+if UICompiler is not None:
+    class _Compiler(UICompiler):
+        # resolve relative image paths against the .ui file directory,
+        # the same as uic.loadUi does
+        def __init__(self, base_dir):
+            super(_Compiler, self).__init__()
+            self._base_dir = base_dir
+
+        def parse(self, filename, resource_suffix, base_dir=''):
+            return super(_Compiler, self).parse(filename, resource_suffix,
+                                                self._base_dir)
+
+
+class _FormSetup(object):
+    """Runs a compiled ``setupUi`` on a base instance.
+
+    ``uic.loadUi`` puts the widgets on the base instance, but compiled
+    forms put them on the form object, so this stands in for the form and
+    forwards attributes to the base instance.
+    """
+
+    def __init__(self, form_class, base):
+        object.__setattr__(self, '_form_class', form_class)
+        object.__setattr__(self, '_base', base)
+
+    def __setattr__(self, name, value):
+        setattr(self._base, name, value)
+
+    def __getattr__(self, name):
+        func = self._form_class.__dict__.get(name)
+        if isinstance(func, types.FunctionType):
+            return types.MethodType(func, self)
+        return getattr(self._base, name)
+
+    def setup(self):
+        self._form_class.__dict__['setupUi'](self, self._base)
+
+
+def cacheKey(ui_file):
+    """Returns the cache key for `ui_file`."""
+    ui_file = os.path.abspath(ui_file)
+    st = os.stat(ui_file)
+    with open(ui_file, 'rb') as fh:
+        content = hashlib.sha1(fh.read()).hexdigest()
+
+    sha = hashlib.sha1()
+    sha.update(repr((ui_file, st.st_mtime, st.st_size, content,
+                     sys.version_info[:2], PYQT_VERSION_STR)).encode('utf-8'))
+    return sha.hexdigest()
+
+
+def compileUi(ui_file, py_file):
+    """Compile `ui_file` to the Python module `py_file`."""
+    ui_file = os.path.abspath(ui_file)
+    directory = os.path.dirname(py_file)
+
+    fd, temp = tempfile.mkstemp(prefix='.tmp-', suffix='.py', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as fh:
+            compiler = _Compiler(os.path.dirname(ui_file))
+            try:
+                compiler.compileUi(ui_file, fh, False, '_rc', '.')
+            except TypeError:
+                # PyQt5 before 5.6 has no import_from argument
+                compiler.compileUi(ui_file, fh, False, '_rc')
+        os.rename(temp, py_file)
+    except:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def formClass(ui_file):
+    """Get the compiled form class for `ui_file`.
+
+    Returns:
+        class : The ``Ui_*`` class, or None if the form can't be compiled.
+    """
+    try:
+        key = cacheKey(ui_file)
+    except (IOError, OSError):
+        return None
+
+    if key in _FORMS:
+        return _FORMS[key]
+
+    form_class = None
+    try:
+        py_file = os.path.join(cacheDir('ui'), key + '.py')
+        if not os.path.exists(py_file):
+            LOG.debug("Compiling UI file: %s", ui_file)
+            compileUi(ui_file, py_file)
+
+        module = imp.load_source('qtpyvcp_ui_' + key, py_file)
+        for name, value in vars(module).items():
+            if name.startswith('Ui_') and isinstance(value, type):
+                form_class = value
+                break
+
+    except Exception:
+        LOG.warning("Could not use compiled UI for %s, loading the .ui file",
+                    ui_file, exc_info=True)
+
+    _FORMS[key] = form_class
+    return form_class
+
+
+def loadUi(ui_file, baseinstance):
+    """Load a .ui file into `baseinstance`, like ``uic.loadUi``.
+
+    Args:
+        ui_file (str) : Path to the .ui file.
+        baseinstance (QWidget) : The widget to set the form up on, it must
+            be of the form's base class.
+
+    Returns:
+        QWidget : The base instance.
+    """
+    form_class = formClass(ui_file) if ENABLED else None
+    if form_class is None:
+        return uic.loadUi(ui_file, baseinstance)
+
+    _FormSetup(form_class, baseinstance).setup()
+    return baseinstance
@@ -5,18 +5,50 @@ QtPyVCP Plugins
 These package level functions provide methods for registering and initializing
 plugins, as well as retrieving them for use and terminating them in the proper
 order.
+
+Plugins defined in the YAML config are not constructed when they are
+registered, only when :func:`initialisePlugins` is called or when they are
+first used through :func:`getPlugin`, whichever comes first. Plugins
+marked ``lazy`` are only constructed when first used, so plugins the VCP
+never uses never get imported.
+
+The plugins a plugin uses can be listed in its ``requires`` class attribute,
+or in the YAML config, and are always constructed and initialized before it.
 """
+import time
 import importlib
 
 from collections import OrderedDict
 
+from qtpyvcp.lib import startup_profiler
 from qtpyvcp.utilities.logger import getLogger
-from qtpyvcp.plugins.base_plugins import Plugin, DataPlugin, DataChannel
+from qtpyvcp.plugins.base_plugins import Plugin, DataPlugin, DataChannel, \
+    notifyCoalesced, unnotifyCoalesced, flushChanges
 
 LOG = getLogger(__name__)
 
 _PLUGINS = OrderedDict()  # Ordered dict so we can initialize/terminate in order
 
+# plugins registered but not constructed yet, plugin_id: _PluginSpec
+_PENDING = OrderedDict()
+
+# IDs of the plugins being constructed, to catch circular requirements
+_CONSTRUCTING = []
+
+# set once initialisePlugins has been called
+_INITIALISED = False
+
+
+class _PluginSpec(object):
+    __slots__ = ('plugin_cls', 'args', 'kwargs', 'requires', 'lazy')
+
+    def __init__(self, plugin_cls, args, kwargs, requires, lazy):
+        self.plugin_cls = plugin_cls
+        self.args = args
+        self.kwargs = kwargs
+        self.requires = requires
+        self.lazy = lazy
+
 
 def registerPlugin(plugin_id, plugin_inst):
     """Register a Plugin instance.
@@ -30,10 +62,12 @@ def registerPlugin(plugin_id, plugin_inst):
         LOG.warning("Replacing {} with {} for use with '{}' plugin"
                     .format(_PLUGINS[plugin_id].__class__, plugin_inst.__class__, plugin_id))
 
+    _PENDING.pop(plugin_id, None)
     _PLUGINS[plugin_id] = plugin_inst
 
 
-def registerPluginFromClass(plugin_id, plugin_cls, args=[], kwargs={}):
+def registerPluginFromClass(plugin_id, plugin_cls, args=[], kwargs={},
+                            requires=[], defer=False, lazy=False):
     """Register a plugin from a class.
 
     This is primarily used for registering plugins defined in the YAML config.
@@ -43,6 +77,11 @@ def registerPluginFromClass(plugin_id, plugin_cls, args=[], kwargs={}):
         data_plugins:
           my_plugin:
             provider: my_package.my_module:MyPluginClass
+            # plugins to construct before this one
+            requires:
+              - status
+            # only construct the plugin when it is first used
+            lazy: True
             args:
               - 10
               - False
@@ -57,11 +96,31 @@ def registerPluginFromClass(plugin_id, plugin_cls, args=[], kwargs={}):
             the location of an importable :py:class:`.Plugin` subclass.
         args (list) : Arguments to pass to the plugin's __init__ method.
         kwargs (dict) : Keyword argument to pass to the plugin's __init__ method.
+        requires (list) : IDs of plugins to construct before this one, in
+            addition to those in the plugin class's ``requires``.
+        defer (bool) : Construct the plugin when :func:`initialisePlugins`
+            is called or when it is first used, instead of straight away.
+        lazy (bool) : Only construct the plugin when it is first used,
+            implies `defer`.
 
     Returns:
-        The plugin instance
+        The plugin instance, or None if construction is deferred.
     """
 
+    if plugin_id in _PLUGINS:
+        LOG.warning("Replacing {} with {} for use with '{}' plugin"
+                    .format(_PLUGINS[plugin_id].__class__, plugin_cls, plugin_id))
+        del _PLUGINS[plugin_id]
+
+    _PENDING[plugin_id] = _PluginSpec(plugin_cls, args, kwargs, list(requires or []), lazy)
+
+    if defer or lazy:
+        return None
+
+    return _constructPlugin(plugin_id)
+
+
+def _importPluginClass(plugin_id, plugin_cls):
     if isinstance(plugin_cls, basestring):
         LOG.debug("Loading plugin '{}' from '{}'".format(plugin_id, plugin_cls))
 
@@ -74,19 +133,60 @@ def registerPluginFromClass(plugin_id, plugin_cls, args=[], kwargs={}):
             raise
 
     assert issubclass(plugin_cls, Plugin), "Not a valid plugin, must be a qtpyvcp.plugins.Plugin subclass."
+    return plugin_cls
+
+
+def _constructPlugin(plugin_id):
+    """Construct a registered plugin and the plugins it requires."""
+    if plugin_id in _CONSTRUCTING:
+        chain = _CONSTRUCTING[_CONSTRUCTING.index(plugin_id):] + [plugin_id]
+        raise ValueError("Circular plugin requirement: {}".format(' -> '.join(chain)))
 
+    spec = _PENDING[plugin_id]
+    _CONSTRUCTING.append(plugin_id)
     try:
-        inst = plugin_cls(*args, **kwargs)
-        registerPlugin(plugin_id, inst)
-        return inst
-    except TypeError:
-        LOG.critical("Error initializing plugin: {}(*{}, **{})".format(plugin_cls, args, kwargs))
-        raise
+        start = time.time()
+
+        # importing the module may use other plugins
+        plugin_cls = _importPluginClass(plugin_id, spec.plugin_cls)
+
+        for required_id in spec.requires + list(getattr(plugin_cls, 'requires', [])):
+            if required_id in _PLUGINS:
+                continue
+            if required_id not in _PENDING:
+                LOG.warning("Plugin '%s' requires the '%s' plugin, which is not registered",
+                            plugin_id, required_id)
+                continue
+            _constructPlugin(required_id)
+
+        try:
+            inst = plugin_cls(*spec.args, **spec.kwargs)
+        except TypeError:
+            LOG.critical("Error initializing plugin: {}(*{}, **{})"
+                         .format(plugin_cls, spec.args, spec.kwargs))
+            raise
+
+    finally:
+        _CONSTRUCTING.remove(plugin_id)
+
+    registerPlugin(plugin_id, inst)
+    end = time.time()
+    startup_profiler.record(plugin_id, 'plugins', start, end)
+    LOG.debug("Constructed '%s' plugin in %.3fs", plugin_id, end - start)
+
+    # plugins first used after startup are initialized straight away
+    if _INITIALISED:
+        _initialisePlugin(plugin_id, inst)
+
+    return inst
 
 
 def getPlugin(plugin_id):
     """Get plugin instance from ID.
 
+    Plugins which have been registered but not constructed yet are
+    constructed first.
+
     Args:
         plugin_id (str) : The ID of the plugin to retrieve.
 
@@ -96,31 +196,59 @@ def getPlugin(plugin_id):
     try:
         return _PLUGINS[plugin_id]
     except KeyError:
+        if plugin_id in _PENDING:
+            return _constructPlugin(plugin_id)
         LOG.error("Failed to find plugin with ID '%s'", plugin_id)
         return None
 
 
 def iterPlugins():
-    """Returns an iterator for the plugins dict."""
+    """Returns an iterator for the plugins dict.
+
+    This constructs all the registered plugins, including lazy ones.
+    """
+    for plugin_id in list(_PENDING):
+        if plugin_id in _PENDING:
+            _constructPlugin(plugin_id)
     return _PLUGINS.iteritems()
 
 
 def initialisePlugins():
     """Initializes all registered plugins.
 
-        Plugins are initialized in the order they were registered in.
-        Plugins defined in the YAML file are registered in the order they
-        were defined.
+        Deferred plugins which have not been constructed yet are constructed
+        first, except for lazy ones. Plugins are initialized in the order
+        they were constructed in, which puts the plugins each plugin requires
+        before it. Plugins defined in the YAML file are otherwise constructed
+        in the order they were defined.
+
+        Plugins constructed after this are initialized when they are
+        constructed.
     """
+    global _INITIALISED
+
+    for plugin_id, spec in list(_PENDING.items()):
+        if not spec.lazy and plugin_id in _PENDING:
+            _constructPlugin(plugin_id)
+
+    # lazy plugins first used while initializing are initialized when
+    # they are constructed
+    _INITIALISED = True
+
     for plugin_id, plugin_inst in _PLUGINS.items():
-        LOG.debug("Initializing '%s' plugin", plugin_id)
+        _initialisePlugin(plugin_id, plugin_inst)
+
+
+def _initialisePlugin(plugin_id, plugin_inst):
+    LOG.debug("Initializing '%s' plugin", plugin_id)
+    with startup_profiler.span(plugin_id + ' initialise', 'plugins'):
         plugin_inst.initialise()
 
 
 def terminatePlugins():
     """Terminates all registered plugins.
 
-        Plugins are terminated in the reverse order they were registered in.
+        Plugins are terminated in the reverse order they were constructed in.
         If an error is encountered while terminating a plugin it will be ignored
         and the remaining plugins will still be terminated.
     """
@@ -1,6 +1,10 @@
 import inspect
+import logging
+from functools import partial
 
-from qtpy.QtCore import QObject, Signal
+from collections import OrderedDict
+
+from qtpy.QtCore import QObject, QTimer, Signal
 from qtpyvcp.utilities.logger import getLogger, logLevelFromName
 
 LOG = getLogger(__name__)
@@ -8,6 +12,11 @@ LOG = getLogger(__name__)
 
 class Plugin(QObject):
     """QtPyVCP Plugin base class."""
+
+    # IDs of the plugins this plugin uses, they are constructed and
+    # initialized before it
+    requires = []
+
     def __init__(self):
         super(Plugin, self).__init__()
 
@@ -89,8 +98,43 @@ class DataPlugin(Plugin):
         except (KeyError, SyntaxError):
             return None, None
 
+        chan_obj.subscribe(url)
+
         return chan_obj, chan_exp
 
+    def subscriptionReport(self):
+        """Get the active and dormant data channels.
+
+        A channel is active if something is subscribed to it, either via
+        :meth:`getChannel`, :meth:`DataChannel.notify`, or by connecting
+        to the channel's signal directly.
+
+        Returns:
+            tuple : (active, dormant) lists of ``(chan_name, subscribers)``
+        """
+        active = []
+        dormant = []
+        for name, chan in sorted(self.channels.items()):
+            if chan.subscribed:
+                active.append((name, chan.subscribers()))
+            else:
+                dormant.append((name, []))
+        return active, dormant
+
+    def logSubscriptions(self):
+        """Log the active and dormant data channels at DEBUG level."""
+        if not self.log.isEnabledFor(logging.DEBUG):
+            return
+
+        active, dormant = self.subscriptionReport()
+        lines = ["{} active and {} dormant data channels".format(len(active), len(dormant)),
+                 "  Active:"]
+        for name, subscribers in active:
+            lines.append("    {:<32} {}".format(name, ', '.join(subscribers)))
+        lines.append("  Dormant:")
+        lines.append("    " + ' '.join(name for name, subs in dormant))
+        self.log.debug('\n'.join(lines))
+
     def setLogLevel(self, level):
         """Set plugin log level.
 
@@ -107,6 +151,11 @@ class DataChannel(QObject):
 
     signal = Signal(object)
 
+    # Incremented each time a subscription to any channel is added or
+    # removed, so plugins that only poll subscribed channels can cheaply
+    # check if they need to rebuild their list of active channels.
+    subscription_id = 0
+
     def __init__(self, fget=None, fset=None, fstr=None, data=None, settable=False,
                  doc = None):
         super(DataChannel, self).__init__()
@@ -120,6 +169,8 @@ class DataChannel(QObject):
         self.settable = settable
         self.instance = None
 
+        self._subscribers = []
+
         if doc is None and fget is not None:
             doc = fget.__doc__
         self.__doc__ = doc
@@ -165,8 +216,51 @@ class DataChannel(QObject):
         self.fstr = inner
         return self
 
+    def subscribe(self, subscriber):
+        """Register a consumer of the channel value.
+
+        Subscriptions made via :meth:`notify` and :meth:`DataPlugin.getChannel`
+        are registered automatically, this only needs to be called for
+        consumers that read the channel value without connecting to its
+        signal.
+
+        Args:
+            subscriber : The consumer, only used for debugging.
+        """
+        self._subscribers.append(getattr(subscriber, '__name__', str(subscriber)))
+        DataChannel.subscription_id += 1
+
+    def unsubscribe(self, subscriber):
+        """Remove a consumer registered with :meth:`subscribe`."""
+        name = getattr(subscriber, '__name__', str(subscriber))
+        try:
+            self._subscribers.remove(name)
+        except ValueError:
+            return
+        DataChannel.subscription_id += 1
+
+    def subscribers(self):
+        """Returns a list of the registered subscribers names."""
+        subscribers = list(self._subscribers)
+        unregistered = self.receivers(self.signal) - len(subscribers)
+        if unregistered > 0:
+            subscribers.append('{} signal connection(s)'.format(unregistered))
+        return subscribers
+
+    @property
+    def subscribed(self):
+        """Whether anything is consuming the channel value."""
+        return len(self._subscribers) > 0 or self.receivers(self.signal) > 0
+
+    def connectNotify(self, signal):
+        DataChannel.subscription_id += 1
+
+    def disconnectNotify(self, signal):
+        DataChannel.subscription_id += 1
+
     def notify(self, slot, *args, **kwargs):
         # print 'Connecting %s to slot %s' % (self._signal, slot)
+        self.subscribe(slot)
         if len(args) == 0 and len(kwargs) == 0:
             self.signal.connect(slot)
         else:
@@ -193,3 +287,188 @@ class DataChannel(QObject):
 
     def __str__(self):
         return self.getString()
+
+
+class _CoalescedSlot(object):
+    """Wraps a slot subscribed to changes via :func:`notifyCoalesced`."""
+
+    __slots__ = ('slot', 'batch', 'connections')
+
+    def __init__(self, slot, batch):
+        self.slot = slot
+        self.batch = batch
+        # (channel, function) pairs connected to the channel signals
+        self.connections = []
+
+    def __call__(self, changes):
+        if self.batch:
+            self.slot(changes)
+        else:
+            self.slot()
+
+
+class ChangeCoalescer(QObject):
+    """Coalesces DataChannel changes into one notification per frame.
+
+    Channel changes for coalesced subscribers are collected as they happen
+    and delivered when :meth:`flush` is called, which data plugins do at the
+    end of each update cycle. If nothing calls :meth:`flush` the changes are
+    delivered when control returns to the event loop.
+
+    Each subscriber is called at most once per frame, no matter how many of
+    the channels it is subscribed to changed.
+
+    Subscriptions of bound methods of QObjects are dropped when the object
+    is destroyed, others must be dropped with :meth:`unsubscribe`.
+
+    Channels only need a ``signal`` emitting the new value, so settings can
+    be used as well as DataChannels. If the channel has ``subscribe`` and
+    ``unsubscribe`` methods the subscriber is registered with them too.
+    """
+
+    # max number of times to re-deliver changes made by the subscribers
+    # themselves during a single flush, to guard against update loops
+    MAX_PASSES = 10
+
+    def __init__(self):
+        super(ChangeCoalescer, self).__init__()
+
+        self._pending = OrderedDict()
+        self._flush_scheduled = False
+        self._slots = []
+
+    def subscribe(self, channels, slot, batch=False):
+        # subscribing a slot again adds the channels to its subscription
+        for coalesced_slot in self._slots:
+            if coalesced_slot.slot == slot and coalesced_slot.batch == batch:
+                break
+        else:
+            coalesced_slot = _CoalescedSlot(slot, batch)
+            self._slots.append(coalesced_slot)
+
+            # unlike direct connections to a bound method, the connections
+            # below are not dropped when the receiver is deleted
+            receiver = getattr(slot, '__self__', None)
+            if isinstance(receiver, QObject):
+                receiver.destroyed.connect(partial(self._remove, coalesced_slot))
+
+        subscribed = [c for c, func in coalesced_slot.connections]
+        for chan in channels:
+            if chan in subscribed:
+                continue
+            func = partial(self._queue, coalesced_slot, chan)
+            chan.signal.connect(func)
+            if hasattr(chan, 'subscribe'):
+                chan.subscribe(slot)
+            coalesced_slot.connections.append((chan, func))
+
+    def unsubscribe(self, slot):
+        """Remove all the subscriptions of `slot`."""
+        for coalesced_slot in [s for s in self._slots if s.slot == slot]:
+            self._remove(coalesced_slot)
+
+    def _remove(self, coalesced_slot, *args):
+        if coalesced_slot not in self._slots:
+            return
+        self._slots.remove(coalesced_slot)
+        self._pending.pop(coalesced_slot, None)
+
+        connections, coalesced_slot.connections = coalesced_slot.connections, []
+        for chan, func in connections:
+            try:
+                chan.signal.disconnect(func)
+            except (TypeError, RuntimeError):
+                pass
+            if hasattr(chan, 'unsubscribe'):
+                chan.unsubscribe(coalesced_slot.slot)
+
+    def _queue(self, coalesced_slot, chan, value):
+        changes = self._pending.get(coalesced_slot)
+        if changes is None:
+            changes = self._pending[coalesced_slot] = OrderedDict()
+        changes[chan] = value
+
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def flush(self):
+        """Deliver all pending changes."""
+        self._flush_scheduled = False
+
+        for i in range(self.MAX_PASSES):
+            if not self._pending:
+                return
+
+            pending = self._pending
+            self._pending = OrderedDict()
+
+            for coalesced_slot, changes in pending.iteritems():
+                if not coalesced_slot.connections:
+                    # removed by an earlier slot in this pass
+                    continue
+                try:
+                    coalesced_slot(changes)
+                except Exception:
+                    LOG.exception("Error delivering coalesced changes to %s",
+                                  coalesced_slot.slot)
+
+        LOG.warning("Coalesced changes still pending after %i passes, "
+                    "deferring to next frame", self.MAX_PASSES)
+
+
+_COALESCER = None
+
+
+def notifyCoalesced(channels, slot, batch=False):
+    """Call a slot at most once per frame when any of the channels change.
+
+    This should be used instead of connecting the same slot to several
+    channels, which would call it once for each channel that changed in
+    a status cycle.
+
+    Example:
+
+        Update a plot once per frame, even if both positions changed::
+
+            notifyCoalesced([STATUS.actual_position, STATUS.joint_actual_position],
+                            self.update)
+
+        Receive all the changes in the frame as a dict of ``{chan: value}``::
+
+            notifyCoalesced([STATUS.position, STATUS.dtg], self.onChanges,
+                            batch=True)
+
+    Args:
+        channels (list) : The DataChannels or settings to subscribe to, any
+            object with a ``signal`` emitting the new value will do.
+        slot (callable) : The slot to call when any of the channels change.
+        batch (bool) : If True the slot is called with an ordered dict of the
+            changed channels and their new values, otherwise with no arguments.
+            Subscribing the same slot again with the same `batch` adds the
+            channels to its existing subscription.
+    """
+    global _COALESCER
+    if _COALESCER is None:
+        _COALESCER = ChangeCoalescer()
+    _COALESCER.subscribe(channels, slot, batch)
+
+
+def unnotifyCoalesced(slot):
+    """Remove the subscriptions made with :func:`notifyCoalesced` for `slot`.
+
+    Subscriptions of bound methods of QObjects are removed automatically
+    when the object is destroyed.
+    """
+    if _COALESCER is not None:
+        _COALESCER.unsubscribe(slot)
+
+
+def flushChanges():
+    """Deliver any pending coalesced channel changes.
+
+    Data plugins should call this at the end of each update cycle, so that
+    coalesced subscribers are updated in step with the plugin.
+    """
+    if _COALESCER is not None:
+        _COALESCER.flush()
@@ -21,6 +21,9 @@ LOG = getLogger(__name__)
 
 
 class FileLocations(DataPlugin):
+
+    requires = ['status']
+
     def __init__(self, local_locations=None, network_locations=None,
                  default_location=None, **kwargs):
         super(FileLocations, self).__init__()
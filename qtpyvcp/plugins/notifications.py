@@ -43,6 +43,9 @@ class Notifications(DataPlugin):
         max_messages (int, optional)                   Max number of notification popups to show.
         persistent (bool, optional):                   Save notifications on shutdown (Default = True)
     """
+
+    requires = ['status', 'persistent_data_manager']
+
     def __init__(self, enabled=True, mode="native", max_messages=5,
                  persistent=True, **kwargs):
         super(Notifications, self).__init__()
@@ -60,6 +63,9 @@ class Notifications(DataPlugin):
 
         self.data_manager = getPlugin('persistent_data_manager')
 
+        # the loaded file is recorded with each message
+        STATUS.file.subscribe('notifications')
+
     @DataChannel
     def debug_message(self, chan):
         return chan.value or ''
@@ -101,6 +101,8 @@ class OffsetTable(DataPlugin):
         'G59.3'
     ]
 
+    requires = ['status']
+
     offset_table_changed = Signal(dict)
     active_offset_changed = Signal(int)
 
@@ -38,7 +38,7 @@ import math
 
 from qtpyvcp.utilities.info import Info
 from qtpyvcp.utilities.logger import getLogger
-from qtpyvcp.plugins import DataPlugin, DataChannel, getPlugin
+from qtpyvcp.plugins import DataPlugin, DataChannel, getPlugin, notifyCoalesced
 
 STATUS = getPlugin('status')
 STAT = STATUS.stat
@@ -62,6 +62,9 @@ else:
 
 class Position(DataPlugin):
     """Positions Plugin"""
+
+    requires = ['status']
+
     def __init__(self, report_actual_pos=False, use_program_units=True,
                  metric_format='%9.3f', imperial_format='%8.4f'):
         super(Position, self).__init__()
@@ -75,11 +78,16 @@ class Position(DataPlugin):
 
         self._update()
 
-        # all these should cause the positions to update
-        STATUS.position.signal.connect(self._update)
-        STATUS.g5x_offset.signal.connect(self._update)
-        STATUS.g92_offset.signal.connect(self._update)
-        STATUS.tool_offset.signal.connect(self._update)
+        # all these should cause the positions to update, coalesced so
+        # we only update once per cycle no matter how many changed
+        notifyCoalesced([STATUS.position,
+                         STATUS.actual_position,
+                         STATUS.dtg,
+                         STATUS.g5x_offset,
+                         STATUS.g92_offset,
+                         STATUS.tool_offset,
+                         STATUS.rotation_xy],
+                        self._update)
         STATUS.program_units.signal.connect(self.updateUnits)
 
         self.report_actual_pos = report_actual_pos
@@ -125,6 +133,8 @@ class Position(DataPlugin):
             LOG.exception('Error getting channel')
             return None, None
 
+        chan_obj.subscribe(url)
+
         return chan_obj, chan_exp
 
     def updateUnits(self, canon_units):
@@ -223,21 +233,7 @@ class Position(DataPlugin):
         if report_actual_pos == self._report_actual_pos:
             return
         self._report_actual_pos = report_actual_pos
-
-        if self._report_actual_pos:
-            # disconnect commanded pos update signals
-            STATUS.position.signal.disconnect(self._update)
-            # STATUS.joint_position.signal.disconnect(self._update)
-            # connect actual pos update signals
-            STATUS.actual_position.signal.connect(self._update)
-            # STATUS.joint_actual_position.signal.connect(self.joint._update)
-        else:
-            # disconnect actual pos update signals
-            STATUS.actual_position.signal.disconnect(self._update)
-            # STATUS.joint_actual_position.signal.disconnect(self._update)
-            # connect commanded pos update signals
-            STATUS.position.signal.connect(self._update)
-            # STATUS.joint_position.signal.connect(self._update)
+        self._update()
 
     def _update(self):
 
@@ -9,6 +9,9 @@ LOG = getLogger(__name__)
 
 
 class Settings(DataPlugin):
+
+    requires = ['persistent_data_manager']
+
     def __init__(self, **kwargs):
         super(Settings, self).__init__()
 
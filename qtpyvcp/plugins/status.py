@@ -1,11 +1,14 @@
 import os
+import time
+import threading
 import linuxcnc
 
-from qtpy.QtCore import QTimer, QFileSystemWatcher
+from qtpy.QtCore import Qt, QObject, QTimer, QFileSystemWatcher, Signal
 
 from qtpyvcp.utilities.logger import getLogger
 from qtpyvcp.app.runtime_config import RuntimeConfig
-from qtpyvcp.plugins import DataPlugin, DataChannel
+from qtpyvcp.plugins import DataPlugin, DataChannel, flushChanges
+from qtpyvcp.lib.status_diff import StatusScheduler
 
 from qtpyvcp.utilities.info import Info
 
@@ -16,16 +19,61 @@ CMD = linuxcnc.command()
 
 
 class Status(DataPlugin):
+    """Status data plugin
+
+    By default only channels that have a subscriber, i.e. that are used in a
+    widget rule, connected to via ``notify`` or whose signal has been
+    connected, are checked for changes each cycle. The values of the other
+    (dormant) channels are only updated once they get a subscriber, so code
+    that reads ``chan.value`` without subscribing should call
+    ``chan.subscribe()`` first.
+
+    Channels can be updated at different rates, so that values which rarely
+    change are not checked every cycle. Rates are assigned per channel, either
+    as a period in ms or as the name of a priority tier. Faster tiers are
+    always processed first. The status is polled at the greatest common
+    divisor of the periods, so a tier faster than ``cycle_time``, like the
+    ``fast`` tier below, costs more NML polls.
+
+    .. code-block:: yaml
+
+        data_plugins:
+          status:
+            kwargs:
+              cycle_time: 75
+              tiers:
+                fast: 25
+                slow: 500
+              rates:
+                position: fast
+                joint.*.homed: 250
+                tool_table: slow
+
+    Args:
+        cycle_time (int, optional) : The update period in ms of channels that
+            do not have a rate specified.
+        poll_all (bool, optional) : Check all channels for changes each cycle,
+            regardless of whether they have subscribers (Default = False).
+        tiers (dict, optional) : Named update periods, tier name: period in ms.
+        rates (dict, optional) : Per channel update rates, channel name: tier
+            name or period in ms. Names can contain shell style wildcards.
+        threaded (bool, optional) : Poll and diff the status in a background
+            thread, so slow NML reads or slots can't stall it (Default = False).
+    """
 
     stat = STAT
 
-    def __init__(self, cycle_time=100):
+    def __init__(self, cycle_time=100, poll_all=False, tiers=None, rates=None,
+                 threaded=False):
         super(Status, self).__init__()
 
         self.no_force_homing = INFO.noForceHoming()
 
         self.file_watcher = None
 
+        # threaded status poller, created below if enabled
+        self.poller = None
+
         # recent files
         self.max_recent_files = 10
         with RuntimeConfig('~/.axis_preferences') as rc:
@@ -51,15 +99,17 @@ class Status(DataPlugin):
 
         excluded_items = ['axis', 'joint', 'spindle', 'poll']
 
-        self.old = {}
+        self._stat_channels = []
         # initialize data channels
         for item in dir(STAT):
             if item in self.channels:
-                self.old[item] = getattr(STAT, item)
+                self._stat_channels.append(item)
                 self.channels[item].setValue(getattr(STAT, item))
             elif item not in excluded_items and not item.startswith('_'):
-                self.old[item] = getattr(STAT, item)
-                chan = DataChannel(doc=item)
+                self._stat_channels.append(item)
+                chan = DataChannel(fget=_statGetter(item), doc=item)
+                # set as an instance attribute, so __get__ never binds it
+                chan.instance = self
                 chan.setValue(getattr(STAT, item))
                 self.channels[item] = chan
                 setattr(self, item, chan)
@@ -68,23 +118,44 @@ class Status(DataPlugin):
         self.joint = tuple(JointStatus(jnum) for jnum in range(9))
         for joint in self.joint:
             for chan, obj in joint.channels.items():
-                self.channels['joint.{}.{}'.format(joint.jnum, chan)] = obj
+                name = 'joint.{}.{}'.format(joint.jnum, chan)
+                self._stat_channels.append(name)
+                self.channels[name] = obj
 
         # add spindle status channels
         self.spindle = tuple(SpindleStatus(snum) for snum in range(8))
         for spindle in self.spindle:
             for chan, obj in spindle.channels.items():
-                self.channels['spindle.{}.{}'.format(spindle.snum, chan)] = obj
+                name = 'spindle.{}.{}'.format(spindle.snum, chan)
+                self._stat_channels.append(name)
+                self.channels[name] = obj
+
+        # schedule of the channels to check for changes in the periodic
+        # update, rebuilt each time the channel subscriptions change
+        self._poll_all = poll_all
+        self._subscription_id = None
+        self._polled_channels = set(self._stat_channels)
+        self.status_scheduler = StatusScheduler(cycle_time, tiers, rates)
+        self.status_scheduler.setChannels(self._stat_channels)
+        self.status_scheduler.snapshot(STAT)
 
         self.all_axes_homed.value = False
         self.homed.notify(self.all_axes_homed.setValue)
         self.enabled.notify(self.all_axes_homed.setValue)
 
-        # Set up the periodic update timer
+        # Set up the periodic update timer, it runs at the fastest update
+        # rate and the scheduler works out which channels are due each tick
         self.timer = QTimer()
-        self._cycle_time = cycle_time
+        self._cycle_time = self.status_scheduler.interval
         self.timer.timeout.connect(self._periodic)
 
+        # in threaded mode the poller takes ownership of the scheduler, and
+        # the periodic timer is only used to check for subscription changes
+        if threaded:
+            self.poller = StatusPoller(self.status_scheduler)
+            self.poller.changed.connect(self._applyChanges, Qt.QueuedConnection)
+            self.poller.failed.connect(self.timer.stop)
+
         self.on.settable = True
         self.task_state.notify(lambda ts:
                                self.on.setValue(ts == linuxcnc.STATE_ON))
@@ -187,7 +258,7 @@ class Status(DataPlugin):
     @DataChannel
     def on(self, chan):
         """True if machine power is ON."""
-        return STAT.task_state == linuxcnc.STATE_ON
+        return self._read('task_state') == linuxcnc.STATE_ON
 
     @DataChannel
     def file(self, chan):
@@ -196,8 +267,8 @@ class Status(DataPlugin):
 
     @file.setter
     def file(self, chan, fname):
-        if STAT.interp_state == linuxcnc.INTERP_IDLE \
-                and STAT.call_level == 0:
+        if self._read('interp_state') == linuxcnc.INTERP_IDLE \
+                and self._read('call_level') == 0:
 
             if self.file_watcher is not None:
                 if self.file_watcher.files():
@@ -229,7 +300,7 @@ class Status(DataPlugin):
         :returns: current command execution state
         :rtype: int, str
         """
-        return STAT.state
+        return self._read('state')
 
     @state.tostring
     def state(self, chan):
@@ -238,7 +309,7 @@ class Status(DataPlugin):
                        linuxcnc.RCS_EXEC: "Exec",
                        linuxcnc.RCS_ERROR: "Error"}
 
-        return states[STAT.state]
+        return states[self._read('state')]
 
     @DataChannel
     def exec_state(self, chan):
@@ -262,7 +333,7 @@ class Status(DataPlugin):
         :returns: current task execution error
         :rtype: int, str
         """
-        return STAT.exec_state
+        return self._read('exec_state')
 
     @exec_state.tostring
     def exec_state(self, chan):
@@ -277,7 +348,7 @@ class Status(DataPlugin):
                         linuxcnc.EXEC_WAITING_FOR_SYSTEM_CMD: "Waiting for system CMD",
                         linuxcnc.EXEC_WAITING_FOR_SPINDLE_ORIENTED: "Waiting for spindle orient"}
 
-        return exec_states[STAT.exec_state]
+        return exec_states[self._read('exec_state')]
 
     @DataChannel
     def interp_state(self, chan):
@@ -295,7 +366,7 @@ class Status(DataPlugin):
         :returns: RS274 interpreter state
         :rtype: int, str
         """
-        return STAT.interp_state
+        return self._read('interp_state')
 
     @interp_state.tostring
     def interp_state(self, chan):
@@ -305,7 +376,7 @@ class Status(DataPlugin):
                             linuxcnc.INTERP_PAUSED: "Paused",
                             linuxcnc.INTERP_WAITING: "Waiting"}
 
-        return interp_states[STAT.interp_state]
+        return interp_states[self._read('interp_state')]
 
 
     @DataChannel
@@ -326,7 +397,7 @@ class Status(DataPlugin):
         :returns: interp error code
         :rtype: int, str
         """
-        return STAT.interpreter_errcode
+        return self._read('interpreter_errcode')
 
     @interpreter_errcode.tostring
     def interpreter_errcode(self, chan):
@@ -337,7 +408,7 @@ class Status(DataPlugin):
                                 4: "File not open",
                                 5: "Error"}
 
-        return interpreter_errcodes[STAT.interpreter_errcode]
+        return interpreter_errcodes[self._read('interpreter_errcode')]
 
     @DataChannel
     def task_state(self, chan, query=None):
@@ -355,7 +426,7 @@ class Status(DataPlugin):
         :returns: current task state
         :rtype: int, str
         """
-        return STAT.task_state
+        return self._read('task_state')
 
     @task_state.tostring
     def task_state(self, chan):
@@ -365,7 +436,7 @@ class Status(DataPlugin):
                        linuxcnc.STATE_ON: "On",
                        linuxcnc.STATE_OFF: "Off"}
 
-        return task_states[STAT.task_state]
+        return task_states[self._read('task_state')]
 
     @DataChannel
     def task_mode(self, chan):
@@ -382,7 +453,7 @@ class Status(DataPlugin):
         :returns: current task mode
         :rtype: int, str
         """
-        return STAT.task_mode
+        return self._read('task_mode')
 
     @task_mode.tostring
     def task_mode(self, chan):
@@ -391,7 +462,7 @@ class Status(DataPlugin):
                        linuxcnc.MODE_AUTO: "Auto",
                        linuxcnc.MODE_MDI: "MDI"}
 
-        return task_modes[STAT.task_mode]
+        return task_modes[self._read('task_mode')]
 
     @DataChannel
     def motion_mode(self, chan):
@@ -408,7 +479,7 @@ class Status(DataPlugin):
         :returns: current motion mode
         :rtype: int, str
         """
-        return STAT.motion_mode
+        return self._read('motion_mode')
 
     @motion_mode.tostring
     def motion_mode(self, chan):
@@ -417,7 +488,7 @@ class Status(DataPlugin):
                   linuxcnc.TRAJ_MODE_FREE: "Free",
                   linuxcnc.TRAJ_MODE_TELEOP: "Teleop"}
 
-        return modes[STAT.motion_mode]
+        return modes[self._read('motion_mode')]
 
     @DataChannel
     def motion_type(self, chan, query=None):
@@ -438,7 +509,7 @@ class Status(DataPlugin):
         :returns:  current motion type
         :rtype: int, str
         """
-        return STAT.motion_type
+        return self._read('motion_type')
 
     @motion_type.tostring
     def motion_type(self, chan):
@@ -450,7 +521,7 @@ class Status(DataPlugin):
                         linuxcnc.MOTION_TYPE_PROBING: "Probing",
                         linuxcnc.MOTION_TYPE_INDEXROTARY: "Rotary Index"}
 
-        return motion_types[STAT.motion_type]
+        return motion_types[self._read('motion_type')]
 
     @DataChannel
     def program_units(self, chan):
@@ -471,14 +542,14 @@ class Status(DataPlugin):
         :returns: current program units
         :rtype: int, str
         """
-        return STAT.program_units
+        return self._read('program_units')
 
     @program_units.tostring
     def program_units(self, chan, format='short'):
         if format == 'short':
-            return ["N/A", "in", "mm", "cm"][STAT.program_units]
+            return ["N/A", "in", "mm", "cm"][self._read('program_units')]
         else:
-            return ["N/A", "Inches", "Millimeters", "Centimeters"][STAT.program_units]
+            return ["N/A", "Inches", "Millimeters", "Centimeters"][self._read('program_units')]
 
     @DataChannel
     def linear_units(self, chan):
@@ -495,14 +566,14 @@ class Status(DataPlugin):
         :returns: machine linear units
         :rtype: float, str
         """
-        return STAT.linear_units
+        return self._read('linear_units')
 
     @linear_units.tostring
     def linear_units(self, chan, format='short'):
         if format == 'short':
-            return {0.0: "N/A", 1.0: "mm", 1 / 25.4: "in"}[STAT.linear_units]
+            return {0.0: "N/A", 1.0: "mm", 1 / 25.4: "in"}[self._read('linear_units')]
         else:
-            return {0.0: "N/A", 1.0: "Millimeters", 1 / 25.4: "Inches"}[STAT.linear_units]
+            return {0.0: "N/A", 1.0: "Millimeters", 1 / 25.4: "Inches"}[self._read('linear_units')]
 
     @DataChannel
     def gcodes(self, chan, fmt=None):
@@ -515,7 +586,7 @@ class Status(DataPlugin):
         | syntax ``status:gcodes?string`` returns str
         """
         if fmt == 'raw':
-            return STAT.gcodes
+            return self._read('gcodes')
         return chan.value
 
     @gcodes.tostring
@@ -538,7 +609,7 @@ class Status(DataPlugin):
         | syntax ``status:mcodes?string`` returns str
         """
         if fmt == 'raw':
-            return STAT.mcodes
+            return self._read('mcodes')
         return chan.value
 
     @mcodes.tostring
@@ -557,12 +628,12 @@ class Status(DataPlugin):
         | syntax ``status:g5x_index`` returns int
         | syntax ``status:g5x_index?string`` returns str
         """
-        return STAT.g5x_index
+        return self._read('g5x_index')
 
     @g5x_index.tostring
     def g5x_index(self, chan):
         return ["G53", "G54", "G55", "G56", "G57", "G58",
-                "G59", "G59.1", "G59.2", "G59.3"][STAT.g5x_index]
+                "G59", "G59.1", "G59.2", "G59.3"][self._read('g5x_index')]
 
     @DataChannel
     def settings(self, chan, item=None):
@@ -577,8 +648,8 @@ class Status(DataPlugin):
         :rtype: tuple, int, float
         """
         if item is None:
-            return STAT.settings
-        return STAT.settings[{'sequence_number': 0, 'feed': 1, 'speed': 2}[item]]
+            return self._read('settings')
+        return self._read('settings')[{'sequence_number': 0, 'feed': 1, 'speed': 2}[item]]
 
     @DataChannel
     def homed(self, chan, anum=None):
@@ -600,8 +671,8 @@ class Status(DataPlugin):
 
         """
         if anum is None:
-            return STAT.homed
-        return bool(STAT.homed[int(anum)])
+            return self._read('homed')
+        return bool(self._read('homed')[int(anum)])
 
     @DataChannel
     def all_axes_homed(self, chan):
@@ -624,8 +695,9 @@ class Status(DataPlugin):
         if self.no_force_homing:
             all_homed = True
         else:
+            homed = self._read('homed')
             for anum in INFO.AXIS_NUMBER_LIST:
-                if STAT.homed[anum] is not 1:
+                if homed[anum] is not 1:
                     all_homed = False
                     break
             else:
@@ -642,18 +714,78 @@ class Status(DataPlugin):
     def allHomed(self):
         if self.no_force_homing:
             return True
-        for jnum in range(STAT.joints):
-            if not STAT.joint[jnum]['homed']:
+        joints = self._read('joint')
+        for jnum in range(self._read('joints')):
+            if not joints[jnum]['homed']:
                 return False
         return True
 
+    def _read(self, item):
+        """Read `item` from the latest status.
+
+        In threaded mode this reads the status last polled by the poller
+        thread, so the GUI thread never waits on NML.
+        """
+        if self.poller is not None:
+            return self.poller.read(item)
+        return getattr(STAT, item)
+
     def forceUpdateStaticChannelMembers(self):
         """Static items need a force update to operate properly with the
         gui rules.  This needs to be done with consideration to the
         data structure so as to not "break" things.
         """
         # TODO: add to this list as needed. Possible to externalise via yaml?
-        self.old['axes'] = None
+        self.forceUpdate('axes')
+
+    def forceUpdate(self, *items):
+        """Force channels to be updated on the next status cycle.
+
+        This is needed for values that might change and then change back
+        in less than one cycle time, so the change would not otherwise be
+        noticed.
+
+        Args:
+            *items (str) : Names of the channels to update, e.g.
+                ``interp_state`` or ``joint.0.homed``.
+        """
+        for item in items:
+            if item not in self._stat_channels:
+                LOG.warning("Can't force update of '%s', not a stat channel", item)
+            elif self.poller is not None:
+                self.poller.invalidate(item)
+            else:
+                # dormant channels have no subscribers, so nothing to update
+                self.status_scheduler.invalidate(item)
+
+    def _updateSchedule(self):
+        """Rebuild the status schedule to contain only the subscribed channels."""
+        self._subscription_id = DataChannel.subscription_id
+
+        if self._poll_all:
+            channels = self._stat_channels
+        else:
+            channels = [name for name in self._stat_channels
+                        if self.channels[name].subscribed]
+
+        if set(channels) == self._polled_channels:
+            return
+
+        self._polled_channels = set(channels)
+
+        # seed new channels with their current value so only real changes
+        # are reported, the scheduler keeps its own values for the others
+        values = {name: self.channels[name].value for name in channels}
+
+        if self.poller is not None:
+            self.poller.setChannels(channels, values)
+        else:
+            values.update(self.status_scheduler.values())
+            self.status_scheduler.setChannels(channels, values)
+
+        LOG.debug("Polling %i of %i status channels",
+                  len(channels), len(self._stat_channels))
+        self.logSubscriptions()
 
     def initialise(self):
         """Start the periodic update timer."""
@@ -668,6 +800,11 @@ class Status(DataPlugin):
                   self._cycle_time)
         self.timer.start(self._cycle_time)
 
+        if self.poller is not None:
+            LOG.debug("Starting threaded status poller")
+            self._updateSchedule()
+            self.poller.start()
+
         self.forceUpdateStaticChannelMembers()
 
     def terminate(self):
@@ -680,9 +817,25 @@ class Status(DataPlugin):
         # save MDI history
         self.saveMdiHistory(self._mdi_history_file)
 
+        self.timer.stop()
+        if self.poller is not None:
+            self.poller.stop()
+
+    def _applyChanges(self, changes):
+        """Update channels with a batch of changes from the status poller."""
+        for item, value in changes:
+            self.channels[item].setValue(value)
+
+        flushChanges()
+
     def _periodic(self):
 
-        # s = time.time()
+        if self.poller is not None:
+            if self._subscription_id != DataChannel.subscription_id:
+                self._updateSchedule()
+            return
+
+        s = time.time()
 
         try:
             STAT.poll()
@@ -691,24 +844,142 @@ class Status(DataPlugin):
             self.timer.stop()
             return
 
-        # status updates
-        for item, old_val in self.old.iteritems():
-            new_val = getattr(STAT, item)
-            if new_val != old_val:
-                self.old[item] = new_val
-                self.channels[item].setValue(new_val)
+        if self._subscription_id != DataChannel.subscription_id:
+            self._updateSchedule()
 
-        # joint status updates
-        for joint in self.joint:
-            joint._update()
+        # status updates, lower priority tiers are deferred to the next
+        # cycle if we are already half way through this one
+        deadline = s + self._cycle_time / 2000.0
+        for item, value in self.status_scheduler.diff(STAT, deadline):
+            self.channels[item].setValue(value)
 
-        # spindle status updates
-        for spindle in self.spindle:
-            spindle._update()
+        # deliver coalesced changes once per cycle
+        flushChanges()
 
         # print time.time() - s
 
 
+class StatusPoller(QObject):
+    """Background status poller.
+
+    Owns its own ``linuxcnc.stat`` objects and a :class:`StatusScheduler`,
+    which are polled and diffed in a thread. All the changes found during a
+    cycle are sent to the GUI thread in one batch via the ``changed`` signal,
+    which should be connected with a queued connection.
+
+    Two stat objects are used, one is polled while the other holds the last
+    complete status, which the GUI thread can read with :meth:`read`.
+
+    Args:
+        scheduler (StatusScheduler) : The scheduler to use, after the poller
+            is started it must only be accessed via the poller methods.
+    """
+
+    changed = Signal(object)
+    failed = Signal()
+
+    def __init__(self, scheduler):
+        super(StatusPoller, self).__init__()
+
+        self._stats = (linuxcnc.stat(), linuxcnc.stat())
+        # the last complete status, only swapped while holding the lock
+        self.stat = self._stats[0]
+        try:
+            self.stat.poll()
+        except Exception:
+            pass
+
+        self.scheduler = scheduler
+
+        self._lock = threading.Lock()
+        self._pending_channels = None
+        self._pending_invalidate = []
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='StatusPoller')
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the poller thread and wait for it to exit."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                LOG.warning("Status poller thread did not stop within %.1fs", timeout)
+
+    def setChannels(self, channels, values=None):
+        """Set the channels to poll, applied at the start of the next cycle."""
+        with self._lock:
+            self._pending_channels = (channels, values or {})
+
+    def invalidate(self, name):
+        """Force channel `name` to be reported the next time it is due."""
+        with self._lock:
+            self._pending_invalidate.append(name)
+
+    def read(self, item):
+        """Read `item` from the last complete status."""
+        with self._lock:
+            return getattr(self.stat, item)
+
+    def _applyPending(self):
+        with self._lock:
+            pending_channels = self._pending_channels
+            pending_invalidate = self._pending_invalidate
+            self._pending_channels = None
+            self._pending_invalidate = []
+
+        if pending_channels is not None:
+            channels, values = pending_channels
+            values.update(self.scheduler.values())
+            self.scheduler.setChannels(channels, values)
+
+        for name in pending_invalidate:
+            self.scheduler.invalidate(name)
+
+    def _run(self):
+        interval = self.scheduler.interval / 1000.0
+        next_cycle = time.time()
+
+        while not self._stop.is_set():
+
+            self._applyPending()
+
+            stat = self._stats[self.stat is self._stats[0]]
+            try:
+                stat.poll()
+            except Exception:
+                LOG.warning("Status polling failed, is LinuxCNC running?", exc_info=True)
+                self.failed.emit()
+                return
+
+            with self._lock:
+                self.stat = stat
+
+            changes = self.scheduler.diff(stat, next_cycle + interval / 2)
+            if changes:
+                self.changed.emit(changes)
+
+            next_cycle += interval
+            delay = next_cycle - time.time()
+            if delay < 0:
+                # fell behind, don't try to catch up
+                next_cycle = time.time()
+                delay = 0
+            self._stop.wait(delay)
+
+
+def _statGetter(item):
+    """Returns a channel getter that reads `item` from the latest status, so
+    the value is current even if the channel is dormant."""
+    def fget(instance, chan, *args, **kwargs):
+        return instance._read(item)
+    return fget
+
+
 class JointStatus(DataPlugin):
     def __init__(self, jnum):
         super(JointStatus, self).__init__()
@@ -721,17 +992,6 @@ class JointStatus(DataPlugin):
             self.channels[key] = chan
             setattr(self, key, chan)
 
-    def _update(self):
-        """Periodic joint item updates."""
-
-        jstat = STAT.joint[self.jnum].items()
-        changed_items = tuple(set(jstat) - set(self.jstat.items()))
-        for item in changed_items:
-            LOG.debug('JOINT_{0} {1}: {2}'.format(self.jnum, item[0], item[1]))
-            self.channels[item[0]].setValue(item[1])
-
-        self.jstat.update(jstat)
-
 
 class SpindleStatus(DataPlugin):
     def __init__(self, snum):
@@ -744,14 +1004,3 @@ class SpindleStatus(DataPlugin):
             chan = DataChannel(doc=key, data=value)
             self.channels[key] = chan
             setattr(self, key, chan)
-
-    def _update(self):
-        """Periodic spindle item updates."""
-
-        sstat = STAT.spindle[self.snum].items()
-        changed_items = tuple(set(sstat) - set(self.sstat.items()))
-        for item in changed_items:
-            LOG.debug('Spindle_{0} {1}: {2}'.format(self.snum, item[0], item[1]))
-            self.channels[item[0]].setValue(item[1])
-
-        self.sstat.update(sstat)
@@ -117,6 +117,8 @@ def makeLorumIpsumToolTable():
 
 class ToolTable(DataPlugin):
 
+    requires = ['status', 'persistent_data_manager']
+
     TOOL_TABLE = {0: NO_TOOL}
     DEFAULT_TOOL = DEFAULT_TOOL
     COLUMN_LABELS = COLUMN_LABELS
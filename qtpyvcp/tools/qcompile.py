@@ -6,91 +6,110 @@
     specified package(s).
 
 Usage:
-  qcompile <package> ...
+  qcompile [--parallel[=N]] <package> ...
   qcompile -h
 
+Options:
+  --parallel[=N]  Compile N files at once, by default one per CPU core.
+
 Example::
 
   $ qcompile .
   $ qcompile package1 package2/subpackage
+  $ qcompile --parallel .
 """
 
 import os
 import sys
 import fnmatch
 import subprocess
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 
 pyrcc = 'pyrcc5'
 pyuic = 'pyuic5'
 
 ok = "\033[32mok\033[0m"
 error = "\033[31mERROR - unable to call {}\033[0m"
+failed = "\033[31mERROR - exit status {}\033[0m"
 
 
-def compile(packages=['.',]):
-    for package in packages:
-        package_path = os.path.abspath(package)
-        if not os.path.isdir(package_path):
-            raise ValueError('Package "{}" not found!'.format(package))
+def findFiles(package_path, ext):
+    return [os.path.join(dirpath, f)
+            for dirpath, dirnames, files in os.walk(package_path)
+            for f in files if f.endswith(ext)]
 
-        # Compile Qt UI files
 
-        files = [os.path.join(dirpath, f)
-            for dirpath, dirnames, files in os.walk(package_path)
-            for f in files if f.endswith('.ui')]
+def run(job):
+    """Run a compile job, returns the job and its result message."""
+    tool, infile, outfile = job
+    try:
+        ret = subprocess.call([tool, '-o', outfile, infile])
+    except OSError:
+        return job, error.format(tool)
+    return job, ok if ret == 0 else failed.format(ret)
 
-        if len(files) > 0:
-            print("Compiling .ui files in package '{}':".format(package))
 
-            for infile in files:
-                outfile = infile.replace('.ui', '_ui.py')
+def compile(packages=['.',], parallel=1):
+    """Compile the .ui and .qrc files in packages.
 
-                sys.stdout.write("  {} => {} ... "
-                                 .format(os.path.basename(infile),
-                                         os.path.basename(outfile))
-                                 )
-                sys.stdout.flush()
+    Args:
+        packages (list) : The package directories to search.
+        parallel (int) : Number of files to compile at once.
+    """
+    jobs = []
+    for package in packages:
+        package_path = os.path.abspath(package)
+        if not os.path.isdir(package_path):
+            raise ValueError('Package "{}" not found!'.format(package))
 
-                try:
-                    ret = subprocess.call([pyuic, '-o', outfile, infile])
-                except OSError:
-                    print(error.format(pyuic))
-                    break
-                if ret == 0:
-                    print(ok)
+        # Compile Qt UI files
+        for infile in findFiles(package_path, '.ui'):
+            jobs.append((pyuic, infile, infile.replace('.ui', '_ui.py')))
 
         # Compile Qt resource files
-        files = [os.path.join(dirpath, f)
-                 for dirpath, dirnames, files in os.walk(package_path)
-                 for f in files if f.endswith('.qrc')]
+        for infile in findFiles(package_path, '.qrc'):
+            jobs.append((pyrcc, infile, infile.replace('.qrc', '_rc.py')))
 
-        if len(files) > 0:
-            print("\nCompiling .qrc files in package '{}':".format(package))
+    if len(jobs) == 0:
+        return
 
-            for infile in files:
-                outfile = infile.replace('.qrc', '_rc.py')
+    print("Compiling {} files in {}:".format(len(jobs), ', '.join(packages)))
 
-                sys.stdout.write("  {} => {} ... " \
-                                 .format(os.path.basename(infile),
-                                         os.path.basename(outfile))
-                                 )
-                sys.stdout.flush()
+    if parallel > 1:
+        pool = ThreadPool(parallel)
+        results = pool.imap_unordered(run, jobs)
+    else:
+        pool = None
+        results = (run(job) for job in jobs)
 
-                try:
-                    ret = subprocess.call([pyrcc, '-o', outfile, infile])
-                except OSError:
-                    print(error.format(pyrcc))
-                    break
-                if ret == 0:
-                    print(ok)
+    try:
+        for (tool, infile, outfile), result in results:
+            print("  {} => {} ... {}".format(os.path.basename(infile),
+                                             os.path.basename(outfile),
+                                             result))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
 
 
 def main():
-    packages = sys.argv[1:]
-    if len(packages) == 0 or '-h' in packages:
+    args = sys.argv[1:]
+    if len(args) == 0 or '-h' in args:
         print(__doc__)
-    else:
-        compile(packages=sys.argv[1:])
+        return
+
+    parallel = 1
+    packages = []
+    for arg in args:
+        if arg.startswith('--parallel'):
+            count = arg.partition('=')[2]
+            parallel = int(count) if count else cpu_count()
+        else:
+            packages.append(arg)
+
+    compile(packages=packages or ['.'], parallel=parallel)
 
 
 if __name__ == '__main__':
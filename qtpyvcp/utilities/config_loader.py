@@ -1,10 +1,35 @@
+"""
+Config Loader
+-------------
+
+Loads and merges the YAML config files.
+
+Each file is rendered as a Jinja2 template and the results are merged with
+hiyapyco. The merged config is saved in ``~/.cache/qtpyvcp/config``, keyed
+by the content hashes of the config files, and loaded from there on the
+next launch. Files included from the templates and the environment
+variables they read are stored with the cached config, and the files are
+re-rendered if any of them change.
+
+The cache can be disabled by setting ``QTPYVCP_CONFIG_CACHE=0`` in the
+environment.
+"""
+
 import os
 import sys
+import time
+import pickle
+import hashlib
+import tempfile
+from collections import Mapping, OrderedDict
+
 import hiyapyco
 from jinja2.nativetypes import NativeEnvironment
 from jinja2 import Environment, FileSystemLoader, Undefined, make_logging_undefined
 
+from qtpyvcp.lib import startup_profiler
 from qtpyvcp.utilities.logger import getLogger, logLevelFromName
+from qtpyvcp.utilities.misc import cacheDir
 
 LOG = getLogger(__name__)
 
@@ -14,6 +39,71 @@ hiyapyco.logger = hiyapyco_logger
 
 LogUndefined = make_logging_undefined(logger=LOG, base=Undefined)
 
+CACHE_ENABLED = os.getenv('QTPYVCP_CONFIG_CACHE', '1') != '0'
+
+# INI values available to the templates
+TEMPLATE_INI = {'traj': {'coordinates': 'XYZ'},
+                'machine': {'name': 'My Machine'},
+                'display': {'cycle_time': 100},
+                }
+
+
+class _RecordingEnviron(Mapping):
+    """``os.environ`` for the templates, recording the variables read."""
+
+    def __init__(self, environ):
+        self._environ = environ
+        self.used = {}
+
+    def __getitem__(self, name):
+        try:
+            value = self._environ[name]
+        except KeyError:
+            self.used[name] = None
+            raise
+        self.used[name] = value
+        return value
+
+    def __iter__(self):
+        # the template depends on the whole environment
+        self.used.update(self._environ)
+        return iter(self._environ)
+
+    def __len__(self):
+        return len(self._environ)
+
+
+class _RecordingLoader(FileSystemLoader):
+    """Template loader recording the files loaded."""
+
+    def __init__(self, searchpath):
+        super(_RecordingLoader, self).__init__(searchpath)
+        self.loaded = set()
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super(_RecordingLoader, self).get_source(environment, template)
+        self.loaded.add(filename)
+        return source, filename, uptodate
+
+
+class _Timer(object):
+    """Times the stages of loading the config."""
+
+    def __init__(self):
+        self.stages = OrderedDict()
+        self._last = time.time()
+
+    def stage(self, name):
+        now = time.time()
+        self.stages[name] = self.stages.get(name, 0) + now - self._last
+        startup_profiler.record(name, 'config', self._last, now)
+        self._last = now
+
+    def log(self, title):
+        LOG.debug("%s in %.3fs (%s)", title, sum(self.stages.values()),
+                  ', '.join('{} {:.3f}s'.format(name, secs)
+                            for name, secs in self.stages.items()))
+
 def load_config_files(*files):
     """Load and merge YAML config files.
 
@@ -28,6 +118,8 @@ def load_config_files(*files):
         load_config_files(file1, file2, file3, ...):
     """
 
+    timer = _Timer()
+
     files = [file for file in files if file is not None and file != '']
 
     for file in files:
@@ -38,7 +130,21 @@ def load_config_files(*files):
     # hiyapyco merges in order least important to most important
     files.reverse()
 
-    expanded_files = process_templates(files)
+    cache_file = None
+    if CACHE_ENABLED:
+        key = cacheKey(files)
+        timer.stage('hash files')
+        if key is not None:
+            cache_file = os.path.join(cacheDir('config'), key + '.pickle')
+            cfg_dict = readCache(cache_file)
+            timer.stage('read cache')
+            if cfg_dict is not None:
+                timer.log('Loaded merged config from cache')
+                return cfg_dict
+
+    environ = _RecordingEnviron(os.environ)
+    expanded_files, templates = process_templates(files, environ)
+    timer.stage('render templates')
 
     hiyapyco.jinja2env = NativeEnvironment(variable_start_string='(',
                                            variable_end_string=')',
@@ -48,35 +154,141 @@ def load_config_files(*files):
                              method=hiyapyco.METHOD_MERGE,
                              interpolate=True,
                              failonmissingfiles=True)
+    timer.stage('merge')
 
     if LOG.getEffectiveLevel() == logLevelFromName("DEBUG"):
         LOG.debug("Merged YAML config:\n\n%s\n",
                   hiyapyco.dump(cfg_dict,
                                 default_flow_style=False))
+        timer.stage('dump')
 
+    if cache_file is not None:
+        writeCache(cache_file, cfg_dict, templates, environ.used)
+        timer.stage('write cache')
+
+    timer.log('Loaded config files')
     return cfg_dict
 
 
-def process_templates(files):
-    env = Environment(loader=FileSystemLoader(searchpath=[os.path.dirname(file) for file in files]),
+def _fileHash(path):
+    with open(path, 'rb') as fh:
+        return hashlib.sha1(fh.read()).hexdigest()
+
+
+def cacheKey(files):
+    """Returns the cache key for the merged config of `files`.
+
+    The key covers the paths and contents of the files, and everything
+    else that is the same for every render, but not the files included
+    from the templates or the environment, those are checked by
+    :func:`readCache`.
+
+    Returns:
+        str : The key, or None if the files can't be read.
+    """
+    try:
+        hashes = [(os.path.realpath(file), _fileHash(file)) for file in files]
+    except (IOError, OSError):
+        return None
+
+    sha = hashlib.sha1()
+    sha.update(repr((hashes, sorted(TEMPLATE_INI.items()),
+                     getattr(hiyapyco, '__version__', None),
+                     sys.version_info[:2])).encode('utf-8'))
+    return sha.hexdigest()
+
+
+def readCache(cache_file):
+    """Read a merged config saved by :func:`writeCache`.
+
+    Returns:
+        dict : The merged config, or None if there is no cached config or
+        the files or environment variables it was rendered from changed.
+    """
+    if not os.path.exists(cache_file):
+        return None
+
+    try:
+        with open(cache_file, 'rb') as fh:
+            data = pickle.load(fh)
+
+        for name, value in data['environ'].items():
+            if os.environ.get(name) != value:
+                LOG.debug("Environment variable %s changed, reloading config", name)
+                return None
+
+        for path, sha in data['templates'].items():
+            if not os.path.exists(path) or _fileHash(path) != sha:
+                LOG.debug("Included file %s changed, reloading config", path)
+                return None
+
+        return data['config']
+
+    except Exception:
+        LOG.warning("Could not read cached config %s", cache_file, exc_info=True)
+        return None
+
+
+def writeCache(cache_file, cfg_dict, templates, environ):
+    """Save a merged config for :func:`readCache`.
+
+    Args:
+        cache_file (str) : The file to save the config in.
+        cfg_dict (dict) : The merged config.
+        templates (list) : Paths of the template files that were loaded.
+        environ (dict) : The environment variables read by the templates.
+    """
+    directory = os.path.dirname(cache_file)
+    temp = None
+    try:
+        data = {'config': cfg_dict,
+                'templates': dict((path, _fileHash(path)) for path in templates),
+                'environ': dict(environ),
+                }
+
+        fd, temp = tempfile.mkstemp(prefix='.tmp-', suffix='.pickle', dir=directory)
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump(data, fh, pickle.HIGHEST_PROTOCOL)
+        os.rename(temp, cache_file)
+
+    except Exception:
+        LOG.warning("Could not cache merged config", exc_info=True)
+        if temp is not None and os.path.exists(temp):
+            os.remove(temp)
+
+
+def process_templates(files, environ=None):
+    """Render the config files as Jinja2 templates.
+
+    Args:
+        files (list) : The config file paths.
+        environ (Mapping) : The environment variables available to the
+            templates, ``os.environ`` by default.
+
+    Returns:
+        tuple : The rendered files, and the paths of all the template
+        files loaded, including those included from other templates.
+    """
+    loader = _RecordingLoader(searchpath=[os.path.dirname(file) for file in files])
+    env = Environment(loader=loader,
                       undefined=LogUndefined,
                       )
 
+    if environ is None:
+        environ = os.environ
+
     expanded_templates = []
     for file in files:
         file_dir, file_name = os.path.split(os.path.realpath(file))
         template = env.get_template(file_name)
         result = template.render({'file': {'path': file, 'dir': file_dir, 'name': file_name},
-                                  'env': os.environ,
-                                  'ini': {'traj': {'coordinates': 'XYZ'},
-                                          'machine': {'name': 'My Machine'},
-                                          'display': {'cycle_time': 100},
-                                          },
+                                  'env': environ,
+                                  'ini': TEMPLATE_INI,
                                   })
 
         expanded_templates.append(result)
 
-    return expanded_templates
+    return expanded_templates, sorted(loader.loaded)
 
 
 def load_config_files_from_env():
@@ -12,6 +12,26 @@ def normalizePath(path, base):
     return os.path.realpath(path)
 
 
+def cacheDir(*subdirs):
+    """Get a per user cache directory, creating it if needed.
+
+    Args:
+        *subdirs : Path components below the QtPyVCP cache directory,
+            which is ``$XDG_CACHE_HOME/qtpyvcp`` (``~/.cache/qtpyvcp``).
+
+    Returns:
+        str : The absolute path of the directory.
+    """
+    base = os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    path = os.path.join(base, 'qtpyvcp', *subdirs)
+    try:
+        os.makedirs(path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    return path
+
+
 def insertPath(env_var, index, file):
     files = os.getenv(env_var)
     if files is None:
@@ -18,7 +18,7 @@
 #   You should have received a copy of the GNU General Public License
 #   along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import linuxcnc, time, threading, subprocess, os, json
+import linuxcnc, hal, time, threading, subprocess, os, json
 from qtpy.QtCore import QObject, QTimer, Signal
 
 # Setup logging
@@ -221,7 +221,7 @@ class HALPin(QObject):
         type_map = {'float': float, 's32': int, 'u32': int, 'bit': bool}
         self.type = type_map.get(pin_type)
         self.settable = pin_direction in ['IN', 'I/O']
-        self.value = self.type(pin_value)
+        self.value = self.convertType(pin_value)
 
         self.log_change = False
 
@@ -279,11 +279,28 @@ class HALPin(QObject):
         return self.log_change
 
     def convertType(self, value):
-        if self.type == bool:
-            return value.lower() in ['true', '1']
+        if isinstance(value, basestring):
+            if self.type == bool:
+                return value.lower() in ['true', '1']
         return self.type(value)
 
 
+class HALMemPin(HALPin):
+    """HALPin that reads and writes its value directly from HAL shared memory,
+        using the ``hal`` python bindings instead of spawning ``halcmd``.
+    """
+
+    def getValue(self):
+        return self.convertType(hal.get_value(self.pin_name))
+
+    def setValue(self, value):
+        if self.settable:
+            if self.type == bool:
+                value = int(value)
+            return hal.set_p(self.pin_name, str(value))
+        raise TypeError("setValue failed, HAL pin '{}' is read only".format(self.pin_name))
+
+
 class HALPoller(QObject):
     """docstring for StatusPoller"""
     def __init__(self):
@@ -391,13 +408,106 @@ class HALPoller(QObject):
             self.status_items[pin_name] = si
         return si
 
+class HALMemPoller(QObject):
+    """HAL pin poller using the ``hal`` python bindings.
+
+    Reads pin values directly from HAL shared memory, and only for the pins
+    that have been requested with `getHALPin`, so there is no process
+    spawning and no parsing of every pin in the system each cycle.
+    """
+
+    TYPE_MAP = {hal.HAL_FLOAT: 'float', hal.HAL_S32: 's32',
+                hal.HAL_U32: 'u32', hal.HAL_BIT: 'bit'}
+    DIR_MAP = {hal.HAL_IN: 'IN', hal.HAL_OUT: 'OUT', hal.HAL_IO: 'I/O'}
+
+    def __init__(self):
+        super(HALMemPoller, self).__init__()
+
+        self.cycle_time = 50
+        self.status_items = {}
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._poll)
+        self.timer.start(self.cycle_time)
+
+    def _poll(self):
+        # s = time.time()
+        for pin_name, hal_pin in self.status_items.items():
+            try:
+                value = hal_pin.convertType(hal.get_value(pin_name))
+            except Exception as e:
+                log.warning("Failed to read HAL pin '{}', removing it from "
+                            "polling".format(pin_name), exc_info=e)
+                del self.status_items[pin_name]
+                continue
+
+            if value != hal_pin.value:
+                hal_pin.update(value)
+        # print time.time() - s
+
+    def getPinInfo(self, pin_name):
+        """Get the type, direction and value of a HAL pin.
+
+        Returns:
+            tuple : (type, direction, value), e.g. ('float', 'IN', 0.0)
+
+        Raises:
+            ValueError : If the pin does not exist.
+        """
+        if not hasattr(hal, 'get_info_pins'):
+            # older LinuxCNC versions, only get the pin info from halcmd
+            # once when the pin is added, the values are still read directly
+            return self._getPinInfoFromHalcmd(pin_name)
+
+        matches = []
+        for info in hal.get_info_pins():
+            if info['NAME'] == pin_name:
+                return (self.TYPE_MAP.get(info['TYPE']),
+                        self.DIR_MAP.get(info['DIRECTION']),
+                        info['VALUE'])
+            elif info['NAME'].startswith(pin_name):
+                matches.append(info['NAME'])
+
+        if len(matches) == 1:  # name is not complete, but only one pin could match
+            raise ValueError("HAL pin red<{}> does not exist, did you mean green<{}>?".format(pin_name, matches[0]))
+        raise ValueError("HAL pin red<{}> does not exist".format(pin_name))
+
+    def _getPinInfoFromHalcmd(self, pin_name):
+        raw = subprocess.check_output(['halcmd', '-s', 'show', 'pin', pin_name]).strip()
+        if len(raw.split('\n')) > 1: # more than one pin name matches
+            raise ValueError("HAL pin red<{}> does not exist".format(pin_name))
+        pin_data = raw.split()
+        if len(pin_data) == 0: # no pin names match
+            raise ValueError("HAL pin red<{}> does not exist".format(pin_name))
+        if pin_name != pin_data[4]: # name is not complete, but only one pin could match
+            raise ValueError("HAL pin red<{}> does not exist, did you mean green<{}>?".format(pin_name, pin_data[4]))
+        return pin_data[1].strip(), pin_data[2].strip(), pin_data[3].strip()
+
+    def getHALPin(self, pin_name):
+        si = self.status_items.get(pin_name)
+        if si is None:
+            pin_type, pin_direction, pin_value = self.getPinInfo(pin_name)
+            log.debug("Adding new HALStatusItem for pin '{}'".format(pin_name))
+            si = HALMemPin(pin_name, pin_type, pin_direction, pin_value)
+            self.status_items[pin_name] = si
+        return si
+
+
 class HALStatus(QObject):
-    """Ensures only one instance of StatusPoller exists per python interpretor.
+    """Ensures only one instance of the HAL poller exists per python interpretor.
+
+    Uses :class:`HALMemPoller` to read pins directly from HAL shared memory
+    if the ``hal`` python bindings support it, otherwise falls back to the
+    ``halcmd`` based :class:`HALPoller`.
     """
     _instance = None
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
-            cls._instance = HALPoller()
+            if hasattr(hal, 'get_value'):
+                cls._instance = HALMemPoller()
+            else:
+                log.warning("hal.get_value() not available, using halcmd to poll HAL pins")
+                cls._instance = HALPoller()
         return cls._instance
 
 
@@ -35,6 +35,8 @@ Application Options:
   --qt-api (pyqt5 | pyqt | pyside2 | pyside)
                        Specify the Qt Python binding to use.
   --perfmon            Monitor and log system performance.
+  --profile-startup    Save a timeline of the startup next to the log file,
+                       as a Chrome trace and a text summary.
   --develop            Development mode. Enables live reloading of QSS styles.
   --command_line_args <args>...
                        Additional args passed to the QtApplication.
@@ -82,6 +84,11 @@ def parse_opts(doc=__doc__, vcp_name='NotSpecified', vcp_cmd='notspecified', vcp
         printSystemInfo()
         sys.exit()
 
+    # start as early as possible so the imports are included
+    if raw_args.get('--profile-startup') or os.getenv('QTPYVCP_PROFILE_STARTUP', '0') != '0':
+        from qtpyvcp.lib import startup_profiler
+        startup_profiler.start()
+
     def convType(val):
         if isinstance(val, basestring):
             if val.lower() in ['true', 'on', 'yes', 'false', 'off', 'no']:
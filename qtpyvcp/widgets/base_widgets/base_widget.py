@@ -12,7 +12,9 @@ import json
 from qtpy.QtCore import Property, Slot
 from qtpy.QtWidgets import QPushButton
 
+from qtpyvcp.lib import startup_profiler
 from qtpyvcp.plugins import getPlugin
+from qtpyvcp.widgets.base_widgets.rule_engine import Rule, RuleChannels, getRuleEngine
 from qtpyvcp.utilities.logger import getLogger
 
 LOG = getLogger(__name__)
@@ -119,13 +121,18 @@ class VCPBaseWidget(VCPPrimitiveWidget):
     @rules.setter
     def rules(self, rules):
         self._rules = rules or '[]'
-        self.registerRules()
+        with startup_profiler.span(self.objectName() or type(self).__name__, 'rules'):
+            self.registerRules()
 
     def registerRules(self):
+        engine = getRuleEngine()
+        engine.removeRules(self)
+
         rules = json.loads(self._rules)
         for rule in rules:
             # print rule
             ch = ChanList()
+            urls = []
             triggers = []
             for chan in rule['channels']:
 
@@ -133,11 +140,15 @@ class VCPBaseWidget(VCPPrimitiveWidget):
                     url = chan['url'].strip()
                     protocol, sep, item = url.partition(':')
                     chan_obj, chan_exp = getPlugin(protocol).getChannel(item)
+                    if chan_obj is None:
+                        raise ValueError("No such channel: {}".format(url))
 
                     ch.append(chan_exp)
+                    urls.append(url)
+                    engine.addChannel(url, chan_exp)
 
                     if chan.get('trigger', False):
-                        triggers.append(chan_obj.notify)
+                        triggers.append(chan_obj)
 
                 except Exception:
                     LOG.exception("Error evaluating rule: {}"
@@ -151,20 +162,15 @@ class VCPBaseWidget(VCPPrimitiveWidget):
                 self._data_channels = ch
                 continue
 
-            eval_env = {'ch': ch, 'widget': self}
-            eval_exp = 'lambda: widget.{}({})'.format(
-                            prop[0], rule['expression'].encode('utf-8'))
-            exp = eval(eval_exp, eval_env)
-
-            # initial call to update
             try:
-                exp()
-            except:
-                LOG.exception('Error calling rules expression:')
+                compiled = Rule(rule.get('name', ''), self, prop[0],
+                                rule['expression'].encode('utf-8'),
+                                RuleChannels(engine, urls))
+            except Exception:
+                LOG.exception('Error compiling rules expression:')
                 continue
 
-            for trigger in triggers:
-                trigger(exp)
+            engine.addRule(compiled, triggers)
 
 
 class VCPWidget(VCPBaseWidget):
@@ -0,0 +1,167 @@
+"""
+Rule Engine
+-----------
+
+Evaluates the widget rules set up in QtDesigner.
+
+Each rule expression is compiled once, and the engine keeps a dependency
+graph from the trigger channels to the rules that use them. The trigger
+channels are subscribed with :func:`~qtpyvcp.plugins.notifyCoalesced`, so
+the changes of a status cycle arrive together when the cycle is flushed,
+and each affected rule is evaluated once instead of once for every trigger
+channel that changed.
+
+Channel values are read at most once per evaluation pass, however many
+rules use them, and a rule only calls the widget setter when the result
+of its expression changes.
+"""
+
+from collections import OrderedDict
+
+from qtpyvcp.plugins import notifyCoalesced
+from qtpyvcp.utilities.logger import getLogger
+
+LOG = getLogger(__name__)
+
+# result of a rule which has not been applied yet
+_NOT_APPLIED = object()
+
+
+class RuleChannels(object):
+    """The ``ch`` list of a rule expression.
+
+    Indexing returns the current value of the channel, read through the
+    engine so each channel is only read once per evaluation pass.
+    """
+    __slots__ = ('engine', 'urls')
+
+    def __init__(self, engine, urls):
+        self.engine = engine
+        self.urls = urls
+
+    def __getitem__(self, index):
+        return self.engine.channelValue(self.urls[index])
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __iter__(self):
+        return (self.engine.channelValue(url) for url in self.urls)
+
+
+class Rule(object):
+    """A compiled widget rule.
+
+    Args:
+        name (str) : The rule name, used in error messages.
+        widget (QWidget) : The widget the rule applies to.
+        setter (str) : Name of the widget method the result is passed to.
+        expression (str) : The rule expression.
+        ch (RuleChannels) : The channels used in the expression.
+    """
+    __slots__ = ('name', 'widget', 'setter', 'code', 'env', 'value')
+
+    def __init__(self, name, widget, setter, expression, ch):
+        self.name = name
+        self.widget = widget
+        self.setter = getattr(widget, setter)
+        self.code = compile(expression, '<rule {}>'.format(name), 'eval')
+        self.env = {'ch': ch, 'widget': widget}
+        self.value = _NOT_APPLIED
+
+    def evaluate(self):
+        """Evaluate the expression and apply the result if it changed."""
+        value = eval(self.code, self.env)
+        if self.value is _NOT_APPLIED or value != self.value:
+            self.value = value
+            self.setter(value)
+
+
+class RuleEngine(object):
+    """Evaluates rules when their trigger channels change."""
+
+    def __init__(self):
+        # channel URL: function returning the channel value
+        self._getters = {}
+        # trigger channel: rules to evaluate when it changes
+        self._graph = {}
+        # channel values read in the current evaluation pass
+        self._values = None
+
+    def addChannel(self, url, chan_exp):
+        """Register the function returning the value of the channel at `url`."""
+        self._getters.setdefault(url, chan_exp)
+
+    def channelValue(self, url):
+        if self._values is None:
+            return self._getters[url]()
+        try:
+            return self._values[url]
+        except KeyError:
+            value = self._values[url] = self._getters[url]()
+            return value
+
+    def addRule(self, rule, triggers):
+        """Add a rule and evaluate it.
+
+        Args:
+            rule (Rule) : The rule.
+            triggers (list) : The channels whose changes trigger the rule.
+
+        Returns:
+            bool : False if the rule could not be evaluated, in which case
+            it is not added.
+        """
+        try:
+            rule.evaluate()
+        except Exception:
+            LOG.exception('Error calling rules expression: {}'.format(rule.name))
+            return False
+
+        for chan in triggers:
+            rules = self._graph.get(chan)
+            if rules is None:
+                try:
+                    notifyCoalesced([chan], self._onChanges, batch=True)
+                except Exception:
+                    LOG.exception('Error subscribing to trigger channel {} of rule: {}'
+                                  .format(chan, rule.name))
+                    continue
+                rules = self._graph[chan] = []
+            if rule not in rules:
+                rules.append(rule)
+
+        return True
+
+    def removeRules(self, widget):
+        """Remove all the rules of `widget`."""
+        for chan, rules in self._graph.items():
+            rules[:] = [rule for rule in rules if rule.widget is not widget]
+
+    def _onChanges(self, changes):
+        """Evaluate the rules triggered by a cycle of channel changes."""
+        dirty = OrderedDict()
+        for chan in changes:
+            for rule in self._graph.get(chan, ()):
+                dirty[rule] = None
+
+        self._values = {}
+        try:
+            for rule in dirty:
+                try:
+                    rule.evaluate()
+                except Exception:
+                    LOG.exception('Error calling rules expression: {}'.format(rule.name))
+        finally:
+            self._values = None
+
+
+_ENGINE = None
+
+
+def getRuleEngine():
+    """Returns the rule engine shared by all the widgets."""
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = RuleEngine()
+    return _ENGINE
@@ -15,10 +15,10 @@ def getDialog(name):
     Returns:
         A dialog instance, or None.
     """
-    try:
-        return DIALOGS[name]
-    except KeyError:
+    if name not in DIALOGS:
         LOG.error("The requested dialog '{}' was not found.".format(name))
+        return None
+    return DIALOGS[name]
 
 
 def showDialog(name):
@@ -33,7 +33,7 @@ from qtpyvcp.utilities import logger
 
 LOG = logger.getLogger(__name__)
 
-from qtpyvcp.plugins import getPlugin
+from qtpyvcp.plugins import getPlugin, notifyCoalesced
 
 STATUS = getPlugin('status')
 
@@ -58,6 +58,7 @@ class GcodeBackplot(QBackPlot):
         self.program_alpha = True
         self.grid_size = 1
         self._reload_filename = None
+        self._reload_distance = None
 
         # Add loading progress bar and abort button
         self.progressBar = QProgressBar(visible=False)
@@ -74,16 +75,21 @@ class GcodeBackplot(QBackPlot):
 
         self.abortButton.clicked.connect(self.abort)
 
-        STATUS.actual_position.onValueChanged(self.update)
-        STATUS.joint_actual_position.onValueChanged(self.update)
-        STATUS.homed.onValueChanged(self.update)
-        STATUS.limit.onValueChanged(self.update)
-        STATUS.tool_in_spindle.onValueChanged(self.update)
-        STATUS.motion_mode.onValueChanged(self.update)
-        STATUS.current_vel.onValueChanged(self.update)
-
-        STATUS.g5x_offset.onValueChanged(self.reloadBackplot)
-        STATUS.g92_offset.onValueChanged(self.reloadBackplot)
+        # repaint at most once per frame
+        notifyCoalesced([STATUS.actual_position,
+                         STATUS.joint_actual_position,
+                         STATUS.homed,
+                         STATUS.limit,
+                         STATUS.tool_in_spindle,
+                         STATUS.motion_mode,
+                         STATUS.current_vel,
+                         # the program is moved to follow offset changes
+                         STATUS.g5x_offset,
+                         STATUS.g92_offset],
+                        self.frame_scheduler.requestFrame)
+
+        # only redraw occasionally when nothing is moving
+        STATUS.current_vel.notify(lambda vel: self.frame_scheduler.setIdle(vel == 0))
 
         # Connect status signals
         STATUS.file.notify(self.loadBackplot)
@@ -93,6 +99,7 @@ class GcodeBackplot(QBackPlot):
     def loadBackplot(self, fname):
         LOG.debug('load the display: {}'.format(fname.encode('utf-8')))
         self._reload_filename = fname
+        self._reload_distance = None
         self.load(fname)
 
     @Slot()
@@ -101,10 +108,10 @@ class GcodeBackplot(QBackPlot):
 
     def _reloadBackplot(self):
         LOG.debug('reload the display: {}'.format(self._reload_filename))
-        dist = self.get_zoom_distance()
+        # restored once the reloaded preview is ready
+        self._reload_distance = self.get_zoom_distance()
         try:
             self.load(self._reload_filename)
-            self.set_zoom_distance(dist)
         except:
             LOG.warning("Problem reloading backplot file: {}".format(self._reload_filename), exc_info=True)
 
@@ -118,13 +125,15 @@ class GcodeBackplot(QBackPlot):
         self.start = time.time()
 
     def report_progress_percentage(self, percentage):
-        QApplication.processEvents()
         self.progressBar.setValue(percentage)
 
     def report_loading_finished(self):
-        print time.time() - self.start
+        LOG.debug('Backplot loaded in {:.3f} sec'.format(time.time() - self.start))
         self.progressBar.hide()
         self.abortButton.hide()
+        if self._reload_distance is not None:
+            self.set_zoom_distance(self._reload_distance)
+            self._reload_distance = None
 
     # overriding functions
     def report_gcode_error(self, result, seq, filename):
@@ -262,6 +271,22 @@ class GcodeBackplot(QBackPlot):
 
     backgroundColor = Property(QColor, getBackgroundColor, setBackgroundColor)
 
+    def setMaxFps(self, fps):
+        self.frame_scheduler.max_fps = fps
+
+    def getMaxFps(self):
+        return self.frame_scheduler.max_fps
+
+    maxFps = Property(float, getMaxFps, setMaxFps)
+
+    def setIdleFps(self, fps):
+        self.frame_scheduler.idle_fps = fps
+
+    def getIdleFps(self):
+        return self.frame_scheduler.idle_fps
+
+    idleFps = Property(float, getIdleFps, setIdleFps)
+
 
 # For testing purposes, include code to allow a widget to be created and shown
 # if this file is run.
@@ -0,0 +1,214 @@
+"""
+GL Buffers
+----------
+
+Vertex buffer objects for the OpenGL backplot.
+
+The program geometry is uploaded to the GPU once when a program is loaded
+and drawn with a single ``glDrawArrays`` call per buffer, so redraws cost
+the same regardless of the program size and moving the program (e.g. when
+a work offset changes) only needs a new modelview matrix.
+
+Big programs are drawn from :class:`LodVertexBuffer`, which holds several
+levels of detail (see :mod:`qtpyvcp.lib.path_lod`) split into tiles. Each
+frame the coarsest level that still looks the same at the current zoom is
+drawn, and tiles outside the view are skipped.
+
+Only OpenGL 1.5 fixed function calls are used, so the buffers also work
+with software rendering such as Mesa llvmpipe.
+"""
+
+import numpy as np
+
+from OpenGL import GL
+
+from qtpyvcp.lib.path_lod import PathLOD, tileSegments
+from qtpyvcp.utilities import logger
+
+LOG = logger.getLogger(__name__)
+
+
+def vbo_supported():
+    """Check if vertex buffer objects can be used in the current GL context."""
+    try:
+        return bool(GL.glGenBuffers) and bool(GL.glBindBuffer)
+    except Exception:
+        LOG.debug("Vertex buffer objects not supported", exc_info=True)
+        return False
+
+
+class VertexBuffer(object):
+    """Vertices stored in a vertex buffer object.
+
+    Args:
+        vertices (numpy.ndarray) : N x 3 float32 array of vertices.
+        mode (int) : The GL primitive the vertices describe.
+    """
+
+    def __init__(self, vertices, mode=GL.GL_LINES):
+        self.mode = mode
+        self.count = len(vertices)
+        self.vbo = None
+
+        if self.count:
+            self.vbo = GL.glGenBuffers(1)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vbo)
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL.GL_STATIC_DRAW)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def draw(self, ranges=None):
+        """Draw the vertices with the current color and matrices.
+
+        Args:
+            ranges (list) : Optional (first, count) vertex ranges to draw,
+                all the vertices are drawn if not given.
+        """
+        if not self.count:
+            return
+
+        if ranges is None:
+            ranges = [(0, self.count)]
+
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vbo)
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glVertexPointer(3, GL.GL_FLOAT, 0, None)
+        for first, count in ranges:
+            GL.glDrawArrays(self.mode, int(first), int(count))
+        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        """Free the buffer, must be called with the GL context current."""
+        if self.vbo is not None:
+            GL.glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+            self.count = 0
+
+
+def _mergeRanges(ranges):
+    # join (first, count) ranges which follow on from each other
+    if len(ranges) < 2:
+        return ranges
+    ends = ranges[:, 0] + ranges[:, 1]
+    starts = np.flatnonzero(np.concatenate(([True], ranges[1:, 0] != ends[:-1])))
+    last = np.append(starts[1:], len(ranges)) - 1
+    return np.column_stack((ranges[starts, 0], ends[last] - ranges[starts, 0]))
+
+
+class LodGeometry(object):
+    """GL_LINES vertices split into levels of detail and tiles.
+
+    This only prepares the vertices, so it can be done outside of the GL
+    thread, see :class:`LodVertexBuffer`. Programs with fewer than
+    `min_segments` segments are kept as they are in a single tile.
+
+    Args:
+        vertices (numpy.ndarray) : 2N x 3 float32 array of GL_LINES vertices.
+        min_segments (int) : The number of segments worth simplifying.
+        tiles (int) : The number of tiles along X and Y of big programs.
+    """
+
+    def __init__(self, vertices, min_segments=100000, tiles=16):
+        starts = vertices[0::2]
+        ends = vertices[1::2]
+        if len(starts) <= min_segments:
+            tiles = 1
+
+        self.levels = []
+        self.center = self.size = None
+        if len(starts):
+            lo = np.minimum(starts.min(0), ends.min(0))
+            hi = np.maximum(starts.max(0), ends.max(0))
+            self.center = (lo + hi) * .5
+            self.size = max(np.max(hi - lo) * .5, 1e-9)
+
+        for tolerance, starts, ends, tags in PathLOD(starts, ends, min_segments=min_segments).levels:
+            order, ranges, bounds = tileSegments(starts, ends, tiles)
+            vertices = np.empty((len(order) * 2, 3), np.float32)
+            vertices[0::2] = starts[order]
+            vertices[1::2] = ends[order]
+            # ranges of vertices rather than segments
+            self.levels.append((tolerance, vertices, ranges * 2, bounds))
+
+
+class LodVertexBuffer(object):
+    """Vertex buffers drawn at the level of detail matching the zoom.
+
+    Args:
+        geometry (LodGeometry) : The vertices to upload.
+    """
+
+    # max simplification error, in pixels
+    PIXELS = 1.0
+
+    def __init__(self, geometry):
+        self.center = geometry.center
+        self.size = geometry.size
+        self.levels = [(tolerance, VertexBuffer(vertices), ranges, bounds)
+                       for tolerance, vertices, ranges, bounds in geometry.levels]
+
+        if len(self.levels) > 1:
+            LOG.debug("Backplot levels of detail: %s",
+                      ', '.join(str(level[1].count / 2) for level in self.levels))
+
+    def draw(self):
+        """Draw the vertices with the current color and matrices."""
+        if not self.levels:
+            return
+
+        if len(self.levels) == 1 and len(self.levels[0][2]) == 1:
+            self.levels[0][1].draw()
+            return
+
+        modelview = GL.glGetDoublev(GL.GL_MODELVIEW_MATRIX)
+        projection = GL.glGetDoublev(GL.GL_PROJECTION_MATRIX)
+        viewport = GL.glGetIntegerv(GL.GL_VIEWPORT)
+        transform = np.dot(modelview, projection)
+
+        pixel_size = self.pixelSize(transform, viewport)
+        level = 0
+        for i, (tolerance, buffer, ranges, bounds) in enumerate(self.levels):
+            if tolerance <= pixel_size * self.PIXELS:
+                level = i
+
+        tolerance, buffer, ranges, bounds = self.levels[level]
+        visible = self.visibleTiles(bounds, transform)
+        buffer.draw(_mergeRanges(ranges[visible]))
+
+    def pixelSize(self, transform, viewport):
+        """The approximate size of a screen pixel near the middle of the path."""
+        points = np.ones((4, 4))
+        points[:, :3] = self.center
+        points[1:, :3] += np.eye(3) * self.size
+
+        clip = np.dot(points, transform)
+        if np.any(clip[:, 3] <= 0):
+            return 0.0
+
+        pixels = clip[:, :2] / clip[:, 3:] * (np.asarray(viewport[2:4]) * .5)
+        span = np.max(np.abs(pixels[1:] - pixels[0]))
+        return self.size / span if span > 0 else 0.0
+
+    def visibleTiles(self, bounds, transform):
+        """Returns a mask of the tiles which may be in view."""
+        corners = np.ones((len(bounds), 8, 4))
+        for i in range(8):
+            corners[:, i, 0] = bounds[:, i & 1, 0]
+            corners[:, i, 1] = bounds[:, (i >> 1) & 1, 1]
+            corners[:, i, 2] = bounds[:, (i >> 2) & 1, 2]
+
+        clip = np.dot(corners, transform)
+        w = clip[..., 3]
+        behind = np.any(w <= 0, axis=1)
+
+        ndc = clip[..., :2] / np.where(w > 0, w, 1)[..., None]
+        lo = ndc.min(1)
+        hi = ndc.max(1)
+        inside = np.all((lo <= 1) & (hi >= -1), axis=1)
+        return behind | inside
+
+    def delete(self):
+        """Free the buffers, must be called with the GL context current."""
+        for level in self.levels:
+            level[1].delete()
+        self.levels = []
@@ -17,6 +17,9 @@
 
 from rs274 import Translated, ArcsToSegmentsMixin
 from minigl import *
+from OpenGL import GL
+from itertools import izip
+import numpy as np
 import math
 # import glnav # Does not seems to be needed
 import hershey
@@ -26,6 +29,9 @@ import gcode
 import os
 import re
 
+from qtpyvcp.lib.segment_index import SegmentIndex
+from qtpyvcp.widgets.display_widgets.gcode_backplot.glbuffers import LodGeometry, LodVertexBuffer, vbo_supported
+
 def minmax(*args):
     return min(*args), max(*args)
 
@@ -76,15 +82,207 @@ limiticon = array.array('B',
          255, 255,  176, 0,  152, 0,  140, 0,  134, 0,  128, 0,    0,   0,
            0,   0,    0, 0])
 
+# segment types
+TRAVERSE, FEED, ARCFEED = range(3)
+
+class GeometryBuffer(object):
+    """Columnar store for the toolpath segments of a program.
+
+    While the program is interpreted the segments are appended to flat
+    ``array.array`` columns, about 90 bytes per segment instead of the
+    several hundred bytes taken by a tuple of lists. Once complete the
+    columns are read as numpy arrays which share the same memory.
+
+    Columns:
+        lineno (int32) : The program line number of each segment.
+        kind (uint8) : The segment type, TRAVERSE, FEED or ARCFEED.
+        start, end (float32, N x 9) : The XYZABCUVW start and end points.
+        feedrate (float32) : The feedrate, zero for traverses.
+        tlo (float32, N x 3) : The XYZ tool length offset.
+    """
+    COLUMNS = ('lineno', 'kind', 'start', 'end', 'feedrate', 'tlo')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._lineno = array.array('i')
+        self._kind = array.array('B')
+        self._start = array.array('f')
+        self._end = array.array('f')
+        self._feedrate = array.array('f')
+        self._tlo = array.array('f')
+        self._counts = [0, 0, 0]
+        self._columns = None
+        self._indices = {}
+
+    def __len__(self):
+        return len(self._lineno)
+
+    def count(self, kind):
+        return self._counts[kind]
+
+    def append(self, kind, lineno, start, end, feedrate, tlo):
+        if self._columns is not None:
+            self._thaw()
+        self._lineno.append(lineno)
+        self._kind.append(kind)
+        self._start.extend(start)
+        self._end.extend(end)
+        self._feedrate.append(feedrate)
+        self._tlo.extend(tlo)
+        self._counts[kind] += 1
+
+    def _thaw(self):
+        # numpy views don't lock the arrays, so never resize an array that
+        # has been viewed, copy it and leave the old one to the views
+        for name, typecode in zip(self.COLUMNS, 'iBffff'):
+            column = getattr(self, '_' + name)
+            if isinstance(column, np.ndarray):
+                column = column.ravel()
+            setattr(self, '_' + name, array.array(typecode, column))
+        self._columns = None
+        self._indices = {}
+
+    def load(self, columns):
+        """Replace the contents with numpy arrays, e.g. from the preview cache.
+
+        Args:
+            columns (dict) : The arrays, keyed by column name.
+        """
+        self.clear()
+        for name in self.COLUMNS:
+            setattr(self, '_' + name, columns[name])
+        self._columns = tuple(columns[name] for name in self.COLUMNS)
+        self._counts = np.bincount(self.kind, minlength=3)[:3].tolist()
+
+    def _column(self, column, dtype, width=None):
+        if len(column):
+            data = np.frombuffer(column, dtype)
+        else:
+            data = np.empty(0, dtype)
+        if width:
+            data = data.reshape(-1, width)
+        return data
+
+    def columns(self):
+        if self._columns is None:
+            self._columns = (self._column(self._lineno, np.int32),
+                             self._column(self._kind, np.uint8),
+                             self._column(self._start, np.float32, 9),
+                             self._column(self._end, np.float32, 9),
+                             self._column(self._feedrate, np.float32),
+                             self._column(self._tlo, np.float32, 3))
+        return self._columns
+
+    lineno = property(lambda self: self.columns()[0])
+    kind = property(lambda self: self.columns()[1])
+    start = property(lambda self: self.columns()[2])
+    end = property(lambda self: self.columns()[3])
+    feedrate = property(lambda self: self.columns()[4])
+    tlo = property(lambda self: self.columns()[5])
+
+    def indices(self, kind):
+        """Returns the indices of the segments of type `kind`."""
+        if kind not in self._indices:
+            self._indices[kind] = np.flatnonzero(self.kind == kind)
+        return self._indices[kind]
+
+    def line_indices(self, lineno):
+        """Returns the indices of the segments from program line `lineno`."""
+        lines, order = self.line_index()
+        first, last = np.searchsorted(lines, [lineno, lineno + 1])
+        # the sort is stable, so the segments are still in program order
+        return order[first:last]
+
+    def line_index(self):
+        """Returns the sorted line numbers and the segment order that sorts them.
+
+        Built once, so looking up the segments of a line is a binary search
+        instead of a scan of the whole program.
+        """
+        if 'lines' not in self._indices:
+            order = np.argsort(self.lineno, kind='mergesort')
+            self._indices['lines'] = (self.lineno[order], order)
+        return self._indices['lines']
+
+    def tuples(self, index, with_feedrate=True):
+        """Returns the segments at `index` in the legacy tuple format."""
+        columns = [self.lineno[index].tolist(),
+                   self.start[index].tolist(),
+                   self.end[index].tolist()]
+        if with_feedrate:
+            columns.append(self.feedrate[index].tolist())
+        columns.append(self.tlo[index].tolist())
+        return zip(*columns)
+
+
+class SegmentList(object):
+    """Read only view of the segments of one type in a GeometryBuffer.
+
+    Iterating gives the legacy ``(lineno, start, end, [feedrate,] tlo)``
+    tuples, which is slow for large programs, so it is only used where
+    the segments are passed to the ``linuxcnc`` C drawing functions.
+    """
+    def __init__(self, buffer, kind):
+        self.buffer = buffer
+        self.kind = kind
+
+    def __len__(self):
+        return self.buffer.count(self.kind)
+
+    @property
+    def indices(self):
+        return self.buffer.indices(self.kind)
+
+    def __iter__(self):
+        return iter(self.buffer.tuples(self.indices, self.kind != TRAVERSE))
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.buffer.tuples(self.indices[item], self.kind != TRAVERSE)
+        return self.buffer.tuples(self.indices[[item]], self.kind != TRAVERSE)[0]
+
+
+_projections = {}
+
+def geometry_projection(geometry):
+    """Get the 9 x 3 matrix that maps XYZABCUVW points to display XYZ.
+
+    This matches what ``linuxcnc.line9`` does with the geometry string for
+    the linear axes. Returns None if the geometry has rotary axes, in
+    which case the points can not be mapped with a matrix.
+    """
+    if geometry not in _projections:
+        proj = np.zeros((9, 3), np.float32)
+        sign = 1
+        for letter in geometry:
+            if letter == '-':
+                sign = -1
+                continue
+            if letter in 'ABC':
+                proj = None
+                break
+            if letter not in 'XYZUVW':
+                continue
+            axis = 'XYZABCUVW'.index(letter)
+            proj[axis, axis % 3] += sign
+            sign = 1
+        _projections[geometry] = proj
+    return _projections[geometry]
+
+
 class GLCanon(Translated, ArcsToSegmentsMixin):
     lineno = -1
     def __init__(self, colors, geometry, is_foam=0):
+        self.segments = GeometryBuffer()
+        self.segments_append = self.segments.append
         # traverse list - [line number, [start position], [end position], [tlo x, tlo y, tlo z]]
-        self.traverse = []; self.traverse_append = self.traverse.append
+        self.traverse = SegmentList(self.segments, TRAVERSE)
         # feed list - [line number, [start position], [end position], feedrate, [tlo x, tlo y, tlo z]]
-        self.feed = []; self.feed_append = self.feed.append
+        self.feed = SegmentList(self.segments, FEED)
         # arcfeed list - [line number, [start position], [end position], feedrate, [tlo x, tlo y, tlo z]]
-        self.arcfeed = []; self.arcfeed_append = self.arcfeed.append
+        self.arcfeed = SegmentList(self.segments, ARCFEED)
         # dwell list - [line number, color, pos x, pos y, pos z, plane]
         self.dwells = []; self.dwells_append = self.dwells.append
         self.choice = None
@@ -126,6 +324,12 @@ class GLCanon(Translated, ArcsToSegmentsMixin):
         self.notify = 0
         self.notify_message = ""
         self.highlight_line = None
+        # XYZ work offset (g5x + g92) the program was interpreted with
+        self.work_offset = None
+        # levels of detail waiting to be uploaded, see prepare_buffers
+        self.lod_geometry = None
+        # spatial index of the segments, see pick_index
+        self._pick_index = None
 
     def comment(self, arg):
         if arg.startswith("AXIS,"):
@@ -165,7 +369,151 @@ class GLCanon(Translated, ArcsToSegmentsMixin):
         self.lineno = self.state.sequence_number
 
     def draw_lines(self, lines, for_selection, j=0, geometry=None):
-        return linuxcnc.draw_lines(geometry or self.geometry, lines, for_selection)
+        geometry = geometry or self.geometry
+        proj = geometry_projection(geometry)
+        if for_selection or proj is None or not isinstance(lines, SegmentList):
+            return linuxcnc.draw_lines(geometry, list(lines), for_selection)
+
+        vertices = self.vertices(lines.kind, geometry)
+        if not len(vertices):
+            return
+
+        # with no rotary axes in the geometry every segment is a straight
+        # line, so draw them all with one call straight from the buffer
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glVertexPointer(3, GL.GL_FLOAT, 0, vertices)
+        GL.glDrawArrays(GL.GL_LINES, 0, len(vertices))
+        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+
+    def vertices(self, kind, geometry=None):
+        """Get the GL_LINES vertices for the segments of type `kind`.
+
+        Returns None if the geometry has rotary axes, since the segments
+        are then curves which can not be mapped from the start and end.
+        """
+        proj = geometry_projection(geometry or self.geometry)
+        if proj is None:
+            return None
+        index = self.segments.indices(kind)
+        vertices = np.empty((len(index) * 2, 3), np.float32)
+        vertices[0::2] = self.segments.start[index].dot(proj)
+        vertices[1::2] = self.segments.end[index].dot(proj)
+        return vertices
+
+    def make_buffers(self):
+        """Upload the program geometry to vertex buffers.
+
+        Returns:
+            dict : VertexBuffers keyed by (segment type, geometry), or None
+                if the program can't be drawn from vertex buffers.
+        """
+        if geometry_projection(self.geometry) is None or not vbo_supported():
+            return None
+        lod_geometry = self.prepare_buffers()
+        self.lod_geometry = None
+        return dict((key, LodVertexBuffer(geometry))
+                    for key, geometry in lod_geometry.items())
+
+    def prepare_buffers(self):
+        """Build the levels of detail of the program for :meth:`make_buffers`.
+
+        This is slow for big programs, so it is done in the loader thread
+        when possible, the result is kept until the buffers are made.
+        """
+        if self.lod_geometry is None and geometry_projection(self.geometry) is not None:
+            geometries = ('XY', 'UV') if self.is_foam else (self.geometry,)
+            self.lod_geometry = dict(((kind, geometry), LodGeometry(self.vertices(kind, geometry)))
+                                     for kind in (TRAVERSE, FEED, ARCFEED)
+                                     for geometry in geometries)
+        return self.lod_geometry
+
+    def pick_index(self):
+        """Get the spatial index of the program segments used for picking.
+
+        Returns:
+            SegmentIndex : The index, or None if the program can't be picked
+                with it, for foam and rotary geometries.
+        """
+        proj = geometry_projection(self.geometry)
+        if proj is None or self.is_foam:
+            return None
+        if self._pick_index is None:
+            self._pick_index = SegmentIndex(self.segments.start.dot(proj),
+                                            self.segments.end.dot(proj))
+        return self._pick_index
+
+    def build_indexes(self):
+        """Build the line number and picking indexes.
+
+        Like :meth:`prepare_buffers` this is done in the loader thread, so
+        the first pick or highlight of a big program doesn't stall the GUI.
+        """
+        self.segments.line_index()
+        self.pick_index()
+
+    def pick(self, origin, direction, radius, traverses=True):
+        """Find the program line closest to the start of a ray.
+
+        Args:
+            origin (sequence) : The XYZ start of the ray.
+            direction (sequence) : The XYZ direction of the ray.
+            radius (float) : The pick distance.
+            traverses (bool) : Whether traverses can be picked.
+
+        Returns:
+            int : The line number, or None if nothing was hit.
+        """
+        origin = np.asarray(origin, np.float64)
+        direction = np.asarray(direction, np.float64)
+        direction = direction / math.sqrt(np.dot(direction, direction))
+
+        mask = None
+        if not traverses:
+            mask = self.segments.kind != TRAVERSE
+
+        best = None
+        hits, depths = self.pick_index().pickRay(origin, direction, radius, mask)
+        if len(hits):
+            best = depths[0], int(self.segments.lineno[hits[0]])
+
+        for dwell in self.dwells:
+            offset = np.subtract(dwell[2:5], origin)
+            depth = max(np.dot(offset, direction), 0)
+            miss = offset - direction * depth
+            if np.dot(miss, miss) <= radius * radius and (best is None or depth < best[0]):
+                best = depth, dwell[0]
+
+        return best and best[1]
+
+    def buffered_lines(self, color, buffers, kind):
+        if self.is_foam:
+            self.color_with_alpha(color + "_xy")
+            glPushMatrix()
+            glTranslatef(0, 0, self.foam_z)
+            buffers[kind, 'XY'].draw()
+            glPopMatrix()
+            self.color_with_alpha(color + "_uv")
+            glPushMatrix()
+            glTranslatef(0, 0, self.foam_w)
+            buffers[kind, 'UV'].draw()
+            glPopMatrix()
+        else:
+            self.color_with_alpha(color)
+            buffers[kind, self.geometry].draw()
+
+    def draw_buffers(self, buffers, no_traverse=True):
+        if not no_traverse:
+            glEnable(GL_LINE_STIPPLE)
+            self.buffered_lines('traverse', buffers, TRAVERSE)
+            glDisable(GL_LINE_STIPPLE)
+        else:
+            self.buffered_lines('straight_feed', buffers, FEED)
+            self.buffered_lines('arc_feed', buffers, ARCFEED)
+
+            # dwells are few, so are not worth buffering
+            glLineWidth(2)
+            self.draw_dwells(self.dwells, self.colors.get('dwell_alpha', 1/3.), 0)
+            glLineWidth(1)
 
     def colored_lines(self, color, lines, for_selection, j=0):
         if self.is_foam:
@@ -189,8 +537,36 @@ class GLCanon(Translated, ArcsToSegmentsMixin):
     def draw_dwells(self, dwells, alpha, for_selection, j0=0):
         return linuxcnc.draw_dwells(self.geometry, dwells, alpha, for_selection, self.is_lathe)
 
+    def get_cache_data(self):
+        """Returns the preview geometry as ``(arrays, meta)`` for the preview cache."""
+        arrays = dict(zip(GeometryBuffer.COLUMNS, self.segments.columns()))
+        meta = dict(dwells=self.dwells,
+                    extents=[self.min_extents, self.max_extents,
+                             self.min_extents_notool, self.max_extents_notool])
+        return arrays, meta
+
+    def set_cache_data(self, arrays, meta):
+        """Restore the preview geometry saved with :meth:`get_cache_data`."""
+        self.segments.load(arrays)
+        self._pick_index = None
+        self.dwells[:] = [(dwell[0], tuple(dwell[1])) + tuple(dwell[2:])
+                          for dwell in meta['dwells']]
+        self.min_extents, self.max_extents, \
+            self.min_extents_notool, self.max_extents_notool = meta['extents']
+
     def calc_extents(self):
-        self.min_extents, self.max_extents, self.min_extents_notool, self.max_extents_notool = gcode.calc_extents(self.arcfeed, self.feed, self.traverse)
+        segments = self.segments
+        if len(segments):
+            start = segments.start[:, :3]
+            end = segments.end[:, :3]
+            tlo = segments.tlo
+            self.min_extents = np.minimum(start.min(0), end.min(0)).tolist()
+            self.max_extents = np.maximum(start.max(0), end.max(0)).tolist()
+            self.min_extents_notool = np.minimum((start + tlo).min(0), (end + tlo).min(0)).tolist()
+            self.max_extents_notool = np.maximum((start + tlo).max(0), (end + tlo).max(0)).tolist()
+        else:
+            self.min_extents = self.min_extents_notool = [9e99, 9e99, 9e99]
+            self.max_extents = self.max_extents_notool = [-9e99, -9e99, -9e99]
         if self.is_foam:
             min_z = min(self.foam_z, self.foam_w)
             max_z = max(self.foam_z, self.foam_w)
@@ -226,7 +602,7 @@ class GLCanon(Translated, ArcsToSegmentsMixin):
         if self.suppress > 0: return
         l = self.rotate_and_translate(x,y,z,a,b,c,u,v,w)
         if not self.first_move:
-                self.traverse_append((self.lineno, self.lo, l, [self.xo, self.yo, self.zo]))
+                self.segments_append(TRAVERSE, self.lineno, self.lo, l, 0, (self.xo, self.yo, self.zo))
         self.lo = l
 
     def rigid_tap(self, x, y, z):
@@ -235,9 +611,9 @@ class GLCanon(Translated, ArcsToSegmentsMixin):
         l = self.rotate_and_translate(x,y,z,0,0,0,0,0,0)[:3]
         l += [self.lo[3], self.lo[4], self.lo[5],
                self.lo[6], self.lo[7], self.lo[8]]
-        self.feed_append((self.lineno, self.lo, l, self.feedrate, [self.xo, self.yo, self.zo]))
+        self.segments_append(FEED, self.lineno, self.lo, l, self.feedrate, (self.xo, self.yo, self.zo))
         # self.dwells_append((self.lineno, self.colors['dwell'], x + self.offset_x, y + self.offset_y, z + self.offset_z, 0))
-        self.feed_append((self.lineno, l, self.lo, self.feedrate, [self.xo, self.yo, self.zo]))
+        self.segments_append(FEED, self.lineno, l, self.lo, self.feedrate, (self.xo, self.yo, self.zo))
 
     def arc_feed(self, *args):
         if self.suppress > 0: return
@@ -253,10 +629,10 @@ class GLCanon(Translated, ArcsToSegmentsMixin):
         lo = self.lo
         lineno = self.lineno
         feedrate = self.feedrate
-        to = [self.xo, self.yo, self.zo]
-        append = self.arcfeed_append
+        to = (self.xo, self.yo, self.zo)
+        append = self.segments_append
         for l in segs:
-            append((lineno, lo, l, feedrate, to))
+            append(ARCFEED, lineno, lo, l, feedrate, to)
             lo = l
         self.lo = lo
 
@@ -264,7 +640,7 @@ class GLCanon(Translated, ArcsToSegmentsMixin):
         if self.suppress > 0: return
         self.first_move = False
         l = self.rotate_and_translate(x,y,z,a,b,c,u,v,w)
-        self.feed_append((self.lineno, self.lo, l, self.feedrate, [self.xo, self.yo, self.zo]))
+        self.segments_append(FEED, self.lineno, self.lo, l, self.feedrate, (self.xo, self.yo, self.zo))
         self.lo = l
     straight_probe = straight_feed
 
@@ -285,22 +661,14 @@ class GLCanon(Translated, ArcsToSegmentsMixin):
         c = self.colors['selected']
         glColor3f(*c)
         glBegin(GL_LINES)
+        index = self.segments.line_indices(lineno)
+        starts = self.segments.start[index].tolist()
+        ends = self.segments.end[index].tolist()
         coords = []
-        for line in self.traverse:
-            if line[0] != lineno: continue
-            linuxcnc.line9(geometry, line[1], line[2])
-            coords.append(line[1][:3])
-            coords.append(line[2][:3])
-        for line in self.arcfeed:
-            if line[0] != lineno: continue
-            linuxcnc.line9(geometry, line[1], line[2])
-            coords.append(line[1][:3])
-            coords.append(line[2][:3])
-        for line in self.feed:
-            if line[0] != lineno: continue
-            linuxcnc.line9(geometry, line[1], line[2])
-            coords.append(line[1][:3])
-            coords.append(line[2][:3])
+        for start, end in izip(starts, ends):
+            linuxcnc.line9(geometry, start, end)
+            coords.append(start[:3])
+            coords.append(end[:3])
         glEnd()
         for line in self.dwells:
             if line[0] != lineno: continue
@@ -416,6 +784,7 @@ class GlCanonDraw:
         self.lp = lp
         self.canon = g
         self._dlists = {}
+        self._buffers = None
         self.select_buffer_size = 100
         self.cached_tool = -1
         self.initialised = 0
@@ -476,6 +845,10 @@ class GlCanonDraw:
 
     def select(self, x, y):
         if self.canon is None: return
+        if self.canon.pick_index() is not None:
+            self.set_highlight_line(self.pick(x, y))
+            return
+
         pmatrix = glGetDoublev(GL_PROJECTION_MATRIX)
         glMatrixMode(GL_PROJECTION)
         glPushMatrix()
@@ -491,9 +864,12 @@ class GlCanonDraw:
             glInitNames()
             glPushName(0)
 
+            glPushMatrix()
+            glTranslatef(*self.program_translation())
             if self.get_show_rapids():
                 glCallList(self.dlist('select_rapids', gen=self.make_selection_list))
             glCallList(self.dlist('select_norapids', gen=self.make_selection_list))
+            glPopMatrix()
 
             try:
                 buffer = list(glRenderMode(GL_RENDER))
@@ -512,6 +888,33 @@ class GlCanonDraw:
         glPopMatrix()
         glMatrixMode(GL_MODELVIEW)
 
+    def pick(self, x, y, size=5):
+        """Find the program line at window position `x`, `y`.
+
+        Uses the spatial index of the canon instead of rendering the program
+        in GL_SELECT mode, which is slow for big programs. Like the GL_SELECT
+        pick, anything within a `size` pixel square is hit.
+        """
+        canon = self.canon
+        if not len(canon.segments) and not canon.dwells:
+            return None
+
+        glPushMatrix()
+        glTranslatef(*self.program_translation())
+        vport = glGetIntegerv(GL_VIEWPORT)
+        y = vport[3] - y
+        near = np.array(gluUnProject(x, y, 0.))
+        far = np.array(gluUnProject(x, y, 1.))
+
+        # the pick size in program units, at the depth of the program
+        center = [(lo + hi) / 2 for lo, hi in zip(canon.min_extents, canon.max_extents)]
+        depth = gluProject(*center)[2]
+        radius = np.linalg.norm(np.subtract(gluUnProject(x + size / 2., y, depth),
+                                            gluUnProject(x, y, depth)))
+        glPopMatrix()
+
+        return canon.pick(near, far - near, radius, self.get_show_rapids())
+
     def dlist(self, name, n=1, gen=lambda n: None):
         if name not in self._dlists:
             base = glGenLists(n)
@@ -557,7 +960,8 @@ class GlCanonDraw:
         else:
             x, y, z = 0.0, 0.0, 0.0
         glEndList()
-        self.set_centerpoint(x, y, z)
+        dx, dy, dz = self.program_translation()
+        self.set_centerpoint(x + dx, y + dy, z + dz)
 
     @with_context_swap
     def redraw_perspective(self):
@@ -1077,9 +1481,19 @@ class GlCanonDraw:
                 glEnable(GL_BLEND)
                 glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
-            if self.get_show_rapids():
-                glCallList(self.dlist('program_rapids', gen=self.make_main_list))
-            glCallList(self.dlist('program_norapids', gen=self.make_main_list))
+            # follow work offset changes without reloading the program
+            glPushMatrix()
+            glTranslatef(*self.program_translation())
+
+            buffers = self.program_buffers()
+            if buffers is not None:
+                if self.get_show_rapids():
+                    self.canon.draw_buffers(buffers, False)
+                self.canon.draw_buffers(buffers, True)
+            else:
+                if self.get_show_rapids():
+                    glCallList(self.dlist('program_rapids', gen=self.make_main_list))
+                glCallList(self.dlist('program_norapids', gen=self.make_main_list))
             glCallList(self.dlist('highlight'))
 
             if self.get_program_alpha():
@@ -1088,6 +1502,8 @@ class GlCanonDraw:
 
             if self.get_show_extents():
                 self.show_extents()
+
+            glPopMatrix()
         try:
             self.user_plot()
         except:
@@ -1813,18 +2229,46 @@ class GlCanonDraw:
         if self.canon: self.canon.draw(0, False)
         glEndList()
 
+    def work_offset(self, s=None):
+        """Get the current XYZ g5x + g92 offset in internal units."""
+        s = s or self.stat
+        g5x_offset = self.to_internal_units(s.g5x_offset, s.linear_units)[:3]
+        g92_offset = self.to_internal_units(s.g92_offset, s.linear_units)[:3]
+        return [a + b for a, b in zip(g5x_offset, g92_offset)]
+
+    def program_translation(self):
+        """Get the distance the work offset has moved since the program was loaded."""
+        if self.canon is None or self.canon.work_offset is None:
+            return 0.0, 0.0, 0.0
+        return [a - b for a, b in zip(self.work_offset(), self.canon.work_offset)]
+
+    def program_buffers(self):
+        """Get the vertex buffers of the program, None if they can't be used."""
+        if self._buffers is None:
+            self._buffers = self.canon is not None and self.canon.make_buffers() or False
+        return self._buffers or None
+
     def load_preview(self, f, canon, *args):
+        if canon.work_offset is None:
+            canon.work_offset = self.work_offset()
         result, seq = gcode.parse(f, canon, *args)
 
         if result <= gcode.MIN_ERROR:
             canon.calc_extents()
-            self.stale_dlist('program_rapids')
-            self.stale_dlist('program_norapids')
-            self.stale_dlist('select_rapids')
-            self.stale_dlist('select_norapids')
+            self.stale_program()
 
         return result, seq
 
+    def stale_program(self):
+        if self._buffers:
+            for buffer in self._buffers.values():
+                buffer.delete()
+        self._buffers = None
+        self.stale_dlist('program_rapids')
+        self.stale_dlist('program_norapids')
+        self.stale_dlist('select_rapids')
+        self.stale_dlist('select_norapids')
+
     def from_internal_units(self, pos, unit=None):
         if unit is None:
             unit = self.stat.linear_units
@@ -0,0 +1,111 @@
+"""
+Live Plot
+---------
+
+Bounded live plot for the OpenGL backplot.
+
+:class:`LivePlotter` is a drop in replacement for ``linuxcnc.positionlogger``
+which keeps the tool path in a fixed size :class:`TrailBuffer` instead of a
+list that grows for as long as the machine runs, and draws it with a single
+``glDrawElements`` call.
+
+Only linear (XYZUVW) geometries are supported, for foam and rotary
+geometries the C position logger is used. See :mod:`qtpyvcp.lib.trail_buffer`
+for the options, which are read from the ``[DISPLAY]`` section of the INI.
+"""
+
+import time
+import threading
+
+import numpy as np
+
+from OpenGL import GL
+
+import linuxcnc
+
+from qtpyvcp.lib.trail_buffer import TrailBuffer
+from qtpyvcp.utilities import logger
+
+LOG = logger.getLogger(__name__)
+
+
+class LivePlotter(object):
+    """Logs the tool tip position and draws it as a colored line strip.
+
+    Args:
+        stat (linuxcnc.stat) : Stat object used by the logging thread.
+        colors (list) : RGBA colors (0-255) indexed by motion type, jog
+            first, the same as the ``linuxcnc.positionlogger`` colors.
+        projection (numpy.ndarray) : 9 x 3 matrix mapping XYZABCUVW to the
+            plotted XYZ, see ``glcanon.geometry_projection``.
+        **trail_options : Keyword arguments for the :class:`TrailBuffer`.
+    """
+
+    def __init__(self, stat, colors, projection, **trail_options):
+        self.stat = stat
+        self.colors = np.array(colors, np.uint8)
+        self.trail = TrailBuffer(**trail_options)
+
+        # (axis, plotted axis, sign) for each non zero term of the projection
+        self._terms = [(axis, out, float(projection[axis, out]))
+                       for axis, out in zip(*np.nonzero(projection))]
+
+        self._lock = threading.Lock()
+        self._running = False
+        self._position = None
+
+    def start(self, interval):
+        """Log the position every `interval` seconds, until stopped."""
+        self._running = True
+        while self._running:
+            try:
+                self.stat.poll()
+            except linuxcnc.error:
+                LOG.debug("Live plot poll failed", exc_info=True)
+            else:
+                self.log(self.stat)
+            time.sleep(interval)
+
+    def stop(self):
+        self._running = False
+
+    def log(self, stat):
+        """Add the current tool tip position to the plot."""
+        pos = [p - t for p, t in zip(stat.actual_position, stat.tool_offset)]
+
+        point = [0.0, 0.0, 0.0]
+        for axis, out, sign in self._terms:
+            point[out] += sign * pos[axis]
+
+        tag = stat.motion_type
+        if not 0 <= tag < len(self.colors):
+            tag = 0
+
+        with self._lock:
+            self.trail.add(point, tag)
+            self._position = tuple(point) + tuple(pos[3:6])
+
+    def clear(self):
+        with self._lock:
+            self.trail.clear()
+
+    def last(self, flag=True):
+        """Returns the last logged position as (x, y, z, a, b, c)."""
+        return self._position
+
+    def call(self):
+        """Draw the plot, must be called with the GL context current."""
+        with self._lock:
+            if len(self.trail) < 2:
+                return
+
+            indices = self.trail.indices(np.uint32)
+            colors = self.colors[self.trail.tags]
+
+            GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glEnableClientState(GL.GL_COLOR_ARRAY)
+            GL.glVertexPointer(3, GL.GL_DOUBLE, 0, self.trail.points)
+            GL.glColorPointer(4, GL.GL_UNSIGNED_BYTE, 0, colors)
+            GL.glDrawElements(GL.GL_LINE_STRIP, len(indices), GL.GL_UNSIGNED_INT, indices)
+            GL.glDisableClientState(GL.GL_COLOR_ARRAY)
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
@@ -22,12 +22,13 @@ import shutil
 import tempfile
 
 import thread
+import threading
 
 import re
 import math
 
 from qtpy.QtGui import QColor
-from qtpy.QtCore import Signal, QSize, Qt
+from qtpy.QtCore import Signal, QObject, QSize, Qt
 from qtpy.QtWidgets import QApplication, QHBoxLayout, QSlider, QWidget
 
 # Set up logging
@@ -50,7 +51,10 @@ except ImportError:
 import gcode
 import linuxcnc
 from rs274 import interpret
-from qtpyvcp.widgets.display_widgets.gcode_backplot import glcanon, glnav
+from qtpyvcp.lib.frame_scheduler import FrameScheduler
+from qtpyvcp.lib.preview_cache import previewCache, fileHash
+from qtpyvcp.lib.trail_buffer import trailOptions
+from qtpyvcp.widgets.display_widgets.gcode_backplot import glcanon, glnav, liveplot
 
 
 # ==============================================================================
@@ -145,6 +149,157 @@ class StatCanon(glcanon.GLCanon, interpret.StatMixin):
             self.progress_callback(progress + 1)
 
 
+def count_lines(fname):
+    lines = 0
+    buf_size = 1024 * 1024
+    with open(fname) as fh:
+        read_f = fh.read
+        buf = read_f(buf_size)
+        while buf:
+            lines += buf.count('\n')
+            buf = read_f(buf_size)
+    return lines + 1
+
+
+class PreviewLoader(QObject):
+    """Interprets G-code files for the backplot in a background thread.
+
+    The interpreter in the ``gcode`` module is not reentrant, so only one
+    file is interpreted at a time. Requesting a load while another one is
+    running aborts the running one, the new file is then loaded as soon as
+    the interpreter is free and the result of the aborted load is dropped.
+
+    Progress is reported through the :attr:`progress` signal and the result
+    through the :attr:`loaded` signal, both are delivered in the GUI thread.
+    """
+    progress = Signal(int)
+    loaded = Signal(object, int, int)  # canon, result, seq
+
+    _done = Signal(object, int, int)
+
+    def __init__(self, parent=None, cache=None):
+        super(PreviewLoader, self).__init__(parent)
+        self.cache = cache
+        self._thread = None
+        self._canon = None
+        self._pending = None
+        self._discard = False
+        self._done.connect(self._onDone)
+
+    def isRunning(self):
+        return self._thread is not None
+
+    def load(self, filename, canon, unitcode, initcode, parameter_file, cache_context=None):
+        """Start interpreting `filename` into `canon`.
+
+        If the program is in the preview cache it is loaded from there
+        instead. Either way the buffers and indexes of the canon are built
+        in the loader thread too.
+
+        Args:
+            filename (str) : The G-code file to load.
+            canon (StatCanon) : The canon to fill, it should not be touched
+                until it is passed back through the :attr:`loaded` signal.
+            unitcode (str) : The units G-code, G20 or G21.
+            initcode (str) : The RS274NGC startup code.
+            parameter_file (str) : The interpreter parameter file, a copy
+                of it is used so the original is never modified.
+            cache_context (dict) : If given, the preview cache is used, with
+                a key made from the file and these values.
+        """
+        args = (filename, canon, unitcode, initcode, parameter_file, cache_context)
+        if self._thread is not None:
+            self._pending = args
+            self.abort()
+            return
+
+        self._canon = canon
+        self._thread = threading.Thread(target=self._run, args=args,
+                                        name='PreviewLoader')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def abort(self):
+        """Abort the load in progress, if any."""
+        if self._canon is not None:
+            self._canon.aborted = True
+
+    def cancel(self):
+        """Abort the load in progress and any pending load, dropping the result."""
+        self._pending = None
+        if self._thread is not None:
+            self._discard = True
+            self.abort()
+
+    def _run(self, filename, canon, unitcode, initcode, parameter_file, cache_context):
+        result, seq = 0, 0
+        try:
+            # hashing a big file is slow, so the key is made here too
+            cache_key = cached = None
+            if self.cache is not None and cache_context is not None:
+                cache_key = self.cache.key(filename, **cache_context)
+                cached = self.cache.get(cache_key)
+
+            if cached is not None:
+                LOG.debug("Loading backplot from cache: %s", filename)
+                arrays, meta = cached
+                canon.set_cache_data(arrays, meta)
+                result, seq = meta['result'], meta['seq']
+            else:
+                canon.total_lines = count_lines(filename)
+                result, seq = self._interpret(filename, canon, unitcode, initcode,
+                                              parameter_file)
+                if cache_key and not canon.aborted:
+                    self._save(cache_key, canon, result, seq)
+
+            canon.prepare_buffers()
+            canon.build_indexes()
+        except Exception:
+            LOG.exception("Error loading backplot: %s", filename)
+            canon = None
+
+        self._done.emit(canon, result, seq)
+
+    def _interpret(self, filename, canon, unitcode, initcode, parameter_file):
+        result, seq = 0, 0
+        td = tempfile.mkdtemp()
+        try:
+            temp_parameter = os.path.join(td, os.path.basename(parameter_file))
+            shutil.copy(parameter_file, temp_parameter)
+            canon.parameter_file = temp_parameter
+            try:
+                result, seq = gcode.parse(filename, canon, unitcode, initcode)
+            except KeyboardInterrupt:
+                LOG.debug("Aborted loading backplot: %s", filename)
+            canon.calc_extents()
+        finally:
+            shutil.rmtree(td)
+        return result, seq
+
+    def _save(self, cache_key, canon, result, seq):
+        try:
+            arrays, meta = canon.get_cache_data()
+            meta.update(result=result, seq=seq)
+            self.cache.put(cache_key, arrays, meta)
+        except Exception:
+            LOG.warning("Error saving backplot to the preview cache", exc_info=True)
+
+    def _onDone(self, canon, result, seq):
+        self._thread.join()
+        self._thread = None
+        self._canon = None
+
+        discard, self._discard = self._discard, False
+
+        if self._pending is not None:
+            args, self._pending = self._pending, None
+            self.load(*args)
+            return
+
+        if not discard:
+            self.loaded.emit(canon, result, seq)
+
+
 # ==============================================================================
 # QtGl widget for displaying g-code toolpath backplot
 # ==============================================================================
@@ -167,21 +322,35 @@ class QBackPlot(QGLWidget, glcanon.GlCanonDraw, glnav.GlNavBase):
         # requires linuxcnc running before laoding this widget
         inifile = os.environ.get('INI_FILE_NAME', '/dev/null')
         self.inifile = linuxcnc.ini(inifile)
-        self.logger = linuxcnc.positionlogger(linuxcnc.stat(),
-                                              C('backplotjog'),
-                                              C('backplottraverse'),
-                                              C('backplotfeed'),
-                                              C('backplotarc'),
-                                              C('backplottoolchange'),
-                                              C('backplotprobing'),
-                                              self.get_geometry()
-                                              )
+        colors = [C('backplotjog'),
+                  C('backplottraverse'),
+                  C('backplotfeed'),
+                  C('backplotarc'),
+                  C('backplottoolchange'),
+                  C('backplotprobing')]
+
+        projection = glcanon.geometry_projection(self.get_geometry())
+        if projection is not None and not self.inifile.find("DISPLAY", "FOAM"):
+            self.logger = liveplot.LivePlotter(linuxcnc.stat(), colors, projection,
+                                               **trailOptions(self.inifile, "DISPLAY"))
+        else:
+            # the bounded plotter can't do rotary or foam geometries
+            self.logger = linuxcnc.positionlogger(linuxcnc.stat(), *(colors + [self.get_geometry()]))
+
         # start tracking linuxcnc position so we can plot it
         thread.start_new_thread(self.logger.start, (.01,))
         glcanon.GlCanonDraw.__init__(self, linuxcnc.stat(), self.logger)
 
         self.canon = None
 
+        self.preview_cache = previewCache(self.inifile)
+        self.preview_loader = PreviewLoader(self, self.preview_cache)
+        self.preview_loader.progress.connect(self.report_progress_percentage)
+        self.preview_loader.loaded.connect(self.preview_loaded)
+
+        # merges repaint requests and limits the frame rate
+        self.frame_scheduler = FrameScheduler(self, self.updateGL)
+
         # set defaults
         self.current_view = 'p'
         self.fingerprint = ()
@@ -252,46 +421,56 @@ class QBackPlot(QGLWidget, glcanon.GlCanonDraw, glnav.GlNavBase):
         # Needed to support special chars in path name, such as `coño.ngc`
         filename = filename.encode('utf-8')
 
-        td = tempfile.mkdtemp()
         self.current_file = filename
+
+        # the canon is read from the loader thread, so give it its own stat
+        stat = linuxcnc.stat()
         try:
-            line_count = self.count_lines(filename)
-            self.canon = StatCanon(self.colors, self.get_geometry(), self.is_lathe, s, self.random, line_count,
-                                   self.report_progress_percentage)
-            temp_parameter = os.path.join(td, os.path.basename(self.parameter_file))
-            shutil.copy(self.parameter_file, temp_parameter)
-            self.canon.parameter_file = temp_parameter
-            unitcode = "G%d" % (20 + (s.linear_units == 1))
-            initcode = self.inifile.find("RS274NGC", "RS274NGC_STARTUP_CODE") or ""
-            self.report_loading_started()
-            try:
-                result, seq = self.load_preview(filename, self.canon, unitcode, initcode)
-            except KeyboardInterrupt:
-                result, seq = 0, 0
-            self.report_loading_finished()
-            if result > gcode.MIN_ERROR:
-                self.report_gcode_error(result, seq, filename)
-                # FixMe instead of just loading an empty file find a way
-                # to clear the backplot directly
-                # self.clear()
-            # else:
-            #     glcanon.GlCanonDraw.realize(self)
+            stat.poll()
+        except:
+            pass
 
+        unitcode = "G%d" % (20 + (s.linear_units == 1))
+        initcode = self.inifile.find("RS274NGC", "RS274NGC_STARTUP_CODE") or ""
+
+        cache_context = None
+        if self.preview_cache is not None:
+            cache_context = dict(canon='gl',
+                                 unitcode=unitcode,
+                                 initcode=initcode,
+                                 geometry=self.get_geometry(),
+                                 lathe=self.is_lathe,
+                                 random=self.random,
+                                 tool_table=repr(stat.tool_table),
+                                 parameters=self.parameter_hash())
+
+        # the line count is set by the loader
+        canon = StatCanon(self.colors, self.get_geometry(), self.is_lathe, stat, self.random, 1,
+                          self.preview_loader.progress.emit)
+        canon.work_offset = self.work_offset(stat)
+        self.report_loading_started()
+
+        self.preview_loader.load(filename, canon, unitcode, initcode, self.parameter_file,
+                                 cache_context)
+
+    def parameter_hash(self):
+        try:
+            return fileHash(self.parameter_file)
+        except (IOError, OSError):
+            return None
 
-        finally:
-            shutil.rmtree(td)
+    def preview_loaded(self, canon, result, seq):
+        if canon is not None:
+            if result > gcode.MIN_ERROR:
+                self.report_gcode_error(result, seq, self.current_file)
+            self.canon = canon
+            self.stale_program()
         self.set_current_view()
+        self.report_loading_finished()
+        self.update()
 
     def count_lines(self, fname):
-        lines = 0
-        buf_size = 1024 * 1024
-        with open(fname) as fh:
-            read_f = fh.read
-            buf = read_f(buf_size)
-            while buf:
-                lines += buf.count('\n')
-                buf = read_f(buf_size)
-        return lines + 1
+        return count_lines(fname)
 
     def report_loading_started(self):
         pass
@@ -303,7 +482,7 @@ class QBackPlot(QGLWidget, glcanon.GlCanonDraw, glnav.GlNavBase):
         pass
 
     def abort(self):
-        self.canon.aborted = True
+        self.preview_loader.abort()
 
     def clear(self):
         # path = "empty.ngc"
@@ -435,7 +614,11 @@ class QBackPlot(QGLWidget, glcanon.GlCanonDraw, glnav.GlNavBase):
     # redirect for conversion from pygtk to pyqt
     # gcannon assumes this function name
     def _redraw(self):
-        self.updateGL()
+        self.frame_scheduler.requestFrame(interactive=True)
+
+    def frameStats(self):
+        """Frame time statistics, see :meth:`FrameScheduler.stats`."""
+        return self.frame_scheduler.stats()
 
     # # This overrides glcannon.py method so we can not plot the DRO
     # def dro_format(self,s,spd,dtg,limit,homed,positions,axisdtg,g5x_offset,g92_offset,tlo_offset):
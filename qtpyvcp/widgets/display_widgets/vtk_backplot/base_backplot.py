@@ -4,6 +4,7 @@ import shutil
 import os
 
 from qtpyvcp.lib.native_notification import NativeNotification
+from qtpyvcp.lib.preview_cache import previewCache, fileHash
 
 from base_canon import BaseCanon
 
@@ -41,18 +42,36 @@ class BaseBackPlot(object):
 
         self.last_filename = None
 
+        self.preview_cache = previewCache(self.ini)
+
     def load(self, filename=None, *args, **kwargs):
         # args and kwargs are passed to the canon init method
+        load_args = self.prepare_load(filename, *args, **kwargs)
+        if load_args is None:
+            return
+
+        result, seq = self.interpret(*load_args)
+        self.report_gcode_error(result, seq, load_args[0])
+
+    def prepare_load(self, filename=None, *args, **kwargs):
+        """Create the canon for loading `filename`.
 
+        The slow part of a load, :meth:`interpret`, is kept separate so it
+        can be run in a worker thread.
+
+        Returns:
+            tuple : The :meth:`interpret` arguments, or None if the file is
+            not valid.
+        """
         filename = filename or self.last_filename
         if filename is None:
-            self.stat.poll()
-            filename = self.stat.file
+            filename = self.status_value('file')
 
         if filename is None or not os.path.isfile(filename):
             self.canon = None
             self.notification.setNotify("3D plot", "Can't load backplot, invalid file: {}".format(filename))
             # raise ValueError("Can't load backplot, invalid file: {}".format(filename))
+            return None
 
         self.last_filename = filename
 
@@ -60,31 +79,86 @@ class BaseBackPlot(object):
         # (straight_feed, straight_traverse, arc_feed, rigid_tap, etc.)
         self.canon = self.canon_class(*args, **kwargs)
 
+        # Some initialization g-code to set the units and optional user code
+        unitcode = "G%d" % (20 + (self.status_value('linear_units') == 1))
+        initcode = self.ini.find("RS274NGC", "RS274NGC_STARTUP_CODE") or ""
+
+        # only canons that can restore a preview use the cache
+        cache_context = None
+        if self.preview_cache is not None and hasattr(self.canon, 'set_cache_data'):
+            cache_context = dict(canon=self.canon_class.__name__,
+                                 unitcode=unitcode,
+                                 initcode=initcode,
+                                 geometry=self.geometry,
+                                 lathe=self.lathe_option,
+                                 random=self.random,
+                                 tool_table=repr(self.status_value('tool_table')))
+
+        return filename, self.canon, unitcode, initcode, cache_context
+
+    def interpret(self, filename, canon, unitcode, initcode, cache_context=None):
+        """Interpret `filename` into `canon`, or load it from the preview cache.
+
+        This does not touch the GUI, so it can be run in a worker thread,
+        but only one file can be interpreted at a time.
+
+        Returns:
+            tuple : The ``(result, seq)`` of the interpreter.
+        """
+        # hashing a big file is slow, so the key is made here
+        cache_key = None
+        if cache_context is not None:
+            cache_key = self.preview_cache.key(filename,
+                                               parameters=self.parameter_hash(),
+                                               **cache_context)
+
+            cached = self.preview_cache.get(cache_key)
+            if cached is not None:
+                arrays, meta = cached
+                canon.set_cache_data(arrays, meta)
+                return meta['result'], meta['seq']
+
         if os.path.exists(self.parameter_file):
             shutil.copy(self.parameter_file, self.temp_parameter_file)
 
-        self.canon.parameter_file = self.temp_parameter_file
-
-        # Some initialization g-code to set the units and optional user code
-        unitcode = "G%d" % (20 + (self.stat.linear_units == 1))
-        initcode = self.ini.find("RS274NGC", "RS274NGC_STARTUP_CODE") or ""
+        canon.parameter_file = self.temp_parameter_file
 
         # THIS IS WHERE IT ALL HAPPENS: load_preview will execute the code,
         # call back to the canon with motion commands, and record a history
         # of all the movements.
 
-        result, seq = gcode.parse(filename, self.canon, unitcode, initcode)
+        result, seq = gcode.parse(filename, canon, unitcode, initcode)
 
+        # clean up temp var file and the backup
+        os.unlink(self.temp_parameter_file)
+        os.unlink(self.temp_parameter_file + '.bak')
+
+        cache_data = canon.get_cache_data()
+        if cache_key is not None and cache_data is not None:
+            arrays, meta = cache_data
+            meta.update(result=result, seq=seq)
+            self.preview_cache.put(cache_key, arrays, meta)
+
+        return result, seq
+
+    def status_value(self, item):
+        """Returns the current value of the `item` field of ``linuxcnc.stat``."""
+        self.stat.poll()
+        return getattr(self.stat, item)
+
+    def parameter_hash(self):
+        try:
+            return fileHash(self.parameter_file)
+        except (IOError, OSError):
+            return None
+
+    def report_gcode_error(self, result, seq, filename):
         if result > gcode.MIN_ERROR:
             msg = gcode.strerror(result)
             fname = os.path.basename(filename)
             self.notification.setNotify("3D plot", "Error in {} line {}\n{}".format(fname, seq - 1, msg))
             # raise SyntaxError("Error in %s line %i: %s" % (fname, seq - 1, msg))
 
-        # clean up temp var file and the backup
-        os.unlink(self.temp_parameter_file)
-        os.unlink(self.temp_parameter_file + '.bak')
-
 
 if __name__ == "__main__":
     from qtpyvcp import TOP_DIR
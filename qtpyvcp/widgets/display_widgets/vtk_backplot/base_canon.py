@@ -83,6 +83,14 @@ class BaseCanon(object):
         self.rotation_cos = 1
         self.rotation_sin = 0
 
+    def get_cache_data(self):
+        """Returns the preview as ``(arrays, meta)`` for the preview cache.
+
+        Returns None if the canon doesn't support caching. Canons that do
+        also implement ``set_cache_data(arrays, meta)`` to restore it.
+        """
+        return None
+
     def add_path_point(self, line_type, start_point, end_point):
         pass
 
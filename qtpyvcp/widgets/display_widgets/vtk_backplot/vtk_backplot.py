@@ -1,5 +1,7 @@
 import os
-from math import cos, sin, radians
+import threading
+from array import array
+from math import cos, sin, tan, radians
 
 from operator import add
 from collections import OrderedDict
@@ -10,6 +12,9 @@ from qtpy.QtCore import Property, Signal, Slot, QTimer
 from qtpy.QtGui import QColor
 
 import vtk
+import numpy as np
+
+from vtk.util import numpy_support
 
 # Fix poligons not drawing correctly on some GPU
 # https://stackoverflow.com/questions/51357630/vtk-rendering-not-working-as-expected-inside-pyqt?rq=1
@@ -27,6 +32,9 @@ from qtpyvcp.plugins import getPlugin
 from qtpyvcp.widgets import VCPWidget
 from qtpyvcp.utilities import logger
 from qtpyvcp.utilities.info import Info
+from qtpyvcp.lib.frame_scheduler import FrameScheduler
+from qtpyvcp.lib.path_lod import PathLOD
+from qtpyvcp.lib.trail_buffer import TrailBuffer, trailOptions
 
 from base_canon import StatCanon
 from base_backplot import BaseBackPlot
@@ -72,6 +80,11 @@ class PathActor(vtk.vtkActor):
         else:
             self.axes_actor.SetTotalLength(self.length, self.length, self.length)
 
+        # shared by the path and its axes, updated in place on offset changes
+        self.transform = vtk.vtkTransform()
+        self.SetUserTransform(self.transform)
+        self.axes_actor.SetUserTransform(self.transform)
+
         # Create a vtkUnsignedCharArray container and store the colors in it
         self.colors = vtk.vtkUnsignedCharArray()
         self.colors.SetNumberOfComponents(4)
@@ -82,6 +95,21 @@ class PathActor(vtk.vtkActor):
         self.poly_data = vtk.vtkPolyData()
         self.data_mapper = vtk.vtkPolyDataMapper()
 
+        # (tolerance, poly data) levels of detail, full detail first
+        self.lod_levels = []
+        self.lod_level = 0
+
+    def set_lod(self, pixel_size):
+        """Show the coarsest level of detail with a tolerance below `pixel_size`."""
+        level = 0
+        for i, (tolerance, poly_data) in enumerate(self.lod_levels):
+            if tolerance <= pixel_size:
+                level = i
+
+        if level != self.lod_level:
+            self.lod_level = level
+            self.data_mapper.SetInputData(self.lod_levels[level][1])
+
     def set_origin_index(self, index):
         self.origin_index = index
 
@@ -98,6 +126,23 @@ class PathActor(vtk.vtkActor):
         return self.axes_actor
 
 
+class PathPoints(object):
+    """Packed path geometry for one work offset.
+
+    The start point and line type of each segment are appended to flat
+    arrays while the program is interpreted, so no per segment python
+    objects are kept around for big files.
+    """
+
+    def __init__(self):
+        self.points = array('d')
+        self.line_types = array('B')
+        self.end_point = None
+
+    def __len__(self):
+        return len(self.line_types)
+
+
 class VTKCanon(StatCanon):
     def __init__(self, colors=COLOR_MAP, *args, **kwargs):
         super(VTKCanon, self).__init__(*args, **kwargs)
@@ -117,13 +162,16 @@ class VTKCanon(StatCanon):
         self.index_map[9] = 593
 
         self.path_colors = colors
+        self.line_types = dict((line_type, i) for i, line_type in enumerate(colors))
+        self.color_table = np.array(colors.values(), dtype=np.uint8)
+
         self.path_actors = OrderedDict()
         self.path_points = OrderedDict()
 
         origin = 540
 
         self.path_actors[origin] = PathActor()
-        self.path_points[origin] = list()
+        self.path_points[origin] = PathPoints()
 
         self.origin = origin
         self.previous_origin = origin
@@ -139,7 +187,7 @@ class VTKCanon(StatCanon):
         origin = self.index_map[index]
         if origin not in self.path_actors.keys():
             self.path_actors[origin] = PathActor()
-            self.path_points[origin] = list()
+            self.path_points[origin] = PathPoints()
 
             self.previous_origin = self.origin
             self.origin = origin
@@ -156,30 +204,34 @@ class VTKCanon(StatCanon):
             return
 
         path_points = self.path_points.get(self.origin)
+        path_points.points.extend(start_point[:3])
+        path_points.line_types.append(self.line_types[line_type])
+        path_points.end_point = end_point[:3]
+
+    def get_cache_data(self):
+        """Returns the path points as ``(arrays, meta)`` for the preview cache."""
+        arrays = dict()
+        end_points = dict()
+        for origin, data in self.path_points.items():
+            if len(data):
+                arrays['points_%i' % origin] = np.frombuffer(data.points)
+                arrays['line_types_%i' % origin] = np.frombuffer(data.line_types, dtype=np.uint8)
+            end_points[str(origin)] = data.end_point
+        return arrays, dict(origins=list(self.path_points), end_points=end_points)
+
+    def set_cache_data(self, arrays, meta):
+        """Restore the path points saved with :meth:`get_cache_data`."""
+        self.path_actors.clear()
+        self.path_points.clear()
+        for origin in meta['origins']:
+            data = PathPoints()
+            if 'points_%i' % origin in arrays:
+                data.points = arrays['points_%i' % origin]
+                data.line_types = arrays['line_types_%i' % origin]
+            data.end_point = meta['end_points'][str(origin)]
 
-        if self.units == 2:
-            start_point_list = list()
-            for point in end_point:
-                point *= 25.4
-                start_point_list.append(point)
-
-            end_point_list = list()
-            for point in end_point:
-                point *= 25.4
-                end_point_list.append(point)
-
-            line = list()
-            line.append(start_point_list)
-            line.append(end_point_list)
-
-            path_points.append((line_type, line))
-
-        else:
-            line = list()
-            line.append(start_point)
-            line.append(end_point)
-
-            path_points.append((line_type, line))
+            self.path_actors[origin] = PathActor()
+            self.path_points[origin] = data
 
     def draw_lines(self):
 
@@ -187,55 +239,85 @@ class VTKCanon(StatCanon):
 
             path_actor = self.path_actors.get(origin)
 
-            index = 0
-
-            end_point = None
-            last_line_type = None
-
-            for line_type, line_data in data:
-                # LOG.debug(line_type, end_point)
-
-                start_point = line_data[0]
-                end_point = line_data[1]
-                last_line_type = line_type
-
-                path_actor.points.InsertNextPoint(start_point[:3])
-                path_actor.colors.InsertNextTypedTuple(self.path_colors[line_type])
-
-                line = vtk.vtkLine()
-                line.GetPointIds().SetId(0, index)
-                line.GetPointIds().SetId(1, index + 1)
+            count = len(data)
+            if count:
+                # the path is drawn through the start point of every
+                # segment plus the end point of the last one
+                points = np.empty((count + 1, 3))
+                points[:-1] = np.frombuffer(data.points).reshape(-1, 3)
+                points[-1] = data.end_point
 
-                path_actor.lines.InsertNextCell(line)
+                if self.units == 2:
+                    points *= 25.4
 
-                index += 1
+                # one two point line cell per segment: [2, i, i + 1]
+                cells = np.empty((count, 3), dtype=numpy_support.get_numpy_array_type(vtk.VTK_ID_TYPE))
+                cells[:, 0] = 2
+                cells[:, 1] = np.arange(count)
+                cells[:, 2] = cells[:, 1] + 1
 
-            if end_point:
-                path_actor.points.InsertNextPoint(end_point[:3])
-                path_actor.colors.InsertNextTypedTuple(self.path_colors[last_line_type])
+                line_types = np.frombuffer(data.line_types, dtype=np.uint8)
+                colors = self.color_table[line_types]
 
-                line = vtk.vtkLine()
-                line.GetPointIds().SetId(0, index - 1)
-                line.GetPointIds().SetId(1, index)
-
-                path_actor.lines.InsertNextCell(line)
+                path_actor.points.SetData(numpy_support.numpy_to_vtk(points, deep=True))
+                path_actor.lines.SetCells(count, numpy_support.numpy_to_vtkIdTypeArray(cells.ravel(), deep=True))
+                path_actor.colors = numpy_support.numpy_to_vtk(colors, deep=True,
+                                                               array_type=vtk.VTK_UNSIGNED_CHAR)
 
             # free up memory, lots of it for big files
-
-            self.path_points[self.origin] = list()
+            self.path_points[origin] = PathPoints()
 
             path_actor.poly_data.SetPoints(path_actor.points)
             path_actor.poly_data.SetLines(path_actor.lines)
             path_actor.poly_data.GetCellData().SetScalars(path_actor.colors)
+
+            path_actor.lod_levels = [(0.0, path_actor.poly_data)]
+            path_actor.lod_level = 0
+            if count:
+                lod = PathLOD(points[:-1], points[1:], line_types)
+                path_actor.lod_levels.extend((tolerance, self.lod_poly_data(starts, ends, tags))
+                                             for tolerance, starts, ends, tags in lod.levels[1:])
+
             path_actor.data_mapper.SetInputData(path_actor.poly_data)
             path_actor.data_mapper.Update()
             path_actor.SetMapper(path_actor.data_mapper)
 
+    def lod_poly_data(self, starts, ends, line_types):
+        """Poly data for one level of detail of a path, one cell per segment."""
+        count = len(starts)
+
+        points = np.empty((count * 2, 3))
+        points[0::2] = starts
+        points[1::2] = ends
+
+        cells = np.empty((count, 3), dtype=numpy_support.get_numpy_array_type(vtk.VTK_ID_TYPE))
+        cells[:, 0] = 2
+        cells[:, 1] = np.arange(0, count * 2, 2)
+        cells[:, 2] = cells[:, 1] + 1
+
+        vtk_points = vtk.vtkPoints()
+        vtk_points.SetData(numpy_support.numpy_to_vtk(points, deep=True))
+
+        lines = vtk.vtkCellArray()
+        lines.SetCells(count, numpy_support.numpy_to_vtkIdTypeArray(cells.ravel(), deep=True))
+
+        poly_data = vtk.vtkPolyData()
+        poly_data.SetPoints(vtk_points)
+        poly_data.SetLines(lines)
+        poly_data.GetCellData().SetScalars(
+            numpy_support.numpy_to_vtk(self.color_table[line_types], deep=True,
+                                       array_type=vtk.VTK_UNSIGNED_CHAR))
+        return poly_data
+
     def get_path_actors(self):
         return self.path_actors
 
 
 class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
+
+    # filename, (result, seq) or None on error, emitted by the loader thread
+    _programLoaded = Signal(object, object)
+
     def __init__(self, parent=None):
         super(VTKBackPlot, self).__init__(parent)
 
@@ -310,6 +392,9 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.renderer_window = self.GetRenderWindow()
         self.renderer_window.AddRenderer(self.renderer)
 
+        # merges render requests and limits the frame rate
+        self.frame_scheduler = FrameScheduler(self, self.render_frame)
+
         # self.nav_style = vtk.vtkInteractorStyleTrackballCamera()
         # self.SetInteractorStyle(self.nav_style)
 
@@ -324,15 +409,17 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.axes = Axes()
         self.axes_actor = self.axes.get_actor()
 
-        transform = vtk.vtkTransform()
-        transform.Translate(*self.g5x_offset[:3])
-        transform.RotateZ(self.rotation_offset)
-        self.axes_actor.SetUserTransform(transform)
+        self.axes_transform = vtk.vtkTransform()
+        self.axes_transform.Translate(*self.g5x_offset[:3])
+        self.axes_transform.RotateZ(self.rotation_offset)
+        self.axes_actor.SetUserTransform(self.axes_transform)
 
-        self.path_cache = PathCache(self.tooltip_position)
+        self.path_cache = PathCache(self.tooltip_position, **trailOptions(INIFILE, "VTK"))
         self.path_cache_actor = self.path_cache.get_actor()
         self.tool = Tool(self.stat.tool_table)
         self.tool_actor = self.tool.get_actor()
+        self.tool_transform = vtk.vtkTransform()
+        self.tool_actor.SetUserTransform(self.tool_transform)
 
         self.offset_axes = OrderedDict()
         self.extents = OrderedDict()
@@ -346,12 +433,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
                 index = self.origin_map[origin]
 
                 actor_position = self.path_position_table[index - 1]
-
-                actor_transform = vtk.vtkTransform()
-                actor_transform.Translate(*actor_position[:3])
-                actor_transform.RotateWXYZ(*actor_position[5:9])
-
-                actor.SetUserTransform(actor_transform)
+                self.set_offset_transform(actor.transform, actor_position)
 
                 extents = PathBoundaries(self.camera, actor)
                 extents_actor = extents.get_actor()
@@ -390,6 +472,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.status.file.notify(self.load_program)
         self.status.position.notify(self.update_position)
         self.status.motion_type.notify(self.motion_type)
+        self.status.current_vel.notify(lambda vel: self.frame_scheduler.setIdle(vel == 0))
 
         # self.status.g5x_index.notify(self.update_g5x_index)
         self.status.g5x_offset.notify(self.update_g5x_offset)
@@ -405,6 +488,11 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.line = None
         self._last_filename = str()
 
+        # programs are interpreted in a worker thread, one at a time
+        self._load_thread = None
+        self._pending_load = None
+        self._programLoaded.connect(self._onProgramLoaded)
+
         # Add the observers to watch for particular events. These invoke
         # Python functions.
         self.rotating = 0
@@ -495,7 +583,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         camera.Elevation(lastY - y)
         camera.OrthogonalizeViewUp()
         camera.SetClippingRange(self.clipping_range_near, self.clipping_range_far)
-        self.renderer_window.Render()
+        self.update_render(interactive=True)
         # self.renderer.ResetCamera()
         self.interactor.ReInitialize()
 
@@ -539,7 +627,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         camera.SetPosition((FPoint0 - RPoint0) / 1.0 + PPoint0,
                            (FPoint1 - RPoint1) / 1.0 + PPoint1,
                            (FPoint2 - RPoint2) / 1.0 + PPoint2)
-        self.renderer_window.Render()
+        self.update_render(interactive=True)
 
     # Dolly converts y-motion into a camera dolly commands.
     def dolly(self, renderer, camera, x, y, lastX, lastY, centerX, centerY):
@@ -551,7 +639,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             camera.Dolly(dollyFactor)
             renderer.ResetCameraClippingRange()
 
-        self.renderer_window.Render()
+        self.update_render(interactive=True)
 
     # Wireframe sets the representation of all actors to wireframe.
     def wireframe(self):
@@ -562,7 +650,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             actor.GetProperty().SetRepresentationToWireframe()
             actor = actors.GetNextItem()
 
-        self.renderer_window.Render()
+        self.update_render(interactive=True)
 
     # Surface sets the representation of all actors to surface.
     def surface(self):
@@ -572,7 +660,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         while actor:
             actor.GetProperty().SetRepresentationToSurface()
             actor = actors.GetNextItem()
-        self.renderer_window.Render()
+        self.update_render(interactive=True)
 
     def tlo(self, tlo):
         LOG.debug(tlo)
@@ -582,9 +670,58 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         LOG.debug("reload_program")
         self.load_program(self._last_filename)
 
+    def status_value(self, item):
+        # the status plugin's value is current without polling NML here
+        return getattr(self.status, item).getValue()
+
     def load_program(self, fname=None):
 
         LOG.debug("load_program")
+        if self._load_thread is not None:
+            # the interpreter is busy, the latest request is handled once
+            # the running load is done
+            self._pending_load = [fname]
+            return
+
+        if fname:
+            load_args = self.prepare_load(fname)
+            if load_args is not None:
+                self._load_thread = threading.Thread(target=self._interpretProgram,
+                                                     args=load_args,
+                                                     name='VTKPreviewLoader')
+                self._load_thread.daemon = True
+                self._load_thread.start()
+                return
+
+        self.draw_program()
+
+    def _interpretProgram(self, filename, *args):
+        # runs in the loader thread
+        try:
+            result = self.interpret(filename, *args)
+        except Exception:
+            LOG.exception("Error loading backplot: %s", filename)
+            result = None
+        self._programLoaded.emit(filename, result)
+
+    def _onProgramLoaded(self, filename, result):
+        self._load_thread = None
+
+        pending, self._pending_load = self._pending_load, None
+        if pending is not None and pending[0]:
+            # a newer file was requested, drop this one
+            self.load_program(pending[0])
+            return
+
+        if result is None:
+            self.canon = None
+        else:
+            self.report_gcode_error(result[0], result[1], filename)
+
+        self.draw_program()
+
+    def draw_program(self):
+        """Replace the drawn program paths with those of the current canon."""
         for origin, actor in self.path_actors.items():
             axes = actor.get_axes()
             extents = self.extents[origin]
@@ -597,9 +734,6 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.offset_axes.clear()
         self.extents.clear()
 
-        if fname:
-            self.load(fname)
-
         if self.canon is None:
             return
 
@@ -616,13 +750,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
 
             index = self.origin_map[origin]
             path_position = self.path_position_table[index - 1]
-
-            path_transform = vtk.vtkTransform()
-            path_transform.Translate(*path_position[:3])
-            path_transform.RotateWXYZ(*path_position[5:9])
-
-            axes.SetUserTransform(path_transform)
-            actor.SetUserTransform(path_transform)
+            self.set_offset_transform(actor.transform, path_position)
 
             extents = PathBoundaries(self.camera, actor)
             extents_actor = extents.get_actor()
@@ -655,13 +783,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.spindle_position = position[:3]
         self.spindle_rotation = position[3:6]
 
-        tool_transform = vtk.vtkTransform()
-        tool_transform.Translate(*self.spindle_position)
-        tool_transform.RotateX(-self.spindle_rotation[0])
-        tool_transform.RotateY(-self.spindle_rotation[1])
-        tool_transform.RotateZ(-self.spindle_rotation[2])
-
-        self.tool_actor.SetUserTransform(tool_transform)
+        self.set_tool_transform()
 
         tlo = self.status.tool_offset
         self.tooltip_position = [pos - tlo for pos, tlo in zip(self.spindle_position, tlo[:3])]
@@ -671,6 +793,28 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.path_cache.add_line_point(self.tooltip_position)
         self.update_render()
 
+    def set_tool_transform(self):
+        self.tool_transform.Identity()
+        self.tool_transform.Translate(*self.spindle_position)
+        self.tool_transform.RotateX(-self.spindle_rotation[0])
+        self.tool_transform.RotateY(-self.spindle_rotation[1])
+        self.tool_transform.RotateZ(-self.spindle_rotation[2])
+
+    def set_offset_transform(self, transform, offset):
+        """Move `transform` to a work offset, updating it in place."""
+        transform.Identity()
+        transform.Translate(*offset[:3])
+        transform.RotateWXYZ(*offset[5:9])
+
+    def update_extents(self):
+        """Fit the extents actors to the (moved) paths.
+
+        The path bounds are cached by the mappers, so this only transforms
+        the corners of the bounding boxes, the path data is not touched.
+        """
+        for origin, actor in self.path_actors.items():
+            self.extents[origin].SetBounds(actor.GetBounds())
+
     def on_offset_table_changed(self, table):
         LOG.debug("on_offset_table_changed")
         self.path_position_table = table
@@ -678,47 +822,17 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
     def update_g5x_offset(self, offset):
         LOG.debug("update_g5x_offset")
 
-        transform = vtk.vtkTransform()
-        transform.Translate(*offset[:3])
-        transform.RotateWXYZ(*offset[5:9])
-
-        self.axes_actor.SetUserTransform(transform)
+        self.set_offset_transform(self.axes_transform, offset)
 
         for origin, actor in self.path_actors.items():
             # path_offset = [n - o for n, o in zip(position[:3], self.original_g5x_offset[:3])]
 
             path_index = self.origin_map[origin]
 
-            old_extents = self.extents[origin]
-            self.renderer.RemoveActor(old_extents)
-
-            axes = actor.get_axes()
-
             if path_index == self.g5x_index:
-                path_transform = vtk.vtkTransform()
-                path_transform.Translate(*offset[:3])
-                path_transform.RotateWXYZ(*offset[5:9])
-
-                axes.SetUserTransform(path_transform)
-                actor.SetUserTransform(path_transform)
-
-            extents = PathBoundaries(self.camera, actor)
-            extents_actor = extents.get_actor()
+                self.set_offset_transform(actor.transform, offset)
 
-            if self.show_extents:
-                extents_actor.XAxisVisibilityOn()
-                extents_actor.YAxisVisibilityOn()
-                extents_actor.ZAxisVisibilityOn()
-            else:
-                extents_actor.XAxisVisibilityOff()
-                extents_actor.YAxisVisibilityOff()
-                extents_actor.ZAxisVisibilityOff()
-
-            self.renderer.AddActor(extents_actor)
-
-            self.extents[origin] = extents_actor
-
-        self.interactor.ReInitialize()
+        self.update_extents()
         self.update_render()
 
     def update_g5x_index(self, index):
@@ -726,13 +840,8 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.g5x_index = index
         position = self.path_position_table[index - 1]
 
-        transform = vtk.vtkTransform()
-        transform.Translate(*position[:3])
-        transform.RotateWXYZ(*position[5:9])
-
-        self.axes_actor.SetUserTransform(transform)
+        self.set_offset_transform(self.axes_transform, position)
 
-        self.interactor.ReInitialize()
         self.update_render()
 
     def update_g92_offset(self, g92_offset):
@@ -751,32 +860,11 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
 
                 new_path_position = list(map(add, self.path_position_table[index][:9], path_offset))
 
-                axes = actor.get_axes()
-
-                path_transform = vtk.vtkTransform()
-                path_transform.Translate(*new_path_position[:3])
-
-                self.axes_actor.SetUserTransform(path_transform)
-                axes.SetUserTransform(path_transform)
-                actor.SetUserTransform(path_transform)
-
-                extents = PathBoundaries(self.camera, actor)
-                extents_actor = extents.get_actor()
-
-                if self.show_extents:
-                    extents_actor.XAxisVisibilityOn()
-                    extents_actor.YAxisVisibilityOn()
-                    extents_actor.ZAxisVisibilityOn()
-                else:
-                    extents_actor.XAxisVisibilityOff()
-                    extents_actor.YAxisVisibilityOff()
-                    extents_actor.ZAxisVisibilityOff()
-
-                self.renderer.AddActor(extents_actor)
+                for transform in (self.axes_transform, actor.transform):
+                    transform.Identity()
+                    transform.Translate(*new_path_position[:3])
 
-                self.extents[origin] = extents_actor
-
-            self.interactor.ReInitialize()
+            self.update_extents()
             self.update_render()
 
     # def update_rotation_xy(self, rotation):
@@ -815,20 +903,35 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
         self.tool = Tool(self.stat.tool_table)
         self.tool_actor = self.tool.get_actor()
 
-        tool_transform = vtk.vtkTransform()
-        tool_transform.Translate(*self.spindle_position)
-        tool_transform.RotateX(-self.spindle_rotation[0])
-        tool_transform.RotateY(-self.spindle_rotation[1])
-        tool_transform.RotateZ(-self.spindle_rotation[2])
-
-        self.tool_actor.SetUserTransform(tool_transform)
+        self.set_tool_transform()
+        self.tool_actor.SetUserTransform(self.tool_transform)
 
         self.renderer.AddActor(self.tool_actor)
 
         self.update_render()
 
-    def update_render(self):
-        self.GetRenderWindow().Render()
+    def render_frame(self):
+        self.update_lod()
+        self.renderer_window.Render()
+
+    def update_lod(self):
+        """Draw the paths at the level of detail matching the zoom."""
+        height = self.renderer_window.GetSize()[1] or 1
+        if self.camera.GetParallelProjection():
+            view_height = 2 * self.camera.GetParallelScale()
+        else:
+            view_height = 2 * self.camera.GetDistance() * tan(radians(self.camera.GetViewAngle() / 2))
+
+        pixel_size = view_height / height
+        for actor in getattr(self, 'path_actors', {}).values():
+            actor.set_lod(pixel_size)
+
+    def update_render(self, interactive=False):
+        self.frame_scheduler.requestFrame(interactive)
+
+    def frameStats(self):
+        """Frame time statistics, see :meth:`FrameScheduler.stats`."""
+        return self.frame_scheduler.stats()
 
     @Slot()
     def setViewOrtho(self):
@@ -936,10 +1039,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
     @Slot()
     def clearLivePlot(self):
         LOG.debug('clear live plot')
-        self.renderer.RemoveActor(self.path_cache_actor)
-        self.path_cache = PathCache(self.tooltip_position)
-        self.path_cache_actor = self.path_cache.get_actor()
-        self.renderer.AddActor(self.path_cache_actor)
+        self.path_cache.clear(self.tooltip_position)
         self.update_render()
 
     @Slot(bool)
@@ -957,7 +1057,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             self.renderer.ResetCameraClippingRange()
             camera.Zoom(0.9)
 
-        self.renderer_window.Render()
+        self.update_render(interactive=True)
 
     @Slot()
     def zoomOut(self):
@@ -970,7 +1070,7 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
             self.renderer.ResetCameraClippingRange()
             camera.Zoom(1.1)
 
-        self.renderer_window.Render()
+        self.update_render(interactive=True)
 
     @Slot(bool)
     def alphaBlend(self, alpha):
@@ -1114,6 +1214,22 @@ class VTKBackPlot(QVTKRenderWindowInteractor, VCPWidget, BaseBackPlot):
     def enableProgramTicks(self, enable):
         self._enableProgramTicks = enable
 
+    @Property(float)
+    def maxFps(self):
+        return self.frame_scheduler.max_fps
+
+    @maxFps.setter
+    def maxFps(self, fps):
+        self.frame_scheduler.max_fps = fps
+
+    @Property(float)
+    def idleFps(self):
+        return self.frame_scheduler.idle_fps
+
+    @idleFps.setter
+    def idleFps(self, fps):
+        self.frame_scheduler.idle_fps = fps
+
 
 class PathBoundaries:
     def __init__(self, camera, path_actor):
@@ -1178,17 +1294,26 @@ class PathBoundaries:
 
 
 class PathCache:
-    def __init__(self, current_position):
+    """Live plot of the tool tip path.
+
+    The points are kept in a fixed size :class:`TrailBuffer` which VTK
+    reads directly, so a long running machine does not grow the plot
+    without bound. See :mod:`qtpyvcp.lib.trail_buffer` for the INI options.
+    """
+
+    def __init__(self, current_position, **trail_options):
         self.current_position = current_position
-        self.index = 0
-        self.num_points = 2
 
+        self.trail = TrailBuffer(**trail_options)
+        self.trail.add(current_position)
+
+        # shares memory with the trail buffer, keep a reference
+        self.point_data = numpy_support.numpy_to_vtk(self.trail.points, deep=False)
         self.points = vtk.vtkPoints()
-        self.points.InsertNextPoint(current_position)
+        self.points.SetData(self.point_data)
 
         self.lines = vtk.vtkCellArray()
-        self.lines.InsertNextCell(1)  # number of points
-        self.lines.InsertCellPoint(0)
+        self.update_lines()
 
         self.lines_poligon_data = vtk.vtkPolyData()
         self.polygon_mapper = vtk.vtkPolyDataMapper()
@@ -1204,16 +1329,29 @@ class PathCache:
         self.polygon_mapper.SetInputData(self.lines_poligon_data)
         self.polygon_mapper.Update()
 
+    def update_lines(self):
+        # one poly line through the points in the trail, oldest first
+        id_type = numpy_support.get_numpy_array_type(vtk.VTK_ID_TYPE)
+        indices = self.trail.indices(id_type)
+
+        cells = np.empty(len(indices) + 1, dtype=id_type)
+        cells[0] = len(indices)
+        cells[1:] = indices
+
+        self.lines.SetCells(1, numpy_support.numpy_to_vtkIdTypeArray(cells, deep=True))
+        self.lines.Modified()
+
     def add_line_point(self, point):
-        self.index += 1
+        if not self.trail.add(point):
+            return
 
-        self.points.InsertNextPoint(point)
+        self.point_data.Modified()
         self.points.Modified()
+        self.update_lines()
 
-        self.lines.InsertNextCell(self.num_points)
-        self.lines.InsertCellPoint(self.index - 1)
-        self.lines.InsertCellPoint(self.index)
-        self.lines.Modified()
+    def clear(self, current_position):
+        self.trail.clear()
+        self.add_line_point(current_position)
 
     def get_actor(self):
         return self.actor
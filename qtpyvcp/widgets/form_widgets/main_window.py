@@ -1,7 +1,6 @@
 import os
 import sys
 
-from qtpy import uic
 from qtpy.QtGui import QKeySequence
 from qtpy.QtCore import Qt, Slot, QTimer
 from qtpy.QtWidgets import QMainWindow, QApplication, QAction, QMessageBox, \
@@ -9,6 +8,7 @@ from qtpy.QtWidgets import QMainWindow, QApplication, QAction, QMessageBox, \
 
 import qtpyvcp
 from qtpyvcp import actions
+from qtpyvcp.lib import ui_cache
 from qtpyvcp.utilities import logger
 from qtpyvcp.utilities.info import Info
 from qtpyvcp.plugins import getPlugin
@@ -97,8 +97,7 @@ class VCPMainWindow(QMainWindow):
         Args:
             ui_file (str) : Path to a .ui file to load.
         """
-        # TODO: Check for compiled *_ui.py files and load from that if exists
-        uic.loadUi(ui_file, self)
+        ui_cache.loadUi(ui_file, self)
 
     def loadStylesheet(self, stylesheet):
         """Loads a QSS stylesheet containing styles to be applied
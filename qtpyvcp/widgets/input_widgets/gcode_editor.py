@@ -27,10 +27,12 @@
 import sys
 import os
 
-from qtpy.QtCore import Property, QObject, Slot, QFile, QFileInfo, QTextStream, Signal
+from qtpy.QtCore import Property, QObject, Slot, QFile, QFileInfo, QTextStream, Signal, QTimer
 from qtpy.QtGui import QFont, QFontMetrics, QColor
 from qtpy.QtWidgets import QInputDialog, QLineEdit, QDialog, QHBoxLayout, QVBoxLayout, QLabel, QPushButton, QCheckBox
 
+from qtpyvcp.lib.frame_scheduler import FrameScheduler
+from qtpyvcp.lib.gcode_tokens import styleBytes
 from qtpyvcp.utilities import logger
 from qtpyvcp.plugins import getPlugin
 from qtpyvcp.utilities.info import Info
@@ -52,9 +54,15 @@ INFO = Info()
 # Simple custom lexer for Gcode
 # ==============================================================================
 class GcodeLexer(QsciLexerCustom):
+    # gaps before the screen bigger than this are filled, not styled
+    FILL_SIZE = 256 * 1024
+
     def __init__(self, parent=None, standalone=False):
         super(GcodeLexer, self).__init__(parent)
 
+        # (start, end) positions of the ranges filled with the default style
+        self._filled = []
+
         # This prevents doing unneeded initialization
         # when QtDesginer loads the plugin.
         if parent is None and not standalone:
@@ -105,73 +113,83 @@ class GcodeLexer(QsciLexerCustom):
         if editor is None:
             return
 
-        # scintilla works with encoded bytes, not decoded characters.
-        # this matters if the source contains non-ascii characters and
-        # a multi-byte encoding is used (e.g. utf-8)
-        source = ''
         if end > editor.length():
             end = editor.length()
+
+        # everything from start is being restyled
+        self._filled = [(a, min(b, start)) for a, b in self._filled if a < start]
+
+        # G-code lines are styled independently, so only the lines near the
+        # screen are styled. Any lines between the styled text and the screen
+        # are filled with the default style in one go, and styled properly by
+        # styleVisible when they are scrolled into view.
+        first, last = self.visibleRange(editor)
+        if first - start > self.FILL_SIZE:
+            self.startStyling(start, 0x1f)
+            self.setStyling(first - start, self.Default)
+            self._filled.append((start, first))
+            start = first
+
+        end = min(end, last)
         if end > start:
-            if sys.hexversion >= 0x02060000:
-                # faster when styling big files, but needs python 2.6
-                source = bytearray(end - start)
-                editor.SendScintilla(
-                    editor.SCI_GETTEXTRANGE, start, end, source)
-            else:
-                source = unicode(editor.text()).encode('utf-8')[start:end]
-        if not source:
+            self.startStyling(start, 0x1f)
+            self.styleRange(editor, start, end)
+
+    def visibleRange(self, editor, margin=100):
+        """Returns the positions of the start and end of the lines on screen.
+
+        Args:
+            editor (QsciScintilla) : The editor.
+            margin (int) : Number of lines above and below the screen to include.
+        """
+        send = editor.SendScintilla
+        top = send(editor.SCI_DOCLINEFROMVISIBLE, send(editor.SCI_GETFIRSTVISIBLELINE))
+        bottom = top + send(editor.SCI_LINESONSCREEN) + margin + 1
+        first = send(editor.SCI_POSITIONFROMLINE, max(0, top - margin))
+        last = send(editor.SCI_POSITIONFROMLINE, bottom)
+        if last < 0 or bottom >= send(editor.SCI_GETLINECOUNT):
+            last = editor.length()
+        return first, last
+
+    def styleRange(self, editor, start, end):
+        # scintilla works with encoded bytes, not decoded characters.
+        # this matters if the source contains non-ascii characters and
+        # a multi-byte encoding is used (e.g. utf-8)
+        source = bytearray(end - start)
+        editor.SendScintilla(editor.SCI_GETTEXTRANGE, start, end, source)
+
+        # style the whole range with one call
+        styles = bytes(styleBytes(source))
+        editor.SendScintilla(editor.SCI_SETSTYLINGEX, len(styles), styles)
+
+    def styleVisible(self, *args):
+        """Style any default filled lines which have been scrolled into view."""
+        editor = self.editor()
+        if editor is None or not self._filled:
             return
 
-        # the line index will also be needed to implement folding
-        index = editor.SendScintilla(editor.SCI_LINEFROMPOSITION, start)
-        if index > 0:
-            # the previous state may be needed for multi-line styling
-            pos = editor.SendScintilla(
-                editor.SCI_GETLINEENDPOSITION, index - 1)
-            state = editor.SendScintilla(editor.SCI_GETSTYLEAT, pos)
-        else:
-            state = self.Default
-
-        set_style = self.setStyling
-        self.startStyling(start, 0x1f)
-
-        # scintilla always asks to style whole lines
-        for line in source.splitlines(True):
-            # print line
-            length = len(line)
-            graymode = False
-            msg = ('msg' in line.lower() or 'debug' in line.lower())
-            for char in str(line):
-                # print char
-                if char == '(':
-                    graymode = True
-                    set_style(1, self.Comment)
-                    continue
-                elif char == ')':
-                    graymode = False
-                    set_style(1, self.Comment)
-                    continue
-                elif graymode:
-                    if msg and char.lower() in ('m', 's', 'g', ',', 'd', 'e', 'b', 'u'):
-                        set_style(1, self.Assignment)
-                        if char == ',': msg = False
-                    else:
-                        set_style(1, self.Comment)
-                    continue
-                elif char in ('%', '<', '>', '#', '='):
-                    state = self.Assignment
-                elif char in ('[', ']'):
-                    state = self.Value
-                elif char.isalpha():
-                    state = self.Key
-                elif char.isdigit():
-                    state = self.Default
-                else:
-                    state = self.Default
-                set_style(1, state)
-
-            # folding implementation goes here
-            index += 1
+        end_styled = editor.SendScintilla(editor.SCI_GETENDSTYLED)
+        first, last = self.visibleRange(editor)
+
+        filled = []
+        for a, b in self._filled:
+            b = min(b, end_styled)
+            lo, hi = max(a, first), min(b, last)
+            if lo >= hi:
+                if a < b:
+                    filled.append((a, b))
+                continue
+
+            self.startStyling(lo, 0x1f)
+            self.styleRange(editor, lo, hi)
+            if a < lo:
+                filled.append((a, lo))
+            if hi < b:
+                filled.append((hi, b))
+
+        self._filled = filled
+        # styling moves the end of the styled text, so put it back
+        self.startStyling(end_styled, 0x1f)
 
 
 # ==============================================================================
@@ -179,6 +197,8 @@ class GcodeLexer(QsciLexerCustom):
 # ==============================================================================
 class EditorBase(QsciScintilla):
     ARROW_MARKER_NUM = 8
+    # files are loaded in chunks of this size, one per event loop pass
+    CHUNK_SIZE = 4 * 1024 * 1024
 
     def __init__(self, parent=None):
         super(EditorBase, self).__init__(parent)
@@ -224,6 +244,18 @@ class EditorBase(QsciScintilla):
         self.lexer = GcodeLexer(self)
         self.lexer.setDefaultFont(font)
         self.setLexer(self.lexer)
+        self.SCN_UPDATEUI.connect(self.lexer.styleVisible)
+
+        # files bigger than this are opened read only, 0 for no limit
+        self.huge_file_size = 20 * 1024 * 1024
+        self.huge_file = False
+
+        # the editable state to restore once a file has loaded, files are
+        # read only while loading and huge files stay read only
+        self._read_only = True
+        self._load_file = None
+        self._load_timer = QTimer(self)
+        self._load_timer.timeout.connect(self._loadChunk)
 
         # default gray background
         self.set_background_color('#C0C0C0')
@@ -354,6 +386,8 @@ class EditorBase(QsciScintilla):
 # ==============================================================================
 class GcodeEditor(EditorBase, QObject):
     ARROW_MARKER_NUM = 8
+    # status channels the highlighted line can follow
+    LINE_CHANNELS = ('motion_line', 'current_line', 'read_line')
 
     def __init__(self, parent=None):
         super(GcodeEditor, self).__init__(parent)
@@ -364,6 +398,16 @@ class GcodeEditor(EditorBase, QObject):
         self.last_line = None
         # self.setEolVisibility(True)
 
+        # line tracking, the highlight is updated at most max_line_rate
+        # times a second and only the latest line is shown
+        self._follow_line = 'motion_line'
+        self._status_connected = False
+        self._pending_line = None
+        self._line_marker = None
+        self.scroll_margin = 3
+        self.look_ahead = 5
+        self.line_scheduler = FrameScheduler(self, self._updateHighlight, max_fps=20)
+
         self.is_editor = False
 
         self.dialog = FindReplaceDialog(parent=self)
@@ -382,6 +426,13 @@ class GcodeEditor(EditorBase, QObject):
 
     @Slot(bool)
     def setEditable(self, state):
+        self._read_only = not state
+        if self._load_file is not None:
+            # applied once the file has loaded
+            return
+        if state and self.huge_file:
+            LOG.warning("The file is too big to edit, it was opened read only")
+            return
         if state:
             self.setReadOnly(False)
         else:
@@ -454,13 +505,79 @@ class GcodeEditor(EditorBase, QObject):
     @is_editor.setter
     def is_editor(self, enabled):
         self._is_editor = enabled
-        if not self._is_editor:
-            STATUS.file.notify(self.load_program)
-            STATUS.motion_line.onValueChanged(self.highlight_line)
+        if not self._is_editor and not self._status_connected:
+            # connect once the designer properties have been set
+            QTimer.singleShot(0, self._connectStatus)
 
-            # STATUS.connect('line-changed', self.highlight_line)
-            # if self.idle_line_reset:
-            #     STATUS.connect('interp_idle', lambda w: self.set_line_number(None, 0))
+    def _connectStatus(self):
+        if self._is_editor or self._status_connected:
+            return
+        self._status_connected = True
+        STATUS.file.notify(self.load_program)
+        getattr(STATUS, self._follow_line).notify(self.highlight_line)
+        # STATUS.connect('line-changed', self.highlight_line)
+        # if self.idle_line_reset:
+        #     STATUS.connect('interp_idle', lambda w: self.set_line_number(None, 0))
+
+    @Property(str)
+    def followLine(self):
+        """Property to set the status line the highlight follows (str).
+
+        one of motion_line, current_line or read_line
+        """
+        return self._follow_line
+
+    @followLine.setter
+    def followLine(self, channel):
+        if channel not in self.LINE_CHANNELS:
+            LOG.error("Can't follow '{}', must be one of {}".format(channel, ', '.join(self.LINE_CHANNELS)))
+            return
+        if self._status_connected:
+            LOG.warning("followLine must be set before the status is connected")
+            return
+        self._follow_line = channel
+
+    @Property(float)
+    def maxLineRate(self):
+        """Property to set the maximum highlight updates per second (float)."""
+        return self.line_scheduler.max_fps
+
+    @maxLineRate.setter
+    def maxLineRate(self, rate):
+        self.line_scheduler.max_fps = rate
+
+    @Property(int)
+    def scrollMargin(self):
+        """Property to set the lines kept between the highlight and the edge of the view (int).
+
+        the view only scrolls when the highlighted line enters the margin
+        """
+        return self.scroll_margin
+
+    @scrollMargin.setter
+    def scrollMargin(self, lines):
+        self.scroll_margin = max(0, lines)
+
+    @Property(int)
+    def lookAhead(self):
+        """Property to set the lines kept in view below the highlighted line (int)."""
+        return self.look_ahead
+
+    @lookAhead.setter
+    def lookAhead(self, lines):
+        self.look_ahead = max(0, lines)
+
+    @Property(int)
+    def hugeFileSize(self):
+        """Property to set the size above which files are opened read only (int).
+
+        in MB, 0 to allow editing files of any size
+        """
+        return self.huge_file_size // (1024 * 1024)
+
+    @hugeFileSize.setter
+    def hugeFileSize(self, size):
+        self.huge_file_size = max(0, size) * 1024 * 1024
 
     @Property(str)
     def backgroundcolor(self):
@@ -494,37 +611,116 @@ class GcodeEditor(EditorBase, QObject):
         else:
             self._last_filename = fname
         self.load_text(fname)
+        self._line_marker = None
         # self.zoomTo(6)
         self.setCursorPosition(0, 0)
 
 
     def load_text(self, fname):
+        self._stopLoading()
         try:
             fp = os.path.expanduser(fname)
-            self.setText(open(fp).read())
+            fh = open(fp, 'rb')
+            size = os.fstat(fh.fileno()).st_size
         except:
             LOG.error('File path is not valid: {}'.format(fname))
             self.setText('')
             return
 
+        if not self.huge_file:
+            self._read_only = self.isReadOnly()
+
+        self.huge_file = 0 < self.huge_file_size < size
+        if self.huge_file:
+            LOG.info("Opening {} read only, the file is {:.0f} MB".format(fname, size / 1048576.))
+
+        # edits made while loading would be lost when the undo buffer is
+        # reset, so stay read only until the last chunk is loaded
+        self.setReadOnly(True)
+
+        # the first chunk is loaded straight away and the rest in the
+        # background. the raw bytes are appended, which is much faster
+        # than converting the whole file to a QString for setText
+        self.setText('')
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, False)
+        self.SendScintilla(QsciScintilla.SCI_ALLOCATE, size + 1)
+        self._load_file = fh
+        self._loadChunk()
+        if self._load_file is not None:
+            self._load_timer.start(0)
+
         self.last_line = None
         self.ensureCursorVisible()
         self.SendScintilla(QsciScintilla.SCI_VERTICALCENTRECARET)
 
+    def _loadChunk(self):
+        chunk = self._load_file.read(self.CHUNK_SIZE)
+        if chunk:
+            read_only = self.isReadOnly()
+            self.SendScintilla(QsciScintilla.SCI_SETREADONLY, False)
+            self.SendScintilla(QsciScintilla.SCI_APPENDTEXT, len(chunk), chunk)
+            self.SendScintilla(QsciScintilla.SCI_SETREADONLY, read_only)
+
+        if len(chunk) < self.CHUNK_SIZE:
+            self._stopLoading()
+            # huge files are read only, so don't need undo
+            self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, not self.huge_file)
+            self.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+            self.SendScintilla(QsciScintilla.SCI_SETSAVEPOINT)
+
+    def _stopLoading(self):
+        self._load_timer.stop()
+        if self._load_file is not None:
+            self._load_file.close()
+            self._load_file = None
+            self.setReadOnly(self._read_only or self.huge_file)
+
     def highlight_line(self, line):
         # if STATUS.is_auto_running():
         #     if not STATUS.old['file'] == self._last_filename:
         #         LOG.debug('should reload the display')
         #         self.load_text(STATUS.old['file'])
         #         self._last_filename = STATUS.old['file']
-        self.markerAdd(line, self.ARROW_MARKER_NUM)
-        if self.last_line:
-            self.markerDelete(self.last_line, self.ARROW_MARKER_NUM)
-        self.setCursorPosition(line, 0)
-        self.ensureCursorVisible()
-        self.SendScintilla(QsciScintilla.SCI_VERTICALCENTRECARET)
+
+        # lines can change much faster than the screen is updated, so only
+        # the latest line is shown on the next update
+        self._pending_line = line
+        self.line_scheduler.requestFrame()
+
+    def _updateHighlight(self):
+        line = self._pending_line
+        if line is None or line == self.last_line:
+            return
+
+        # move the one marker rather than searching for the old one
+        if self._line_marker is not None:
+            self.markerDeleteHandle(self._line_marker)
+        self._line_marker = self.markerAdd(line, self.ARROW_MARKER_NUM)
+
+        # move the caret without scrolling to it
+        pos = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+        if pos >= 0:
+            self.SendScintilla(QsciScintilla.SCI_SETEMPTYSELECTION, pos)
+        self.scrollToLine(line)
         self.last_line = line
 
+    def scrollToLine(self, line):
+        """Scroll only if `line` is outside the view, less the scroll margin.
+
+        The line is put at the top of the view, after the margin, so the
+        view scrolls once per page instead of once per line.
+        """
+        send = self.SendScintilla
+        visible = send(QsciScintilla.SCI_VISIBLEFROMDOCLINE, line)
+        first = send(QsciScintilla.SCI_GETFIRSTVISIBLELINE)
+        height = send(QsciScintilla.SCI_LINESONSCREEN)
+
+        margin = min(self.scroll_margin, max(0, (height - 1) // 2))
+        look_ahead = min(self.look_ahead, max(0, height - 2 * margin - 1))
+        if first + margin <= visible < first + height - margin - look_ahead:
+            return
+        send(QsciScintilla.SCI_SETFIRSTVISIBLELINE, max(0, visible - margin))
+
     def set_line_number(self, line):
         pass
 
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+"""VTK backplot load time benchmark.
+
+Compares the time taken to collect the toolpath and build the VTK poly
+data for a program with the original ``VTKCanon`` (nested python lists
+and one ``vtkLine`` per segment) and the current one (packed arrays handed
+to VTK in one step through ``vtk.util.numpy_support``).
+
+The canon needs a running LinuxCNC (e.g. a sim config) for its stat object.
+If no G-code file is given a synthetic zig-zag toolpath is used, otherwise
+the file is run through the interpreter, so the interpreter time can be
+compared with the time spent building the poly data.
+
+Usage::
+
+    $ python video_tests/vtk_test/benchmark.py [--segments=N] [file.ngc]
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+import vtk
+import gcode
+import linuxcnc
+
+from qtpyvcp.widgets.display_widgets.vtk_backplot.vtk_backplot import VTKCanon
+
+
+class LegacyVTKCanon(VTKCanon):
+    """Copy of the original per segment ``VTKCanon`` path building (inch only)."""
+
+    def __init__(self, *args, **kwargs):
+        super(LegacyVTKCanon, self).__init__(*args, **kwargs)
+        for origin in self.path_points:
+            self.path_points[origin] = list()
+
+    def set_g5x_offset(self, index, *args):
+        origin = self.index_map[index]
+        if origin not in self.path_actors.keys():
+            super(LegacyVTKCanon, self).set_g5x_offset(index, *args)
+            self.path_points[origin] = list()
+
+    def add_path_point(self, line_type, start_point, end_point):
+        if self.ignore_next is True:
+            self.ignore_next = False
+            return
+
+        if self.previous_origin != self.origin:
+            self.previous_origin = self.origin
+            self.ignore_next = True
+            return
+
+        line = list()
+        line.append(start_point)
+        line.append(end_point)
+        self.path_points.get(self.origin).append((line_type, line))
+
+    def draw_lines(self):
+        for origin, data in self.path_points.items():
+            path_actor = self.path_actors.get(origin)
+            index = 0
+            end_point = None
+            last_line_type = None
+
+            for line_type, line_data in data:
+                start_point = line_data[0]
+                end_point = line_data[1]
+                last_line_type = line_type
+
+                path_actor.points.InsertNextPoint(start_point[:3])
+                path_actor.colors.InsertNextTypedTuple(self.path_colors[line_type])
+
+                line = vtk.vtkLine()
+                line.GetPointIds().SetId(0, index)
+                line.GetPointIds().SetId(1, index + 1)
+                path_actor.lines.InsertNextCell(line)
+                index += 1
+
+            if end_point:
+                path_actor.points.InsertNextPoint(end_point[:3])
+                path_actor.colors.InsertNextTypedTuple(self.path_colors[last_line_type])
+
+                line = vtk.vtkLine()
+                line.GetPointIds().SetId(0, index - 1)
+                line.GetPointIds().SetId(1, index)
+                path_actor.lines.InsertNextCell(line)
+
+            self.path_points[origin] = list()
+
+            path_actor.poly_data.SetPoints(path_actor.points)
+            path_actor.poly_data.SetLines(path_actor.lines)
+            path_actor.poly_data.GetCellData().SetScalars(path_actor.colors)
+            path_actor.data_mapper.SetInputData(path_actor.poly_data)
+            path_actor.data_mapper.Update()
+            path_actor.SetMapper(path_actor.data_mapper)
+
+
+def synthetic_path(canon, segments):
+    """Feed a zig-zag toolpath with a traverse every 100 segments."""
+    last = (0.0,) * 9
+    for i in xrange(segments):
+        pos = (float(i % 100), float(i // 100) * .1, -.1) + (0.0,) * 6
+        canon.add_path_point('traverse' if i % 100 == 0 else 'feed', last, pos)
+        last = pos
+
+
+def parse_file(canon, filename, ini):
+    unitcode = "G%d" % (20 + (canon.stat.linear_units == 1))
+    initcode = ini.find("RS274NGC", "RS274NGC_STARTUP_CODE") or ""
+    parameter_file = ini.find("RS274NGC", "PARAMETER_FILE") or "linuxcnc.var"
+    parameter_file = os.path.join(os.path.dirname(os.environ['INI_FILE_NAME']), parameter_file)
+
+    td = tempfile.mkdtemp()
+    try:
+        canon.parameter_file = os.path.join(td, 'bench.var')
+        if os.path.exists(parameter_file):
+            shutil.copy(parameter_file, canon.parameter_file)
+        gcode.parse(filename, canon, unitcode, initcode)
+    finally:
+        shutil.rmtree(td)
+
+
+def bench(name, canon_class, collect):
+    canon = canon_class()
+
+    start = time.time()
+    collect(canon)
+    collect_time = time.time() - start
+
+    start = time.time()
+    canon.draw_lines()
+    draw_time = time.time() - start
+
+    cells = sum(actor.poly_data.GetNumberOfCells() for actor in canon.path_actors.values())
+    print('{:<10} {:>10.3f} s collect {:>10.3f} s draw_lines  ({} cells)'
+          .format(name, collect_time, draw_time, cells))
+    return collect_time + draw_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=500000,
+                        help='number of segments in the synthetic toolpath')
+    parser.add_argument('file', nargs='?', help='G-code file to load')
+    opts = parser.parse_args()
+
+    if opts.file:
+        ini = linuxcnc.ini(os.environ['INI_FILE_NAME'])
+        collect = lambda canon: parse_file(canon, opts.file, ini)
+        print('Loading {}\n'.format(opts.file))
+    else:
+        collect = lambda canon: synthetic_path(canon, opts.segments)
+        print('Synthetic toolpath, {} segments\n'.format(opts.segments))
+
+    before = bench('before', LegacyVTKCanon, collect)
+    after = bench('after', VTKCanon, collect)
+    print('{:<10} {:>10.1f}x'.format('speedup', before / after))
+
+
+if __name__ == '__main__':
+    main()